@@ -0,0 +1,102 @@
+import argparse
+import collections
+import json
+import random
+import sys
+
+from benchmarks import suite
+
+# the hot paths guarded by default
+DEFAULT_NAMES = ('money', 'make_ranked_payments', 'make_split_payments', 'MinimumPaymentManager', 'calculate_payoff')
+
+Comparison = collections.namedtuple('Comparison', ['key', 'baseline', 'current', 'ratio', 'low', 'high', 'threshold', 'regressed', 'missing'])
+
+
+def result_key(result):
+    return '{}[{}]'.format(result['name'], result['parameter'])
+
+
+def ratio_interval(baseline_samples, current_samples, confidence=0.95, resamples=2000, seed=0):
+    # bootstrap confidence interval of median(current) / median(baseline)
+    rng = random.Random(seed)
+    ratios = sorted(suite.median([rng.choice(current_samples) for _ in current_samples]) /
+                    suite.median([rng.choice(baseline_samples) for _ in baseline_samples])
+                    for _ in range(resamples))
+    tail = (1 - confidence) / 2
+    return ratios[int(tail * resamples)], ratios[int((1 - tail) * resamples) - 1]
+
+
+def compare(baseline, current, threshold=0.1, confidence=0.95):
+    # a benchmark regressed only when even the optimistic end of the interval is more than threshold slower,
+    # so noise between runs doesn't fail the gate; thresholds in the baseline override the default per name.
+    # A baseline benchmark which didn't run (renamed, removed or crashed) is missing and counts as regressed.
+    thresholds = baseline.get('thresholds', {})
+    current_results = {result_key(r): r for r in current['results']}
+    comparisons = []
+    for result in baseline['results']:
+        key = result_key(result)
+        limit = thresholds.get(key, thresholds.get(result['name'], threshold))
+        if key not in current_results:
+            comparisons.append(Comparison(key, result['median'], None, None, None, None, limit, True, True))
+            continue
+        samples = current_results[key]['samples']
+        low, high = ratio_interval(result['samples'], samples, confidence)
+        comparisons.append(Comparison(key, result['median'], suite.median(samples), suite.median(samples) / result['median'],
+                                      low, high, limit, low > 1 + limit, False))
+    return comparisons
+
+
+def rerun(baseline, repeats, min_time, out=None):
+    keys = set(result_key(r) for r in baseline['results'])
+    benchmarks = [b for b in suite.default_benchmarks() if result_key(b._asdict()) in keys]
+    return suite.report(suite.run(benchmarks, repeats, min_time, out))
+
+
+def _load(file_name):
+    with open(file_name, 'rb') as f:
+        return json.load(f)
+
+
+def _dump(data, file_name):
+    with open(file_name, 'wb') as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Stores benchmark baselines and fails when a benchmark has become slower than its baseline.')
+    parser.add_argument('command', choices=('save', 'check'), help='save a new baseline or check against the stored one')
+    parser.add_argument('names', nargs='*', help='benchmarks to save (default: {})'.format(', '.join(DEFAULT_NAMES)))
+    parser.add_argument('-b', '--baseline', default='benchmarks-baseline.json', help='baseline JSON file')
+    parser.add_argument('-c', '--current', help='check this suite JSON output instead of running the benchmarks again')
+    parser.add_argument('-r', '--repeats', type=int, default=9, help='samples per benchmark')
+    parser.add_argument('-t', '--min-time', type=float, default=0.1, help='minimum seconds per sample')
+    parser.add_argument('--threshold', type=float, default=0.1, help='allowed slow down, e.g. 0.1 for 10%%')
+    parser.add_argument('--confidence', type=float, default=0.95, help='confidence level of the intervals')
+    args = parser.parse_args(argv)
+
+    if args.command == 'save':
+        benchmarks = suite.select(suite.default_benchmarks(), args.names or DEFAULT_NAMES)
+        _dump(suite.report(suite.run(benchmarks, args.repeats, args.min_time, sys.stderr)), args.baseline)
+        return 0
+
+    baseline = _load(args.baseline)
+    current = _load(args.current) if args.current else rerun(baseline, args.repeats, args.min_time, sys.stderr)
+    comparisons = compare(baseline, current, args.threshold, args.confidence)
+    print "{:>32s} {:>12s} {:>12s} {:>7s} {:>17s}".format('benchmark', 'baseline', 'current', 'ratio', 'interval')
+    for c in comparisons:
+        if c.missing:
+            print "{:>32s} {:>11.6f}s {:>12s} MISSING".format(c.key, c.baseline, '-')
+            continue
+        print "{:>32s} {:>11.6f}s {:>11.6f}s {:>7.3f} [{:>6.3f}, {:>6.3f}]{}".format(c.key, c.baseline, c.current, c.ratio, c.low, c.high,
+                                                                                  ' REGRESSED' if c.regressed else '')
+    regressed = [c.key for c in comparisons if c.regressed and not c.missing]
+    missing = [c.key for c in comparisons if c.missing]
+    if regressed:
+        print "Regressed: {}".format(', '.join(regressed))
+    if missing:
+        print "Missing: {}".format(', '.join(missing))
+    return 1 if regressed or missing else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,232 @@
+import argparse
+import collections
+import json
+import math
+import platform
+import random
+import sys
+import timeit
+from datetime import date
+
+import loan_payoff_tools
+import loan_payoff_tools.analysis as analysis
+import loan_payoff_tools.max_payment_determiner as max_payment_determiner
+import loan_payoff_tools.payment_manager as payment_manager
+from loan_payoff_tools.money import Money
+from loan_payoff_tools.payoff_calculator import calculate_payoff
+
+ACCOUNT_COUNTS = (3, 30, 300, 3000)
+HORIZON_YEARS = (10, 30, 50)
+STARTING_DATE = date(2014, 10, 1)
+
+Benchmark = collections.namedtuple('Benchmark', ['name', 'parameter', 'setup'])
+
+
+def generate_accounts(count, seed=0):
+    # same accounts for the same count on every run so results stay comparable
+    rng = random.Random(seed)
+    return [payment_manager.Account('Bank{}'.format(i % 7), '{:04d}'.format(i), 'Borrower',
+                                    Money(cents=rng.randint(100000, 5000000)), rng.choice((0.02, 0.035, 0.05, 0.068, 0.079)),
+                                    Money(cents=rng.randint(2500, 20000)), date(2014, 1, 1))
+            for i in range(count)]
+
+
+def payment_for_horizon(accounts, years):
+    # the level payment which pays the whole balance off in about years at the average rate
+    balance = float(sum([a.initial_balance for a in accounts], Money(0)))
+    rate = sum(float(a.initial_balance) * a.interest for a in accounts) / balance / 12
+    return Money(balance * rate / (1 - (1 + rate) ** (-12 * years)))
+
+
+def _horizon_accounts():
+    # the same accounts for every horizon, which is set by the payment from payment_for_horizon alone: one rate,
+    # so paying the level payment takes the whole horizon whatever the order, and minimums well under it
+    return [payment_manager.Account(a.debtor, a.debtor_id, a.debtee, a.initial_balance, 0.05, Money(float(a.initial_balance) / 2000), a.last_updated)
+            for a in generate_accounts(10)]
+
+
+def _money_construct(count):
+    rng = random.Random(count)
+    values = [rng.uniform(0, 10000) for _ in range(count)]
+    return lambda: [Money(v) for v in values]
+
+
+def _money_add(count):
+    values = [Money(cents=c) for c in range(count)]
+    return lambda: sum(values, Money(0))
+
+
+def _money_multiply(count):
+    values = [Money(cents=c) for c in range(count)]
+    return lambda: [v * 1.004 for v in values]
+
+
+def _money_compare(count):
+    values = [Money(cents=c) for c in range(count)]
+    return lambda: sorted(values, reverse=True)
+
+
+def _allocation(count):
+    accounts = generate_accounts(count)
+    balances = {a: a.initial_balance for a in accounts}
+    max_payment = sum([a.minimum_payment for a in accounts], Money(0)) * 1.5
+    return balances, max_payment
+
+
+def _make_ranked_payments(count):
+    balances, max_payment = _allocation(count)
+
+    def rank_by_highest_rate(account, balance):
+        return (-account.interest, balance, (account.debtor, account.debtor_id, account.debtee))
+    return lambda: payment_manager.make_ranked_payments(rank_by_highest_rate, max_payment, balances, False)
+
+
+def _make_split_payments(count):
+    balances, max_payment = _allocation(count)
+
+    def split_by_balance(a_to_b):
+        total = float(sum(a_to_b.values(), Money(0)))
+        return {a: float(b) / total for a, b in a_to_b.items()}
+    return lambda: payment_manager.make_split_payments(split_by_balance, max_payment, balances, False)
+
+
+def _minimum_payment_manager(count):
+    balances, max_payment = _allocation(count)
+    manager = payment_manager.MinimumPaymentManager()
+    return lambda: manager(max_payment, balances)
+
+
+def _calculate_payoff(years):
+    accounts = _horizon_accounts()
+    mpd = max_payment_determiner.ConstantMaxPaymentDeterminer(payment_for_horizon(accounts, years))
+    pm = payment_manager.OptimalPaymentManager()
+    return lambda: calculate_payoff(mpd, pm, pm, accounts, STARTING_DATE)
+
+
+def _analyze(years):
+    accounts = _horizon_accounts()
+    mpd = max_payment_determiner.ConstantMaxPaymentDeterminer(payment_for_horizon(accounts, years))
+    pm = payment_manager.OptimalPaymentManager()
+    return lambda: analysis.analyze(mpd, pm, pm, accounts, STARTING_DATE)
+
+
+def default_benchmarks():
+    benchmarks = []
+    for name, setup in [('money.construct', _money_construct), ('money.add', _money_add),
+                        ('money.multiply', _money_multiply), ('money.compare', _money_compare),
+                        ('make_ranked_payments', _make_ranked_payments), ('make_split_payments', _make_split_payments),
+                        ('MinimumPaymentManager', _minimum_payment_manager)]:
+        benchmarks.extend(Benchmark(name, count, setup) for count in ACCOUNT_COUNTS)
+    for name, setup in [('calculate_payoff', _calculate_payoff), ('analyze', _analyze)]:
+        benchmarks.extend(Benchmark(name, years, setup) for years in HORIZON_YEARS)
+    return benchmarks
+
+
+def measure(fn, repeats=5, min_time=0.1):
+    # calibrate the loop count so a sample is long enough for the timer, then take repeats samples;
+    # each sample is the time per call
+    number = 1
+    while True:
+        elapsed = min(timeit.repeat(fn, number=number, repeat=1))
+        if elapsed >= min_time or number >= 1000000:
+            break
+        number *= max(2, min(10, int(math.ceil(min_time / max(elapsed, 1e-9)))))
+    samples = [elapsed] + timeit.repeat(fn, number=number, repeat=repeats - 1)
+    return number, [s / number for s in samples]
+
+
+def median(values):
+    values = sorted(values)
+    middle = len(values) / 2
+    if len(values) % 2:
+        return values[middle]
+    return (values[middle - 1] + values[middle]) / 2.0
+
+
+def run(benchmarks, repeats=5, min_time=0.1, out=None):
+    results = []
+    for benchmark in benchmarks:
+        number, samples = measure(benchmark.setup(benchmark.parameter), repeats, min_time)
+        result = {'name': benchmark.name, 'parameter': benchmark.parameter, 'number': number,
+                  'samples': samples, 'median': median(samples), 'min': min(samples)}
+        if out is not None:
+            out.write("{:>24s} {:>6} {:>12.6f}s\n".format(benchmark.name, benchmark.parameter, result['median']))
+            out.flush()
+        results.append(result)
+    return results
+
+
+def scaling_curves(results):
+    # the exponent is the least squares slope of log(median) over log(parameter), e.g. ~1 for linear and ~2 for quadratic
+    curves = collections.OrderedDict()
+    for result in results:
+        curve = curves.setdefault(result['name'], {'parameters': [], 'medians': [], 'exponent': None})
+        curve['parameters'].append(result['parameter'])
+        curve['medians'].append(result['median'])
+    for curve in curves.values():
+        points = [(math.log(p), math.log(m)) for p, m in zip(curve['parameters'], curve['medians']) if p > 0 and m > 0]
+        if len(points) >= 2:
+            mean_x = sum(x for x, _ in points) / len(points)
+            mean_y = sum(y for _, y in points) / len(points)
+            spread = sum((x - mean_x) ** 2 for x, _ in points)
+            if spread:
+                curve['exponent'] = sum((x - mean_x) * (y - mean_y) for x, y in points) / spread
+    return curves
+
+
+def report(results):
+    return {'loan_payoff_tools': loan_payoff_tools.__version__,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'results': results,
+            'curves': scaling_curves(results)}
+
+
+def dump_curves_to_png(output_file, curves):
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    fig, (sizes, horizons) = plt.subplots(1, 2, figsize=(14, 6))
+    for name, curve in curves.items():
+        axes = horizons if name in ('calculate_payoff', 'analyze') else sizes
+        axes.loglog(curve['parameters'], curve['medians'], marker='o', label=name)
+    sizes.set_xlabel('accounts')
+    horizons.set_xlabel('years')
+    for axes in (sizes, horizons):
+        axes.set_ylabel('seconds per call')
+        axes.grid(True, which='both')
+        axes.legend(loc='best', fontsize='small')
+    fig.savefig(output_file)
+    plt.close(fig)
+
+
+def select(benchmarks, names):
+    if not names:
+        return benchmarks
+    return [b for b in benchmarks if any(name in b.name for name in names)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Times money, payment allocation and whole simulations and writes the results as JSON.')
+    parser.add_argument('names', nargs='*', help='only run benchmarks whose name contains one of these')
+    parser.add_argument('-o', '--output', help='JSON file to write (default: stdout)')
+    parser.add_argument('-r', '--repeats', type=int, default=5, help='samples per benchmark')
+    parser.add_argument('-t', '--min-time', type=float, default=0.1, help='minimum seconds per sample')
+    parser.add_argument('--png', help='also plot the scaling curves to this PNG file (needs matplotlib)')
+    args = parser.parse_args(argv)
+
+    results = run(select(default_benchmarks(), args.names), args.repeats, args.min_time, sys.stderr)
+    data = report(results)
+    if args.output:
+        with open(args.output, 'wb') as f:
+            json.dump(data, f, indent=2, sort_keys=True)
+    else:
+        json.dump(data, sys.stdout, indent=2, sort_keys=True)
+        sys.stdout.write('\n')
+    if args.png:
+        dump_curves_to_png(args.png, data['curves'])
+
+
+if __name__ == '__main__':
+    main()
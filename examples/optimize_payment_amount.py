@@ -47,16 +47,16 @@ def generate_scenarios(personal_information, accounts, minimum_payment, incremen
     # This determines how the additional monthly payments is split amongst the accounts
     most_interest_bonus_payment_manager = payment_manager.PayMostInterestPaymentPaymentManager()
 
-    scenarios = []
-    for i in range(iterations):
-        payment = minimum_payment + increment*i
-        scenario = analysis.analyze(max_payment_determiner_factory(payment),
-                                    even_split_payment_manager,
-                                    most_interest_bonus_payment_manager,
-                                    accounts)
-        scenarios.append(scenario)
-
-    return scenarios
+    payments = [minimum_payment + increment*i for i in range(iterations)]
+    # the ranking is updated as each chunk of scenarios completes; the last one covers every scenario
+    for scenarios in analysis.grid_search([max_payment_determiner_factory],
+                                          payments,
+                                          [even_split_payment_manager],
+                                          [most_interest_bonus_payment_manager],
+                                          accounts):
+        pass
+
+    return sorted(scenarios, key=lambda s: s.max_payment_determiner.initial_max_payment)
 
 
 def display_scenarios(scenarios):
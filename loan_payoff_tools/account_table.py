@@ -0,0 +1,115 @@
+import array
+import ctypes
+import datetime
+from multiprocessing import sharedctypes
+
+from money import Money
+from payment_manager import Account
+
+
+class AccountTable(object):
+    # accounts stored column by column; money columns hold cents
+
+    def __init__(self):
+        self.debtor = []
+        self.debtor_id = []
+        self.debtee = []
+        self.initial_balance = array.array('l')
+        self.interest = array.array('d')
+        self.minimum_payment = array.array('l')
+        self.last_updated = []
+
+    @classmethod
+    def from_accounts(cls, accounts):
+        table = cls()
+        for a in accounts:
+            table.append(a.debtor, a.debtor_id, a.debtee, a.initial_balance.cents, a.interest, a.minimum_payment.cents, a.last_updated)
+        return table
+
+    def __len__(self):
+        return len(self.initial_balance)
+
+    def append(self, debtor, debtor_id, debtee, initial_balance, interest, minimum_payment, last_updated):
+        self.debtor.append(debtor)
+        self.debtor_id.append(debtor_id)
+        self.debtee.append(debtee)
+        self.initial_balance.append(initial_balance)
+        self.interest.append(interest)
+        self.minimum_payment.append(minimum_payment)
+        self.last_updated.append(last_updated)
+
+    def account(self, index):
+        return Account(self.debtor[index], self.debtor_id[index], self.debtee[index],
+                       Money(cents=self.initial_balance[index]), self.interest[index],
+                       Money(cents=self.minimum_payment[index]), self.last_updated[index])
+
+    def accounts(self):
+        return [self.account(i) for i in range(len(self))]
+
+    def share(self):
+        return SharedAccountTable(self)
+
+
+def _share_strings(values):
+    # the strings are concatenated into one buffer of utf-8 bytes; value i is text[offsets[i]:offsets[i + 1]],
+    # decoded again if it was unicode
+    encoded = [value.encode('utf-8') if isinstance(value, unicode) else value for value in values]
+    offsets = sharedctypes.RawArray(ctypes.c_long, len(encoded) + 1)
+    position = 0
+    for i, value in enumerate(encoded):
+        offsets[i] = position
+        position += len(value)
+    offsets[len(encoded)] = position
+    text = sharedctypes.RawArray(ctypes.c_char, max(position, 1))
+    text.raw = ''.join(encoded).ljust(len(text), '\0')
+    is_unicode = sharedctypes.RawArray(ctypes.c_bool, [isinstance(value, unicode) for value in values])
+    return text, offsets, is_unicode
+
+
+def _unshare_strings(text, offsets, is_unicode):
+    raw = text.raw
+    values = [raw[offsets[i]:offsets[i + 1]] for i in range(len(offsets) - 1)]
+    return [value.decode('utf-8') if is_unicode[i] else value for i, value in enumerate(values)]
+
+
+def _unshare_string(text, offsets, is_unicode, index):
+    value = text[offsets[index]:offsets[index + 1]]
+    return value.decode('utf-8') if is_unicode[index] else value
+
+
+class SharedAccountTable(object):
+    # An AccountTable copied once into shared memory (sharedctypes, since python 2 has no
+    # multiprocessing.shared_memory). Pass it to a Pool through initargs so forked workers
+    # inherit it instead of unpickling every account with every task; workers only read it.
+
+    def __init__(self, table):
+        self.size = len(table)
+        self.debtor = _share_strings(table.debtor)
+        self.debtor_id = _share_strings(table.debtor_id)
+        self.debtee = _share_strings(table.debtee)
+        self.initial_balance = sharedctypes.RawArray(ctypes.c_long, table.initial_balance)
+        self.interest = sharedctypes.RawArray(ctypes.c_double, table.interest)
+        self.minimum_payment = sharedctypes.RawArray(ctypes.c_long, table.minimum_payment)
+        # ordinal days, 0 when unknown
+        self.last_updated = sharedctypes.RawArray(ctypes.c_long, [d.toordinal() if d else 0 for d in table.last_updated])
+
+    def __len__(self):
+        return self.size
+
+    def account(self, index):
+        # straight from shared memory, so a worker only builds the accounts it uses
+        return Account(_unshare_string(*(self.debtor + (index,))), _unshare_string(*(self.debtor_id + (index,))),
+                       _unshare_string(*(self.debtee + (index,))), Money(cents=self.initial_balance[index]), self.interest[index],
+                       Money(cents=self.minimum_payment[index]),
+                       datetime.date.fromordinal(self.last_updated[index]) if self.last_updated[index] else None)
+
+    def to_table(self):
+        table = AccountTable()
+        table.debtor = _unshare_strings(*self.debtor)
+        table.debtor_id = _unshare_strings(*self.debtor_id)
+        table.debtee = _unshare_strings(*self.debtee)
+        table.initial_balance = array.array('l', self.initial_balance)
+        table.interest = array.array('d', self.interest)
+        table.minimum_payment = array.array('l', self.minimum_payment)
+        table.last_updated = [datetime.date.fromordinal(d) if d else None for d in self.last_updated]
+        return table
@@ -4,99 +4,559 @@ import csv
 import datetime
 import os.path
 import collections
+import functools
+import heapq
+import multiprocessing
 
 import payment_manager
-from payoff_calculator import calculate_payoff
+from payoff_calculator import calculate_payoff, PayoffInstrumentation, DiscardPayments, InterestAttribution
 import money
+import utils
+from cache import cache_key
+from account_table import AccountTable
+from milestones import MilestoneIndex
+from environment import PROFILE_ENVIRONMENT_VARIABLE
 
 
-def load_accounts(file_name):
-    accounts = []
+ACCOUNT_COLUMNS = ('debtor', 'debtor_id', 'debtee', 'initial_balance', 'interest', 'minimum_payment', 'last_updated')
+
+
+def _to_date(text):
+    year, month, day = text.split('-')
+    return datetime.date(int(year), int(month), int(day))
+
 
-    def to_date(str):
-        datetime.datetime.strptime(str, '%Y-%m-%d').date()
+def _iter_account_rows(file_name, chunk_size):
     with open(file_name, 'rb') as f:
-        input_file = csv.DictReader(f)
-        for row in input_file:
-            row = [row['debtor'],
-                   row['debtor_id'],
-                   row['debtee'],
-                   float(row['initial_balance']),
-                   float(row['interest']),
-                   float(row['minimum_payment']),
-                   to_date(row['last_updated'])]
-            accounts.append(payment_manager.Account(*row))
-    return accounts
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return
+        missing = [c for c in ACCOUNT_COLUMNS if c not in header]
+        if missing:
+            raise ValueError("{} is missing columns: {}".format(file_name, ', '.join(missing)))
+        (debtor, debtor_id, debtee, initial_balance, interest, minimum_payment, last_updated) = [header.index(c) for c in ACCOUNT_COLUMNS]
+        width = len(header)
+        line = 1
+        # exports tend to share a handful of dates, so only parse each one once
+        dates = {}
+
+        def to_date(text):
+            if text not in dates:
+                dates[text] = _to_date(text)
+            return dates[text]
+        while True:
+            rows = list(itertools.islice(reader, chunk_size))
+            if not rows:
+                return
+            # blank lines come back as empty rows and are skipped, like csv.DictReader does
+            if any(row and len(row) != width for row in rows):
+                bad_line = line + 1 + next(i for i, row in enumerate(rows) if row and len(row) != width)
+                raise ValueError("{} line {} does not have {} columns".format(file_name, bad_line, width))
+            line += len(rows)
+            rows = [row for row in rows if row]
+            if rows:
+                yield [(row[debtor], row[debtor_id], row[debtee],
+                        money.parse_cents(row[initial_balance]), float(row[interest]), money.parse_cents(row[minimum_payment]),
+                        to_date(row[last_updated])) for row in rows]
+
+
+def iter_account_chunks(file_name, chunk_size=10000):
+    for rows in _iter_account_rows(file_name, chunk_size):
+        yield [payment_manager.Account(d, d_id, de, money.Money(cents=b), i, money.Money(cents=m), u)
+               for d, d_id, de, b, i, m, u in rows]
+
+
+def load_account_table(file_name, chunk_size=10000, table=None):
+    table = AccountTable() if table is None else table
+    for rows in _iter_account_rows(file_name, chunk_size):
+        for row in rows:
+            table.append(*row)
+    return table
+
+
+def load_accounts(file_name):
+    return [a for chunk in iter_account_chunks(file_name) for a in chunk]
+
+
+class MonthlyPaymentsCsvWriter(object):
+
+    def __init__(self, f, accounts, buffer_rows=1000):
+        self._f = f
+        self._buffer_rows = buffer_rows
+        self._buffer = []
+        accounts = sorted(accounts, key=str)
+        self._columns = {a: 2 * i for i, a in enumerate(accounts)}
+        self._empty_row = [''] * (2 * len(accounts))
+        ids = map(str, accounts) + ['Total']
+        csv.writer(f).writerow(['Date'] + list(itertools.starmap(operator.add, (itertools.product(ids, ['-Paid', '-Remaining'])))))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.flush()
+
+    def append(self, monthly_info):
+        current_date, month_payment = monthly_info
+        row = list(self._empty_row)
+        total_paid = 0
+        total_remaining = 0
+        for account, (paid, remaining) in month_payment.items():
+            column = self._columns[account]
+            row[column] = money.format_cents(paid.cents)
+            row[column + 1] = money.format_cents(remaining.cents)
+            total_paid += paid.cents
+            total_remaining += remaining.cents
+        self._buffer.append('{},{},{},{}\r\n'.format(current_date, ','.join(row), money.format_cents(total_paid), money.format_cents(total_remaining)))
+        if len(self._buffer) >= self._buffer_rows:
+            self.flush()
+
+    def extend(self, monthly_payments):
+        for monthly_info in monthly_payments:
+            self.append(monthly_info)
+
+    def flush(self):
+        self._f.write(''.join(self._buffer))
+        self._buffer = []
 
 
 def dump_monthly_payments_to_csv(output_file, monthly_payments):
+    monthly_payments = iter(monthly_payments)
+    first = next(monthly_payments)
     with open(output_file, 'wb') as f:
-        accounts = monthly_payments[0][1].keys()
-        ids = sorted(map(str, accounts)) + ['Total']
-        headers = ['Date'] + list(itertools.starmap(operator.add, (itertools.product(ids, ['-Paid', '-Remaining']))))
-        writer = csv.DictWriter(f, headers)
-        writer.writeheader()
-        for monthly_info in monthly_payments:
-            total_paid = money.ZERO
-            total_remaining = money.ZERO
-            mp = {}
-            current_date, month_payment = monthly_info
-            mp['Date'] = current_date
-            for account, paid_remaining in month_payment.items():
-                paid, remaining = paid_remaining
-                mp[str(account)+'-Paid'] = paid
-                mp[str(account)+'-Remaining'] = remaining
-                total_paid += paid
-                total_remaining += remaining
-            mp['Total-Paid'] = total_paid
-            mp['Total-Remaining'] = total_remaining
-            writer.writerow(mp)
-
-try:
-    import matplotlib
-    matplotlib.use('Agg')
-    import matplotlib.pyplot as plt
-
-    def dump_monthly_payments_to_png(output_file, monthly_payments):
-        # build x y remaining per account
-        by_account = {}
-        timestamps = []
-        for mp in monthly_payments:
-            timestamp, payments = mp
-            timestamps.append(timestamp)
-            for account, (payment, remaining) in payments.items():
-                if account not in by_account:
-                    by_account[account] = []
-                by_account[account].append(float(remaining))
-
-        fig = plt.figure()
-        graph = fig.add_subplot(111)
-        for account in sorted(by_account.keys(), reverse=True):
-            y = by_account[account]
-            x = timestamps[:len(y)]
-            graph.plot(x, y, label=str(account))
-
-        graph.set_xticks(x)
-        graph.set_xticklabels([x.strftime("%Y-%m-%d") for x in x])
-
-        plt.legend(loc='upper right')
-
-        # Shrink current axis by 20%
-        box = graph.get_position()
-        graph.set_position([box.x0, box.y0, box.width * 0.8, box.height])
-
-        # Put a legend to the right of the current axis
-        graph.legend(loc='center left', bbox_to_anchor=(1, 0.5), prop={'size':6})
-
-        plt.savefig(output_file)
-
-except ImportError:
-    pass
+        with MonthlyPaymentsCsvWriter(f, first[1].keys()) as writer:
+            writer.append(first)
+            writer.extend(monthly_payments)
+
+def dump_monthly_payments_to_png(output_file, monthly_payments, figure=None):
+    # plotting pulls in matplotlib, so only import it once a chart is actually drawn
+    import plotting
+    plotting.dump_monthly_payments_to_png(output_file, monthly_payments, figure)
+
+
+def dump_many_monthly_payments_to_png(output_files_and_monthly_payments, figure=None):
+    import plotting
+    plotting.dump_many_monthly_payments_to_png(output_files_and_monthly_payments, figure)
+
+
+def render_results_to_png(output_files_and_results, processes=None, chunk_size=4):
+    import plotting
+    return plotting.render_results_to_png(output_files_and_results, processes, chunk_size)
+
+
+def _index_monthly_payments(monthly_payments, indexes):
+    return [(d, {indexes[a]: p for a, p in payments.items()}) for d, payments in monthly_payments]
+
+
+def _unindex_monthly_payments(indexed_monthly_payments, accounts):
+    return [(d, {accounts[i]: p for i, p in payments.items()}) for d, payments in indexed_monthly_payments]
+
 
 AnalysisResults = collections.namedtuple('AnalysisResults', ['max_payment_determiner', 'payment_manager', 'bonus_payment_manager', 'months', 'initial_debt', 'total_paid', 'interest_paid', 'monthly_payments'])
 
+# what analyze_all yields for each scenario when asked to index milestones or attribute interest; either is None
+# when it wasn't asked for
+ResultDetails = collections.namedtuple('ResultDetails', ['result', 'milestones', 'interest_attribution'])
+
+
+class _Tee(object):
+    # hands every monthly payment to each of the sinks
 
-def analyze(max_payment_determiner, payment_manager, bonus_payment_manager, accounts):
+    def __init__(self, *sinks):
+        self.sinks = sinks
+
+    def append(self, monthly_info):
+        for sink in self.sinks:
+            sink.append(monthly_info)
+
+
+def _attribute_interest(interest_attribution, accounts, monthly_payments):
+    # for cached results: the interest charged is whatever a balance grew by on top of what was paid off
+    balances = {a: a.initial_balance for a in accounts}
+    for _, payments in monthly_payments:
+        for account, (paid, remaining) in payments.items():
+            interest_attribution.charge(account, (paid + remaining - balances[account]).cents)
+            balances[account] = remaining
+
+
+def analyze(max_payment_determiner, payment_manager, bonus_payment_manager, accounts, starting_date=None, cache=None, instrumentation=None,
+            milestones=None, interest_attribution=None, summary_only=False):
+    # milestones, e.g. MilestoneIndex(accounts), is filled from the monthly payments as they are made and
+    # interest_attribution, e.g. InterestAttribution(accounts), with the interest charged to each account.
+    # summary_only doesn't keep the monthly payments (they are None), so those are the way to get any detail.
+    if cache is not None:
+        starting_date = starting_date or datetime.date.today()
+        key = cache_key(max_payment_determiner, payment_manager, bonus_payment_manager, accounts, starting_date)
+        cached = cache.get(key)
+        if cached is not None:
+            months, initial_debt, total_paid, indexed_monthly_payments = cached
+            # accounts are stored by position so the results are keyed by the caller's accounts
+            monthly_payments = _unindex_monthly_payments(indexed_monthly_payments, accounts)
+            if milestones is not None:
+                for monthly_info in monthly_payments:
+                    milestones.append(monthly_info)
+            if interest_attribution is not None:
+                _attribute_interest(interest_attribution, accounts, monthly_payments)
+            return AnalysisResults(max_payment_determiner, payment_manager, bonus_payment_manager, months, initial_debt, total_paid, total_paid - initial_debt,
+                                   None if summary_only else monthly_payments)
     initial_debt = sum([a.initial_balance for a in accounts], money.ZERO)
-    (total_paid, months, monthly_payments) = calculate_payoff(max_payment_determiner, payment_manager, bonus_payment_manager, accounts)
+    monthly_payments = DiscardPayments() if summary_only else []
+    (total_paid, months, _) = calculate_payoff(max_payment_determiner, payment_manager, bonus_payment_manager, accounts, starting_date,
+                                               monthly_payments=monthly_payments if milestones is None else _Tee(monthly_payments, milestones),
+                                               instrumentation=instrumentation, interest_attribution=interest_attribution)
+    if summary_only:
+        # there is nothing to cache without the monthly payments
+        return AnalysisResults(max_payment_determiner, payment_manager, bonus_payment_manager, months, initial_debt, total_paid, total_paid - initial_debt, None)
+    if cache is not None:
+        indexed_monthly_payments = _index_monthly_payments(monthly_payments, {a: i for i, a in enumerate(accounts)})
+        cache.put(key, (months, initial_debt, total_paid, indexed_monthly_payments))
     return AnalysisResults(max_payment_determiner, payment_manager, bonus_payment_manager, months, initial_debt, total_paid, total_paid - initial_debt, monthly_payments)
+
+
+def index_milestones(results, accounts):
+    # a MilestoneIndex for each of results, in the same order. The results must keep their monthly payments;
+    # for summary only results, have analyze_all build the indexes while it runs (index_milestones=True).
+    results = list(results)
+    if any(r.monthly_payments is None for r in results):
+        raise ValueError("summary only results have no monthly payments to index; use analyze_all(..., index_milestones=True)")
+    return [MilestoneIndex.from_monthly_payments(accounts, r.monthly_payments) for r in results]
+
+
+ColumnarResults = collections.namedtuple('ColumnarResults', ['accounts', 'scenarios', 'dates', 'paid', 'remaining'])
+
+_COLUMNAR_FILES = ('accounts', 'scenarios', 'dates', 'paid', 'remaining')
+
+
+def _text_array(np, values):
+    # names are stored with a unicode dtype; byte strings are taken to be UTF-8, like the shared account table does
+    return np.array([v.decode('utf-8') if isinstance(v, str) else v for v in values], dtype=unicode)
+
+
+def dump_results_to_npy(output_dir, results, accounts):
+    # one .npy file per column so the matrices can be memory mapped back in without parsing;
+    # money is stored as cents and accounts are matched to columns by (debtor, debtor_id, debtee), since results
+    # from workers hold copies of the accounts. Summary only results just get their scenario row (their dates are NaT).
+    import numpy as np
+    from numpy.lib.format import open_memmap
+
+    results = list(results)
+    accounts = list(accounts)
+    columns = {(a.debtor, a.debtor_id, a.debtee): i for i, a in enumerate(accounts)}
+    if len(columns) != len(accounts):
+        raise ValueError("accounts must each have a different (debtor, debtor_id, debtee)")
+    periods = max([len(r.monthly_payments) for r in results if r.monthly_payments is not None] or [0])
+    shape = (len(results), periods, len(accounts))
+
+    if not os.path.isdir(output_dir):
+        os.makedirs(output_dir)
+
+    np.save(os.path.join(output_dir, 'accounts.npy'), np.rec.fromarrays(
+        [_text_array(np, [a.debtor for a in accounts]),
+         _text_array(np, [a.debtor_id for a in accounts]),
+         _text_array(np, [a.debtee for a in accounts]),
+         np.array([a.initial_balance.cents for a in accounts], dtype=np.int64),
+         np.array([a.interest for a in accounts], dtype=np.float64),
+         np.array([a.minimum_payment.cents for a in accounts], dtype=np.int64),
+         np.array([a.last_updated or 'NaT' for a in accounts], dtype='datetime64[D]')],
+        names=['debtor', 'debtor_id', 'debtee', 'initial_balance', 'interest', 'minimum_payment', 'last_updated']))
+    np.save(os.path.join(output_dir, 'scenarios.npy'), np.rec.fromarrays(
+        [_text_array(np, [r.max_payment_determiner.id for r in results]),
+         _text_array(np, [r.payment_manager.id for r in results]),
+         _text_array(np, [r.bonus_payment_manager.id for r in results]),
+         np.array([r.months for r in results], dtype=np.int64),
+         np.array([r.initial_debt.cents for r in results], dtype=np.int64),
+         np.array([r.total_paid.cents for r in results], dtype=np.int64),
+         np.array([r.interest_paid.cents for r in results], dtype=np.int64)],
+        names=['max_payment_determiner', 'payment_manager', 'bonus_payment_manager', 'months', 'initial_debt', 'total_paid', 'interest_paid']))
+
+    dates = open_memmap(os.path.join(output_dir, 'dates.npy'), mode='w+', dtype='datetime64[D]', shape=shape[:2])
+    paid = open_memmap(os.path.join(output_dir, 'paid.npy'), mode='w+', dtype=np.int64, shape=shape)
+    remaining = open_memmap(os.path.join(output_dir, 'remaining.npy'), mode='w+', dtype=np.int64, shape=shape)
+    dates[:] = np.datetime64('NaT')
+    for s, result in enumerate(results):
+        for p, (current_date, month_payment) in enumerate(result.monthly_payments or []):
+            dates[s, p] = current_date
+            for account, (account_paid, account_remaining) in month_payment.items():
+                a = columns[(account.debtor, account.debtor_id, account.debtee)]
+                paid[s, p, a] = account_paid.cents
+                remaining[s, p, a] = account_remaining.cents
+    for matrix in (dates, paid, remaining):
+        matrix.flush()
+
+
+def load_results_from_npy(input_dir, mmap_mode='r'):
+    import numpy as np
+    return ColumnarResults(*[np.load(os.path.join(input_dir, name + '.npy'), mmap_mode=mmap_mode) for name in _COLUMNAR_FILES])
+
+
+Scenario = collections.namedtuple('Scenario', ['max_payment_determiner', 'payment_manager', 'bonus_payment_manager', 'accounts', 'starting_date'])
+Scenario.__new__.__defaults__ = (None,)
+
+
+def _default_profiler(profiler):
+    if profiler is None and os.environ.get(PROFILE_ENVIRONMENT_VARIABLE):
+        import profiling
+        return profiling.ScenarioProfiler.from_environment()
+    return profiler
+
+
+def _profiled_chunk(analyze_fn, parameters, profile_every, first_index):
+    # returns the results and, when profiling, the merged stats of the sampled scenarios as a plain dict
+    if not profile_every:
+        return [analyze_fn(*p) for p in parameters], None, 0
+    import profiling
+    results = []
+    raw_stats = []
+    for index, p in enumerate(parameters, first_index):
+        if index % profile_every == 0:
+            result, stats = profiling.profile_call(analyze_fn, *p)
+            raw_stats.append(stats)
+        else:
+            result = analyze_fn(*p)
+        results.append(result)
+    return results, profiling.merge_stats(raw_stats), len(raw_stats)
+
+
+_ChunkOptions = collections.namedtuple('_ChunkOptions', ['summary_only', 'profile_every', 'instrument', 'index_milestones', 'attribute_interest',
+                                                         'by_position'])
+
+
+def _chunks(parameters, chunk_size, summary_only, profiler, instrumentation, index_milestones, attribute_interest, by_position=False):
+    # by_position has a worker send monthly payments back keyed by account position, for the caller to rekey
+    options = _ChunkOptions(summary_only, profiler.every if profiler is not None else None, instrumentation is not None, index_milestones,
+                            attribute_interest, by_position)
+    for i, chunk in enumerate(utils.chunked(parameters, chunk_size)):
+        yield chunk, options, i * chunk_size
+
+
+def _analyze_scenario(max_payment_determiner, payment_manager, bonus_payment_manager, accounts, starting_date=None, index_milestones=False,
+                      attribute_interest=False, **kwargs):
+    if not index_milestones and not attribute_interest:
+        return analyze(max_payment_determiner, payment_manager, bonus_payment_manager, accounts, starting_date, **kwargs)
+    milestones = MilestoneIndex(accounts) if index_milestones else None
+    interest_attribution = InterestAttribution(accounts) if attribute_interest else None
+    result = analyze(max_payment_determiner, payment_manager, bonus_payment_manager, accounts, starting_date, milestones=milestones,
+                     interest_attribution=interest_attribution, **kwargs)
+    return ResultDetails(result, milestones, interest_attribution)
+
+
+def _map_result(fn, analyzed):
+    # applies fn to a result, whether or not it came with its ResultDetails
+    if isinstance(analyzed, ResultDetails):
+        return analyzed._replace(result=fn(analyzed.result))
+    return fn(analyzed)
+
+
+def _send_positions(analyzed, indexes):
+    return _map_result(lambda r: r._replace(monthly_payments=_index_monthly_payments(r.monthly_payments, indexes)), analyzed)
+
+
+def _receive(analyzed, accounts, summary_only):
+    # keys what a worker sent back by the caller's accounts instead of the worker's copies of them
+    if not summary_only:
+        analyzed = _map_result(lambda r: r._replace(monthly_payments=_unindex_monthly_payments(r.monthly_payments, accounts)), analyzed)
+    if isinstance(analyzed, ResultDetails):
+        for details in (analyzed.milestones, analyzed.interest_attribution):
+            if details is not None:
+                details.rebind(accounts)
+    return analyzed
+
+
+def _run_chunk(analyze_fn, parameters, options, first_index):
+    # each chunk gets its own instrumentation, which is sent back to be merged into the caller's
+    instrumentation = PayoffInstrumentation() if options.instrument else None
+    analyze_fn = functools.partial(analyze_fn, summary_only=options.summary_only, instrumentation=instrumentation, index_milestones=options.index_milestones,
+                                   attribute_interest=options.attribute_interest)
+    results, raw_stats, profiled = _profiled_chunk(analyze_fn, parameters, options.profile_every, first_index)
+    return results, raw_stats, profiled, instrumentation
+
+
+def _add_chunk_stats(profiler, instrumentation, raw_stats, profiled, chunk_instrumentation):
+    if raw_stats is not None:
+        profiler.add(raw_stats, profiled)
+    if chunk_instrumentation is not None:
+        instrumentation.merge(chunk_instrumentation)
+
+
+def _analyze_chunk(task):
+    scenarios, options, first_index = task
+    results, raw_stats, profiled, instrumentation = _run_chunk(_analyze_scenario, scenarios, options, first_index)
+    if options.by_position and not options.summary_only:
+        results = [_send_positions(a, {account: i for i, account in enumerate(s.accounts)}) for s, a in zip(scenarios, results)]
+    return first_index, results, raw_stats, profiled, instrumentation
+
+
+def analyze_all(scenarios, processes=None, chunk_size=16, summary_only=False, ordered=False, profiler=None, instrumentation=None,
+                index_milestones=False, attribute_interest=False):
+    # profiler (or the LOAN_PAYOFF_TOOLS_PROFILE environment variable) turns on cProfile for the scenarios and
+    # instrumentation, a PayoffInstrumentation, accumulates the phase timings of every scenario. index_milestones
+    # builds a MilestoneIndex and attribute_interest an InterestAttribution of each scenario as it runs (so summary
+    # only results have them too), yielding ResultDetails(result, milestones, interest_attribution) in place of each result.
+    # Results from workers are keyed by each scenario's own accounts, like the ones analyzed inline.
+    profiler = _default_profiler(profiler)
+    # the accounts of each chunk's scenarios, by first index, until the chunk comes back from a worker
+    pending = {}
+
+    def tracked(chunks):
+        for task in chunks:
+            pending[task[2]] = [s.accounts for s in task[0]]
+            yield task
+    pool = None
+    try:
+        if processes == 1:
+            results = itertools.imap(_analyze_chunk, _chunks(scenarios, chunk_size, summary_only, profiler, instrumentation, index_milestones,
+                                                             attribute_interest))
+        else:
+            chunks = _chunks(scenarios, chunk_size, summary_only, profiler, instrumentation, index_milestones, attribute_interest, by_position=True)
+            pool = multiprocessing.Pool(processes)
+            results = (pool.imap if ordered else pool.imap_unordered)(_analyze_chunk, tracked(chunks))
+        for first_index, chunk_results, raw_stats, profiled, chunk_instrumentation in results:
+            _add_chunk_stats(profiler, instrumentation, raw_stats, profiled, chunk_instrumentation)
+            if pool is not None:
+                chunk_results = [_receive(a, accounts, summary_only) for a, accounts in zip(chunk_results, pending.pop(first_index))]
+            yield chunk_results
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+        if profiler is not None:
+            profiler.write_report()
+
+
+# set in each worker of analyze_all_for_accounts from the shared account table
+_worker_accounts = None
+_worker_account_indexes = None
+
+
+def _attach_accounts(shared_table):
+    global _worker_accounts, _worker_account_indexes
+    _worker_accounts = shared_table.to_table().accounts()
+    _worker_account_indexes = {a: i for i, a in enumerate(_worker_accounts)}
+
+
+def _analyze_with_worker_accounts(max_payment_determiner, payment_manager, bonus_payment_manager, starting_date, **kwargs):
+    return _analyze_scenario(max_payment_determiner, payment_manager, bonus_payment_manager, _worker_accounts, starting_date, **kwargs)
+
+
+def _analyze_parameters_chunk(task):
+    parameters, options, first_index = task
+    results, raw_stats, profiled, instrumentation = _run_chunk(_analyze_with_worker_accounts, parameters, options, first_index)
+    if not options.summary_only:
+        # the worker's accounts are copies, so send positions back instead
+        results = [_send_positions(a, _worker_account_indexes) for a in results]
+    return first_index, results, raw_stats, profiled, instrumentation
+
+
+def analyze_all_for_accounts(accounts, parameters, processes=None, chunk_size=16, summary_only=False, ordered=False, profiler=None,
+                             instrumentation=None, index_milestones=False, attribute_interest=False):
+    # like analyze_all for scenarios which all share the same accounts; parameters are
+    # (max_payment_determiner, payment_manager, bonus_payment_manager, starting_date) and the
+    # accounts are put in shared memory once instead of being pickled with every task
+    accounts = list(accounts)
+    profiler = _default_profiler(profiler)
+    if processes == 1:
+        scenarios = (Scenario(mpd, pm, bpm, accounts, starting_date) for mpd, pm, bpm, starting_date in parameters)
+        for results in analyze_all(scenarios, processes, chunk_size, summary_only, profiler=profiler, instrumentation=instrumentation,
+                                   index_milestones=index_milestones, attribute_interest=attribute_interest):
+            yield results
+        return
+    chunks = _chunks(parameters, chunk_size, summary_only, profiler, instrumentation, index_milestones, attribute_interest)
+    pool = multiprocessing.Pool(processes, _attach_accounts, (AccountTable.from_accounts(accounts).share(),))
+    try:
+        imap = pool.imap if ordered else pool.imap_unordered
+        for _, results, raw_stats, profiled, chunk_instrumentation in imap(_analyze_parameters_chunk, chunks):
+            _add_chunk_stats(profiler, instrumentation, raw_stats, profiled, chunk_instrumentation)
+            yield [_receive(a, accounts, summary_only) for a in results]
+    finally:
+        pool.terminate()
+        pool.join()
+        if profiler is not None:
+            profiler.write_report()
+
+
+def default_rank_key(result):
+    return (result.interest_paid, result.months)
+
+
+def grid_search(max_payment_determiner_factories, amounts, payment_managers, bonus_payment_managers, accounts,
+                starting_date=None, processes=None, chunk_size=16, summary_only=True, key=default_rank_key, profiler=None, top=None):
+    # Streams the ranking: as each chunk of scenarios completes, yields a list of the best `top` results so far
+    # ranked by key, so the last one yielded ranks the whole grid. Only `top` results are held on to (every
+    # result when top is None). Chunks come back in submission order so ties keep the same order whichever
+    # worker finishes first.
+    def parameters():
+        seen = set()
+        for factory, amount, pm, bpm in itertools.product(max_payment_determiner_factories, amounts, payment_managers, bonus_payment_managers):
+            mpd = factory(amount)
+            scenario_id = (mpd.id, pm.id, bpm.id)
+            if scenario_id not in seen:
+                seen.add(scenario_id)
+                yield mpd, pm, bpm, starting_date
+    ranking = []
+    for results in analyze_all_for_accounts(accounts, parameters(), processes, chunk_size, summary_only, ordered=True, profiler=profiler):
+        # both are stable, so earlier results stay ahead of later ties
+        if top is None:
+            ranking = sorted(ranking + results, key=key)
+        else:
+            ranking = heapq.nsmallest(top, ranking + results, key=key)
+        yield ranking
+
+
+# for comparing results which pay the same amount; across amounts, paying more always lowers both
+DEFAULT_OBJECTIVES = (operator.attrgetter('months'), operator.attrgetter('interest_paid'))
+
+
+def _dominates(a, b, objectives):
+    a_values = [objective(a) for objective in objectives]
+    b_values = [objective(b) for objective in objectives]
+    return all(x <= y for x, y in zip(a_values, b_values)) and a_values != b_values
+
+
+def pareto_frontier(results, objectives=DEFAULT_OBJECTIVES):
+    results = list(results)
+    frontier = [r for r in results if not any(_dominates(o, r, objectives) for o in results)]
+    return sorted(frontier, key=lambda r: [objective(r) for objective in objectives])
+
+
+def search_pareto_frontier(max_payment_determiner_factory, amounts, payment_managers, bonus_payment_managers, accounts,
+                           objectives=None, initial_samples=5):
+    # by default the amount searched, as the cost, is traded off against the months and interest paid;
+    # months and interest alone would leave only the largest amount on the frontier
+    amounts = list(amounts)
+    amounts_of_results = {}
+    if objectives is None:
+        objectives = (lambda r: amounts_of_results[id(r)],) + DEFAULT_OBJECTIVES
+    combinations = collections.OrderedDict()
+    for pm, bpm in itertools.product(payment_managers, bonus_payment_managers):
+        combinations.setdefault((pm.id, bpm.id), (pm, bpm))
+
+    # results by combination and then by index into amounts
+    evaluated = {key: {} for key in combinations}
+
+    def evaluate(key, index):
+        pm, bpm = combinations[key]
+        result = analyze(max_payment_determiner_factory(amounts[index]), pm, bpm, accounts)
+        amounts_of_results[id(result)] = amounts[index]
+        evaluated[key][index] = result
+
+    last_index = len(amounts) - 1
+    samples = max(min(initial_samples, len(amounts)), 2)
+    for key in combinations:
+        for index in sorted({int(round(i * last_index / float(samples - 1))) for i in range(samples)}):
+            evaluate(key, index)
+
+    while True:
+        frontier = pareto_frontier(itertools.chain.from_iterable(r.values() for r in evaluated.values()), objectives)
+        on_frontier = set(map(id, frontier))
+        # only bisect gaps next to a frontier point; gaps between dominated points can't change the answer
+        gaps = []
+        for key, results in evaluated.items():
+            indexes = sorted(results.keys())
+            for low, high in zip(indexes, indexes[1:]):
+                if high - low > 1 and (id(results[low]) in on_frontier or id(results[high]) in on_frontier):
+                    gaps.append((key, (low + high) / 2))
+        if not gaps:
+            return frontier
+        for key, index in gaps:
+            evaluate(key, index)
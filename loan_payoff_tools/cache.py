@@ -0,0 +1,83 @@
+import hashlib
+import cPickle as pickle
+import sqlite3
+import zlib
+
+import loan_payoff_tools
+from utils import describe
+from utils import stable_repr
+
+
+def cache_key(max_payment_determiner, payment_manager, bonus_payment_manager, accounts, starting_date):
+    key = hashlib.sha1()
+    key.update(loan_payoff_tools.__version__)
+    key.update(str(starting_date))
+    for component in (max_payment_determiner, payment_manager, bonus_payment_manager):
+        key.update('\0' + describe(component))
+    for a in accounts:
+        key.update('\0' + stable_repr((a.debtor, a.debtor_id, a.debtee, a.initial_balance, a.interest, a.minimum_payment, a.last_updated)))
+    return key.hexdigest()
+
+
+class ResultCache(object):
+
+    def __init__(self, path, max_entries=None, max_bytes=None):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._connection = sqlite3.connect(path)
+        self._connection.execute('CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, last_used INTEGER NOT NULL)')
+        self._connection.execute('CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used)')
+        self._connection.commit()
+        self._last_used = self._connection.execute('SELECT COALESCE(MAX(last_used), 0) FROM results').fetchone()[0]
+
+    def __repr__(self):
+        return "ResultCache({})".format(self.path)
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return float(self.hits) / lookups if lookups else 0.0
+
+    def stats(self):
+        entries, size = self._connection.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results').fetchone()
+        return {'hits': self.hits, 'misses': self.misses, 'hit_rate': self.hit_rate, 'entries': entries, 'bytes': size}
+
+    def _tick(self):
+        self._last_used += 1
+        return self._last_used
+
+    def get(self, key):
+        row = self._connection.execute('SELECT value FROM results WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._connection.execute('UPDATE results SET last_used = ? WHERE key = ?', (self._tick(), key))
+        self._connection.commit()
+        return pickle.loads(zlib.decompress(str(row[0])))
+
+    def put(self, key, value):
+        blob = zlib.compress(pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+        self._connection.execute('INSERT OR REPLACE INTO results (key, value, size, last_used) VALUES (?, ?, ?, ?)',
+                                 (key, sqlite3.Binary(blob), len(blob), self._tick()))
+        self._evict()
+        self._connection.commit()
+
+    def _evict(self):
+        # least recently used entries go first
+        if self.max_entries is not None:
+            self._connection.execute('DELETE FROM results WHERE key IN (SELECT key FROM results ORDER BY last_used DESC LIMIT -1 OFFSET ?)',
+                                     (self.max_entries,))
+        if self.max_bytes is not None:
+            total = self._connection.execute('SELECT COALESCE(SUM(size), 0) FROM results').fetchone()[0]
+            for key, size in self._connection.execute('SELECT key, size FROM results ORDER BY last_used').fetchall():
+                if total <= self.max_bytes:
+                    break
+                self._connection.execute('DELETE FROM results WHERE key = ?', (key,))
+                total -= size
+
+    def close(self):
+        self._connection.close()
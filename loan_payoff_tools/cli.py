@@ -0,0 +1,40 @@
+import argparse
+import json
+import sys
+
+import analysis
+import scenarios
+
+
+def result_to_dict(result):
+    return {'max_payment_determiner': result.max_payment_determiner.id,
+            'payment_manager': result.payment_manager.id,
+            'bonus_payment_manager': result.bonus_payment_manager.id,
+            'months': result.months,
+            'initial_debt': float(result.initial_debt),
+            'total_paid': float(result.total_paid),
+            'interest_paid': float(result.interest_paid)}
+
+
+def run(accounts_file, spec_file, out, workers=None, chunk_size=1):
+    accounts = analysis.load_accounts(accounts_file)
+    spec = scenarios.load_spec(spec_file)
+    parameters = ((s.max_payment_determiner, s.payment_manager, s.bonus_payment_manager, s.starting_date) for s in scenarios.build_scenarios(spec, accounts))
+    for results in analysis.analyze_all_for_accounts(accounts, parameters, workers, chunk_size, summary_only=True):
+        for result in results:
+            out.write(json.dumps(result_to_dict(result), sort_keys=True) + '\n')
+        out.flush()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Simulates each scenario in a scenario spec and prints one JSON line per result as it completes.')
+    parser.add_argument('accounts', help='accounts CSV file')
+    parser.add_argument('spec', help='scenario spec JSON or YAML file')
+    parser.add_argument('-w', '--workers', type=int, default=None, help='worker processes (default: one per CPU)')
+    parser.add_argument('-c', '--chunk-size', type=int, default=1, help='scenarios sent to a worker at a time')
+    args = parser.parse_args(argv)
+    run(args.accounts, args.spec, sys.stdout, args.workers, args.chunk_size)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,6 @@
+# environment variables the package reads, kept here so the modules reading them (some lazily) agree on the names
+
+# set to a report file to profile every analyze_all/grid_search run; a file ending in .prof gets the raw stats
+PROFILE_ENVIRONMENT_VARIABLE = 'LOAN_PAYOFF_TOOLS_PROFILE'
+# profile only every Nth scenario
+PROFILE_EVERY_ENVIRONMENT_VARIABLE = 'LOAN_PAYOFF_TOOLS_PROFILE_EVERY'
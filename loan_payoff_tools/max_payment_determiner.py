@@ -7,6 +7,11 @@ class MaxPaymentDeterminer(object):
     def id(self):
         return str(self)
 
+    @property
+    def has_bonus(self):
+        # whether a bonus may ever be returned, in which case the bonus payment manager matters
+        return True
+
     def determine_max_payment_for(self, payments_per_year, date):
         raise NotImplementedError("implement determine_max_payment_for(payments_per_year, date)")
 
@@ -23,6 +28,10 @@ class ConstantMaxPaymentDeterminer(MaxPaymentDeterminer):
     def __repr__(self):
         return "constant_%.0f_%.0f" % (self.max_payment, self.bonus)
 
+    @property
+    def has_bonus(self):
+        return bool(self.bonus)
+
     def determine_max_payment_for(self, payments_per_year, date):
         return (self.max_payment, self.bonus)
 
@@ -46,6 +55,10 @@ class AnnualRaiseMaxPaymentDeterminer(MaxPaymentDeterminer):
     def __repr__(self):
         return "annual_raise_%.0f_%.0f_%.0f" % (self.inital_salary, self.annual_raise_percent * 100, self.initial_max_payment)
 
+    @property
+    def has_bonus(self):
+        return False
+
     def determine_max_payment_for(self, payments_per_year, date):
         raises = (date - self.last_raise_date).days / 365
         extra_payment = self.inital_salary * (self.annual_raise_percent * raises * (1 - self.tax_rate) / payments_per_year)
@@ -72,6 +85,10 @@ class AnnualRaiseAndBonusMaxPaymentDeterminer(MaxPaymentDeterminer):
     def __repr__(self):
         return "annual_raise_and_bonus_%.0f_%.0f_%.0f_%.0f" % (self.inital_salary, self.annual_raise_percent * 100, self.annual_bonus_percent * 100, self.initial_max_payment)
 
+    @property
+    def has_bonus(self):
+        return bool(self.inital_salary) and bool(self.annual_bonus_percent)
+
     def determine_max_payment_for(self, payments_per_year, date):
         days_since_raise = (date - self.last_raise_date).days
         days_between_payments = 365/payments_per_year
@@ -0,0 +1,128 @@
+import array
+import bisect
+
+from money import Money
+
+
+class MilestoneIndex(object):
+    # Built period by period from the monthly payments (it has append(), so calculate_payoff can fill it while it
+    # runs): when each account was paid off and first paid above its minimum, plus prefix sums of the total paid,
+    # interest charged and remaining, so milestones are looked up instead of scanning the monthly payments.
+    # Periods count from 0, like positions in monthly_payments; a milestone that was never reached is None.
+
+    def __init__(self, accounts):
+        self.dates = []
+        self.paid = array.array('l')
+        self.interest = array.array('l')
+        self.remaining = array.array('l')
+        self.accounts = list(accounts)
+        # looked up by identity, like the monthly payments are keyed
+        self._positions = {a: i for i, a in enumerate(self.accounts)}
+        self.payoff_periods = array.array('l', [-1] * len(self.accounts))
+        self.above_minimum_periods = array.array('l', [-1] * len(self.accounts))
+        self._balances = array.array('l', [a.initial_balance.cents for a in self.accounts])
+        self._total_balance = sum(self._balances)
+        # negated running minimum of the remaining, which never decreases so it can be bisected
+        self._lowest_remaining = array.array('l')
+
+    def __repr__(self):
+        return "MilestoneIndex({} accounts, {} periods)".format(len(self.payoff_periods), len(self.dates))
+
+    def _key(self):
+        return (self.dates, self.paid, self.interest, self.remaining, self.payoff_periods, self.above_minimum_periods)
+
+    def __eq__(self, other):
+        if isinstance(other, self.__class__):
+            return self._key() == other._key()
+        return NotImplemented
+
+    def __ne__(self, other):
+        if isinstance(other, self.__class__):
+            return not self.__eq__(other)
+        return NotImplemented
+
+    def __getstate__(self):
+        # only the arrays go between processes; whoever receives it rebinds it to their accounts
+        state = dict(vars(self))
+        del state['accounts'], state['_positions']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.accounts = None
+        self._positions = None
+
+    def rebind(self, accounts):
+        # keys the index by accounts, position for position, e.g. the caller's in place of a worker's copies
+        self.accounts = list(accounts)
+        self._positions = {a: i for i, a in enumerate(self.accounts)}
+        return self
+
+    @classmethod
+    def from_monthly_payments(cls, accounts, monthly_payments):
+        index = cls(accounts)
+        for monthly_info in monthly_payments:
+            index.append(monthly_info)
+        return index
+
+    def append(self, monthly_info):
+        current_date, month_payment = monthly_info
+        period = len(self.dates)
+        paid = 0
+        charged = 0
+        for account, (account_paid, account_remaining) in month_payment.items():
+            i = self._positions[account]
+            paid += account_paid.cents
+            # whatever the balance grew by, on top of what was paid off, was interest
+            charged += account_paid.cents + account_remaining.cents - self._balances[i]
+            self._total_balance += account_remaining.cents - self._balances[i]
+            self._balances[i] = account_remaining.cents
+            if not account_remaining.cents and self.payoff_periods[i] < 0:
+                self.payoff_periods[i] = period
+            if account_paid > account.minimum_payment and self.above_minimum_periods[i] < 0:
+                self.above_minimum_periods[i] = period
+        self.dates.append(current_date)
+        self.paid.append(paid + (self.paid[-1] if period else 0))
+        self.interest.append(charged + (self.interest[-1] if period else 0))
+        self.remaining.append(self._total_balance)
+        self._lowest_remaining.append(max(-self._total_balance, self._lowest_remaining[-1] if period else -self._total_balance))
+
+    @property
+    def periods(self):
+        return len(self.dates)
+
+    def _period(self, periods, account):
+        period = periods[self._positions[account]]
+        return period if period >= 0 else None
+
+    def payoff_period(self, account):
+        return self._period(self.payoff_periods, account)
+
+    def above_minimum_period(self, account):
+        return self._period(self.above_minimum_periods, account)
+
+    def payoff_date(self, account):
+        period = self.payoff_period(account)
+        return self.dates[period] if period is not None else None
+
+    def paid_through(self, period):
+        return Money(cents=self.paid[period])
+
+    def interest_through(self, period):
+        return Money(cents=self.interest[period])
+
+    def remaining_after(self, period):
+        return Money(cents=self.remaining[period])
+
+    def period_of(self, date):
+        # the last period paid on or before date
+        period = bisect.bisect_right(self.dates, date) - 1
+        return period if period >= 0 else None
+
+    def first_period_paid_at_least(self, amount):
+        period = bisect.bisect_left(self.paid, amount.cents)
+        return period if period < len(self.paid) else None
+
+    def first_period_remaining_at_most(self, amount):
+        period = bisect.bisect_left(self._lowest_remaining, -amount.cents)
+        return period if period < len(self._lowest_remaining) else None
@@ -62,6 +62,10 @@ class Money(object):
         else:
             return 0
 
+    @property
+    def cents(self):
+        return self._cents
+
     def __repr__(self):
         return "${:.2f}".format(self._cents/100.0)
 
@@ -130,3 +134,32 @@ class Money(object):
         return bool(self._cents)
 
 ZERO = Money(0)
+
+
+def format_cents(cents):
+    # same text as repr(Money(cents=cents)) without building a Money
+    if cents < 0:
+        return "$-%d.%02d" % divmod(-cents, 100)
+    return "$%d.%02d" % divmod(cents, 100)
+
+
+def parse_cents(text):
+    # parses text such as "$1,234.565" straight to cents (123457) without going through float or Decimal;
+    # the sign can come before or after the '$', so "$-5.00" from format_cents parses back too
+    value = text.strip()
+    negative = value.startswith('-')
+    if negative:
+        value = value[1:]
+    if value.startswith('$'):
+        value = value[1:]
+        if not negative and value.startswith('-'):
+            negative = True
+            value = value[1:]
+    value = value.replace(',', '')
+    dollars, _, fraction = value.partition('.')
+    if not (dollars or fraction) or not (dollars or '0').isdigit() or not (fraction or '0').isdigit():
+        raise ValueError("Unsupported currency: {}".format(text))
+    cents = int(dollars or 0) * 100 + int(fraction[:2].ljust(2, '0'))
+    if fraction[2:3] >= '5':
+        cents += 1
+    return -cents if negative else cents
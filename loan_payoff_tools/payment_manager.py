@@ -1,4 +1,6 @@
+import collections
 import itertools
+import math
 import operator
 
 from money import Money
@@ -30,6 +32,124 @@ class PaymentManager(object):
     def __call__(self, max_payment, accounts_to_balances, ignore_minimum_payments=False):
         return self._make_payments(max_payment, accounts_to_balances, ignore_minimum_payments)
 
+    def make_payment_array(self, max_payment, balances, minimum_payments, rates, keys=None, ignore_minimum_payments=False):
+        # Array version of __call__ (needs numpy): max_payment, balances and minimum_payments are in cents and the
+        # payments come back as cents in the same positions. keys are the (debtor, debtor_id, debtee) of each
+        # position, which break ties and group by debtor like the accounts do; without them ties go by position.
+        # Managers without their own array version go through __call__.
+        import numpy as np
+        keys = _array_keys(keys, len(balances))
+        accounts = [Account(debtor, debtor_id, debtee, Money(cents=int(b)), float(r), Money(cents=int(m)), None)
+                    for (debtor, debtor_id, debtee), b, m, r in zip(keys, balances, minimum_payments, rates)]
+        payments = self(Money(cents=int(max_payment)), {a: a.initial_balance for a in accounts}, ignore_minimum_payments)
+        return np.array([payments.get(a, money.ZERO).cents for a in accounts], dtype=np.int64)
+
+    def make_payment_matrix(self, max_payments, balances, minimum_payments, rates, keys=None, ignore_minimum_payments=False):
+        # Batch version of make_payment_array: balances is scenarios x accounts (every row the same accounts, so
+        # minimum_payments, rates and keys are shared) and max_payments has one entry per row. Managers without
+        # their own batch version go row by row.
+        import numpy as np
+        balances = np.asarray(balances, dtype=np.int64)
+        payments = np.zeros(balances.shape, dtype=np.int64)
+        for row, max_payment in enumerate(max_payments):
+            payments[row] = self.make_payment_array(max_payment, balances[row], minimum_payments, rates, keys, ignore_minimum_payments)
+        return payments
+
+
+def _array_keys(keys, size):
+    if keys is None:
+        return [('', '{:012d}'.format(i), '') for i in range(size)]
+    return keys
+
+
+def _round_cents(np, cents):
+    # rounds half away from zero like Money
+    return np.where(cents < 0, np.ceil(cents - 0.5), np.floor(cents + 0.5)).astype(np.int64)
+
+
+def _tie_breaks(np, keys, size):
+    if keys is None:
+        return np.arange(size)
+    tie_breaks = np.empty(size, dtype=np.int64)
+    tie_breaks[sorted(range(size), key=keys.__getitem__)] = np.arange(size)
+    return tie_breaks
+
+
+def _initial_payment_array(np, balances, minimum_payments, ignore_minimum_payments):
+    if ignore_minimum_payments:
+        return np.zeros(balances.shape, dtype=np.int64)
+    return np.minimum(balances, np.asarray(minimum_payments, dtype=np.int64))
+
+
+def _sorted_rows(np, sort_keys, order):
+    # whether each row of sort_keys (least significant first, like lexsort) is already strictly in order;
+    # the last key is the tie break, which never repeats, so every adjacent pair gets decided
+    in_order = np.zeros((sort_keys[0].shape[0], len(order) - 1), dtype=bool)
+    undecided = np.ones(in_order.shape, dtype=bool)
+    for key in reversed(sort_keys):
+        steps = np.diff(key[:, order], axis=1)
+        in_order |= undecided & (steps > 0)
+        undecided &= steps == 0
+    return in_order.all(axis=1)
+
+
+def _rank_orders(np, sort_keys):
+    # Ranks every row, sharing one order across the rows it already sorts: checking that a row is in order is
+    # linear, so only rows whose balances rank differently from the first row pay for their own sort.
+    order = np.lexsort([key[0] for key in sort_keys])
+    orders = np.empty(sort_keys[0].shape, dtype=np.int64)
+    orders[:] = order
+    unsorted = ~_sorted_rows(np, sort_keys, order)
+    if unsorted.any():
+        orders[unsorted] = np.lexsort([key[unsorted] for key in sort_keys])
+    return orders
+
+
+def make_ranked_payment_matrix(rank_keys, tie_breaks, max_payments, balances, minimum_payments, ignore_minimum_payments):
+    # make_ranked_payments on a scenarios x accounts matrix: rank_keys are arrays (either per row or shared by
+    # every row), most significant first, sorted together with lexsort and the remaining payment of each row
+    # fills its ranked accounts through a cumulative sum
+    import numpy as np
+    balances = np.asarray(balances, dtype=np.int64)
+    payments = _initial_payment_array(np, balances, minimum_payments, ignore_minimum_payments)
+    remaining = np.asarray(max_payments, dtype=np.int64) - payments.sum(axis=1)
+    if not balances.size or not remaining.any():
+        return payments
+    sort_keys = [np.broadcast_to(key, balances.shape) for key in [tie_breaks] + list(reversed(rank_keys))]
+    orders = _rank_orders(np, sort_keys)
+    rows = np.arange(len(balances))[:, np.newaxis]
+    # when the minimums are more than the max payment, the difference comes off the first account
+    overdrawn = remaining < 0
+    payments[overdrawn, orders[overdrawn, 0]] += remaining[overdrawn]
+    capacity = (balances - payments)[rows, orders]
+    filled_before = np.cumsum(capacity, axis=1) - capacity
+    payments[rows, orders] += np.clip(np.maximum(remaining, 0)[:, np.newaxis] - filled_before, 0, capacity)
+    return payments
+
+
+def make_ranked_payment_array(rank_keys, tie_breaks, max_payment, balances, minimum_payments, ignore_minimum_payments):
+    import numpy as np
+    return make_ranked_payment_matrix(rank_keys, tie_breaks, [max_payment], np.asarray(balances, dtype=np.int64)[np.newaxis],
+                                      minimum_payments, ignore_minimum_payments)[0]
+
+
+class RankedPaymentManager(PaymentManager):
+
+    def _rank_arrays(self, np, balances, rates):
+        raise NotImplementedError("implement _rank_arrays(np, balances, rates)")
+
+    def make_payment_array(self, max_payment, balances, minimum_payments, rates, keys=None, ignore_minimum_payments=False):
+        import numpy as np
+        return self.make_payment_matrix([max_payment], np.asarray(balances, dtype=np.int64)[np.newaxis], minimum_payments, rates,
+                                        keys, ignore_minimum_payments)[0]
+
+    def make_payment_matrix(self, max_payments, balances, minimum_payments, rates, keys=None, ignore_minimum_payments=False):
+        import numpy as np
+        balances = np.asarray(balances, dtype=np.int64)
+        rank_keys = self._rank_arrays(np, balances, np.asarray(rates, dtype=np.float64))
+        return make_ranked_payment_matrix(rank_keys, _tie_breaks(np, keys, balances.shape[1]), max_payments, balances, minimum_payments,
+                                          ignore_minimum_payments)
+
 
 def make_ranked_payments(rank_fn, max_payment, accounts_to_balances, ignore_minimum_payments):
     if ignore_minimum_payments:
@@ -50,7 +170,7 @@ def make_ranked_payments(rank_fn, max_payment, accounts_to_balances, ignore_mini
     return payments
 
 
-class PayMostInterestPaymentPaymentManager(PaymentManager):
+class PayMostInterestPaymentPaymentManager(RankedPaymentManager):
 
     def __repr__(self):
         return "most_interest_payment"
@@ -61,8 +181,11 @@ class PayMostInterestPaymentPaymentManager(PaymentManager):
                     (account.debtor, account.debtor_id, account.debtee))
         return make_ranked_payments(rank_by_worst, max_payment, accounts_to_balances, ignore_minimum_payments)
 
+    def _rank_arrays(self, np, balances, rates):
+        return [-_round_cents(np, rates * balances)]
+
 
-class PayLeastInterestPaymentPaymentManager(PaymentManager):
+class PayLeastInterestPaymentPaymentManager(RankedPaymentManager):
 
     def __repr__(self):
         return "least_interest_payment"
@@ -73,8 +196,11 @@ class PayLeastInterestPaymentPaymentManager(PaymentManager):
                     (account.debtor, account.debtor_id, account.debtee))
         return make_ranked_payments(rank_by_worst, max_payment, accounts_to_balances, ignore_minimum_payments)
 
+    def _rank_arrays(self, np, balances, rates):
+        return [_round_cents(np, rates * balances)]
 
-class SmallestDebtPaymentManager(PaymentManager):
+
+class SmallestDebtPaymentManager(RankedPaymentManager):
     def __repr__(self):
         return "smallest_debt"
 
@@ -84,8 +210,11 @@ class SmallestDebtPaymentManager(PaymentManager):
                     (account.debtor, account.debtor_id, account.debtee))
         return make_ranked_payments(rank_by_smallest_debt, max_payment, accounts_to_balances, ignore_minimum_payments)
 
+    def _rank_arrays(self, np, balances, rates):
+        return [balances]
+
 
-class BiggestDebtPaymentManager(PaymentManager):
+class BiggestDebtPaymentManager(RankedPaymentManager):
     def __repr__(self):
         return "biggest_debt"
 
@@ -95,7 +224,71 @@ class BiggestDebtPaymentManager(PaymentManager):
                     (account.debtor, account.debtor_id, account.debtee))
         return make_ranked_payments(rank_by_biggest_debt, max_payment, accounts_to_balances, ignore_minimum_payments)
 
-def make_split_payments(share_fn, max_payment, accounts_to_balances, ignore_minimum_payments):
+    def _rank_arrays(self, np, balances, rates):
+        return [-balances]
+
+
+class OptimalPaymentManager(RankedPaymentManager):
+    # With a fixed amount to pay each period, moving a dollar from a lower rate account to a higher rate
+    # account never increases the interest charged in any later period (exchange argument), so paying the
+    # minimums and then the highest rate first minimizes the interest paid over the whole horizon.
+    # Equal rates are broken by the smallest balance, which closes accounts (and their minimums) sooner.
+    def __repr__(self):
+        return "optimal"
+
+    def _make_payments(self, max_payment, accounts_to_balances, ignore_minimum_payments):
+        def rank_by_highest_rate(account, balance):
+            return (-account.interest,
+                    balance,
+                    (account.debtor, account.debtor_id, account.debtee))
+        return make_ranked_payments(rank_by_highest_rate, max_payment, accounts_to_balances, ignore_minimum_payments)
+
+    def _rank_arrays(self, np, balances, rates):
+        return [-rates, balances]
+
+
+SplitPaymentCall = collections.namedtuple('SplitPaymentCall', ['accounts', 'passes', 'unallocated', 'capped'])
+
+
+class SplitPaymentStats(object):
+    # Convergence of make_split_payments: how many passes each call took, what was left unallocated and how many
+    # accounts were capped at their balance in each pass. Only running totals are kept, plus the last `keep`
+    # calls as SplitPaymentCalls in recent, so it can stay attached for a whole sweep. Stats are only collected
+    # in this process, so analyze scenarios inline when using them.
+
+    def __init__(self, keep=100):
+        self.recent = collections.deque(maxlen=keep)
+        self.reset()
+
+    def __repr__(self):
+        return "SplitPaymentStats({})".format(self.summary())
+
+    def record(self, accounts, passes, unallocated, capped):
+        self.calls += 1
+        self.passes += passes
+        self.max_passes = max(self.max_passes, passes)
+        self.unallocated += unallocated
+        self.capped += sum(capped)
+        self.recent.append(SplitPaymentCall(accounts, passes, unallocated, capped))
+
+    def reset(self):
+        self.calls = 0
+        self.passes = 0
+        self.max_passes = 0
+        self.unallocated = money.ZERO
+        self.capped = 0
+        self.recent.clear()
+
+    def summary(self):
+        return {'calls': self.calls,
+                'passes': self.passes,
+                'max_passes': self.max_passes,
+                'mean_passes': float(self.passes) / self.calls if self.calls else 0.0,
+                'capped': self.capped,
+                'unallocated': self.unallocated}
+
+
+def make_split_payments(share_fn, max_payment, accounts_to_balances, ignore_minimum_payments, stats=None):
     if ignore_minimum_payments:
         payments = {a: money.ZERO for a, b in accounts_to_balances.items()}
     else:
@@ -103,25 +296,95 @@ def make_split_payments(share_fn, max_payment, accounts_to_balances, ignore_mini
     uncomplete_accounts = {a for a in accounts_to_balances.keys() if payments[a] < accounts_to_balances[a]}
     remaining = max_payment - sum(payments.values(), money.ZERO)
     changing = True
+    capped = []
     while changing and uncomplete_accounts and remaining > money.ZERO:
         changing = False
         updated_accounts_to_balances = {a: accounts_to_balances[a]-payments[a] for a in uncomplete_accounts}
         shares = share_fn(updated_accounts_to_balances)
         # adjust shares for missing accounts (ie accounts that have already been paid off)
         # if shares doesn't equal up to 1, then all remaining money won't be allocated, so the iterations go
-        # way up
-        shares_total = sum([s for a, s in shares.items()])
+        # way up. fsum's total doesn't depend on the (address based) order of the accounts, so the rounding is
+        # the same every run and make_split_payment_matrix can match it
+        shares_total = math.fsum(shares.values())
         for a in uncomplete_accounts:
             p = min((shares[a]/shares_total*remaining) + payments[a], accounts_to_balances[a])
             if payments[a] != p:
                 payments[a] = p
                 changing = True
         remaining = max(max_payment - sum(payments.values(), money.ZERO), money.ZERO)
-        uncomplete_accounts = {a for a in uncomplete_accounts if payments[a] < accounts_to_balances[a]}
+        still_uncomplete_accounts = {a for a in uncomplete_accounts if payments[a] < accounts_to_balances[a]}
+        capped.append(len(uncomplete_accounts) - len(still_uncomplete_accounts))
+        uncomplete_accounts = still_uncomplete_accounts
+    if stats is not None:
+        stats.record(len(accounts_to_balances), len(capped), max(remaining, money.ZERO), capped)
+    return payments
+
+
+def make_split_payment_matrix(share_fn, max_payments, balances, minimum_payments, ignore_minimum_payments, stats=None):
+    # make_split_payments on a scenarios x accounts matrix: share_fn(np, unpaid_balances, uncomplete) returns the
+    # share of each position of each row (only the uncomplete ones are used) and each pass is a handful of
+    # matrix operations; a row drops out of the passes once it stops changing, like the loop of a single call
+    import numpy as np
+    balances = np.asarray(balances, dtype=np.int64)
+    max_payments = np.asarray(max_payments, dtype=np.int64)
+    payments = _initial_payment_array(np, balances, minimum_payments, ignore_minimum_payments)
+    uncomplete = payments < balances
+    remaining = max_payments - payments.sum(axis=1)
+    active = uncomplete.any(axis=1) & (remaining > 0)
+    capped = [[] for _ in range(len(balances))]
+    while active.any():
+        updating = active[:, np.newaxis] & uncomplete
+        # rows which are done can't divide by zero, but they are still part of the matrix
+        with np.errstate(divide='ignore', invalid='ignore'):
+            shares = share_fn(np, balances - payments, uncomplete)
+            # fsum per row, like make_split_payments, rather than numpy's pairwise sum
+            shares_total = np.array([math.fsum(row) for row in np.where(uncomplete, shares, 0.0)])
+            shares = shares / np.where(active, shares_total, 1.0)[:, np.newaxis] * remaining[:, np.newaxis]
+            updated = np.where(updating, np.minimum(_round_cents(np, np.where(updating, shares, 0)) + payments, balances), payments)
+        changing = (updated != payments).any(axis=1)
+        payments = updated
+        remaining = np.maximum(max_payments - payments.sum(axis=1), 0)
+        still_uncomplete = uncomplete & (payments < balances)
+        for row in np.flatnonzero(active):
+            capped[row].append(int(uncomplete[row].sum() - still_uncomplete[row].sum()))
+        uncomplete = still_uncomplete
+        active &= changing & uncomplete.any(axis=1) & (remaining > 0)
+    if stats is not None:
+        for row in range(len(balances)):
+            stats.record(balances.shape[1], len(capped[row]), Money(cents=int(max(remaining[row], 0))), capped[row])
     return payments
 
 
-class WeightedSplitPaymentManager(PaymentManager):
+def make_split_payment_array(share_fn, max_payment, balances, minimum_payments, ignore_minimum_payments, stats=None):
+    import numpy as np
+    return make_split_payment_matrix(share_fn, [max_payment], np.asarray(balances, dtype=np.int64)[np.newaxis], minimum_payments,
+                                     ignore_minimum_payments, stats)[0]
+
+
+class SplitPaymentManager(PaymentManager):
+    # stats is kept out of the public attributes so it doesn't change how the manager is described (or cached)
+
+    def __init__(self, stats=None):
+        self._stats = stats
+
+    @property
+    def stats(self):
+        return self._stats
+
+    def _make_split_payments(self, share_fn, max_payment, accounts_to_balances, ignore_minimum_payments):
+        return make_split_payments(share_fn, max_payment, accounts_to_balances, ignore_minimum_payments, self._stats)
+
+    def _share_array_fn(self, keys):
+        raise NotImplementedError("implement _share_array_fn(keys)")
+
+    def make_payment_array(self, max_payment, balances, minimum_payments, rates, keys=None, ignore_minimum_payments=False):
+        return make_split_payment_array(self._share_array_fn(keys), max_payment, balances, minimum_payments, ignore_minimum_payments, self._stats)
+
+    def make_payment_matrix(self, max_payments, balances, minimum_payments, rates, keys=None, ignore_minimum_payments=False):
+        return make_split_payment_matrix(self._share_array_fn(keys), max_payments, balances, minimum_payments, ignore_minimum_payments, self._stats)
+
+
+class WeightedSplitPaymentManager(SplitPaymentManager):
     def __repr__(self):
         return "weighted_split"
 
@@ -129,10 +392,16 @@ class WeightedSplitPaymentManager(PaymentManager):
         def split_by_balance(a_to_b):
             total = float(sum(a_to_b.values(), money.ZERO))
             return {a: float(b)/total for a, b in a_to_b.items()}
-        return make_split_payments(split_by_balance, max_payment, accounts_to_balances, ignore_minimum_payments)
+        return self._make_split_payments(split_by_balance, max_payment, accounts_to_balances, ignore_minimum_payments)
+
+    def _share_array_fn(self, keys):
+        def split_by_balance(np, unpaid_balances, uncomplete):
+            totals = np.where(uncomplete, unpaid_balances, 0).sum(axis=-1) / 100.0
+            return (unpaid_balances / 100.0) / totals[..., np.newaxis]
+        return split_by_balance
 
 
-class EvenSplitPaymentManager(PaymentManager):
+class EvenSplitPaymentManager(SplitPaymentManager):
     def __repr__(self):
         return "even_split"
 
@@ -140,12 +409,18 @@ class EvenSplitPaymentManager(PaymentManager):
         def split_evenly(a_to_b):
             share = 1.0/len(a_to_b)
             return {a: share for a in a_to_b.keys()}
-        return make_split_payments(split_evenly, max_payment, accounts_to_balances, ignore_minimum_payments)
+        return self._make_split_payments(split_evenly, max_payment, accounts_to_balances, ignore_minimum_payments)
+
+    def _share_array_fn(self, keys):
+        def split_evenly(np, unpaid_balances, uncomplete):
+            return np.broadcast_to(1.0 / uncomplete.sum(axis=-1)[..., np.newaxis], unpaid_balances.shape)
+        return split_evenly
 
 
-class SpecifiedSplitPaymentManager(PaymentManager):
+class SpecifiedSplitPaymentManager(SplitPaymentManager):
 
-    def __init__(self, split):
+    def __init__(self, split, stats=None):
+        super(SpecifiedSplitPaymentManager, self).__init__(stats)
         self.split = split
 
     def __repr__(self):
@@ -162,7 +437,21 @@ class SpecifiedSplitPaymentManager(PaymentManager):
                 for a in accounts:
                     debtor_splits[a] = self.split[group]*float(a_to_b[a])/float(group_total)
             return debtor_splits
-        return make_split_payments(split_by_debtor, max_payment, accounts_to_balances, ignore_minimum_payments)
+        return self._make_split_payments(split_by_debtor, max_payment, accounts_to_balances, ignore_minimum_payments)
+
+    def _share_array_fn(self, keys):
+        if keys is None:
+            raise ValueError("keys are needed to split by debtor")
+        debtors = sorted(set(k[0] for k in keys))
+        groups = [debtors.index(k[0]) for k in keys]
+        debtor_splits = [self.split[d] for d in debtors]
+
+        def split_by_debtor(np, unpaid_balances, uncomplete):
+            unpaid_balances = np.where(uncomplete, unpaid_balances, 0)
+            # summing through a positions x debtors indicator matrix gives the debtor totals of every row at once
+            group_totals = unpaid_balances.dot(np.eye(len(debtors))[groups]) / 100.0
+            return np.asarray(debtor_splits)[groups] * (unpaid_balances / 100.0) / np.where(group_totals > 0, group_totals, 1.0)[..., groups]
+        return split_by_debtor
 
 
 class MinimumPaymentManager(PaymentManager):
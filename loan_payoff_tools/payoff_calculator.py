@@ -1,8 +1,10 @@
+import array
 import itertools
 import operator
 import datetime
 import calendar
 import collections
+import timeit
 from money import Money
 
 
@@ -35,19 +37,162 @@ def _combine_payments(*payment_groups):
     return combined_payments
 
 
-def calculate_payoff(max_payment_determiner, payment_manager, bonus_payment_manager, accounts, starting_date=None, payments_per_year=12):
-    def calculate_remaining_accounts_balance(remaining_accounts_balance, payments):
-        return {a: b-payments[a] for a, b in remaining_accounts_balance.items() if payments[a] < b}
+class PayoffInstrumentation(object):
+    # Accumulates wall time and calls per phase of calculate_payoff, and per payment manager id, over every
+    # calculation it is passed to. When calculate_payoff isn't given one nothing is wrapped or timed.
+    # It only holds plain dicts of [seconds, calls], so it can be pickled to and from workers and merged.
+
+    def __init__(self):
+        self.phases = {}
+        self.payment_managers = {}
+
+    def __repr__(self):
+        return "PayoffInstrumentation({})".format(self.as_dict())
+
+    def __eq__(self, other):
+        if isinstance(other, self.__class__):
+            return (self.phases, self.payment_managers) == (other.phases, other.payment_managers)
+        return NotImplemented
+
+    def __ne__(self, other):
+        if isinstance(other, self.__class__):
+            return not self.__eq__(other)
+        return NotImplemented
+
+    def add(self, phase, seconds, calls=1, payment_manager_id=None):
+        totals = self.phases.setdefault(phase, [0.0, 0])
+        totals[0] += seconds
+        totals[1] += calls
+        if payment_manager_id is not None:
+            totals = self.payment_managers.setdefault(payment_manager_id, [0.0, 0])
+            totals[0] += seconds
+            totals[1] += calls
+
+    def merge(self, other):
+        # e.g. the instrumentation sent back by each worker
+        for name, (seconds, calls) in other.phases.items():
+            self.add(name, seconds, calls)
+        for name, (seconds, calls) in other.payment_managers.items():
+            totals = self.payment_managers.setdefault(name, [0.0, 0])
+            totals[0] += seconds
+            totals[1] += calls
+        return self
+
+    def timed(self, phase, fn, payment_manager_id=None):
+        def timed_fn(*args, **kwargs):
+            start = timeit.default_timer()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.add(phase, timeit.default_timer() - start, payment_manager_id=payment_manager_id)
+        return timed_fn
+
+    def as_dict(self):
+        return {'phases': {name: {'seconds': seconds, 'calls': calls} for name, (seconds, calls) in self.phases.items()},
+                'payment_managers': {name: {'seconds': seconds, 'calls': calls} for name, (seconds, calls) in self.payment_managers.items()}}
+
+    def export(self, sink):
+        # sink(name, seconds, calls), e.g. to forward into a metrics client
+        for prefix, totals in (('phase', self.phases), ('payment_manager', self.payment_managers)):
+            for name, (seconds, calls) in sorted(totals.items()):
+                sink('{}.{}'.format(prefix, name), seconds, calls)
+
+
+class DiscardPayments(object):
+    # a monthly payments sink for when only the totals are wanted
+
+    def append(self, monthly_info):
+        pass
+
+
+class InterestAttribution(object):
+    # Interest charged to each account, accumulated in cents by position as calculate_payoff applies it, so the
+    # interest per account or per debtor doesn't need the monthly payments. Accumulates over every calculation
+    # it is passed to.
+
+    def __init__(self, accounts):
+        self.accounts = list(accounts)
+        self.interest = array.array('l', [0] * len(self.accounts))
+        self._positions = {a: i for i, a in enumerate(self.accounts)}
+
+    def __repr__(self):
+        return "InterestAttribution({})".format(self.total)
+
+    def __getstate__(self):
+        # only the interest goes between processes; whoever receives it rebinds it to their accounts
+        return {'interest': self.interest}
+
+    def __setstate__(self, state):
+        self.interest = state['interest']
+        self.accounts = None
+        self._positions = None
+
+    def rebind(self, accounts):
+        # keys the attribution by accounts, position for position, e.g. the caller's in place of a worker's copies
+        self.accounts = list(accounts)
+        self._positions = {a: i for i, a in enumerate(self.accounts)}
+        return self
+
+    def charge(self, account, cents):
+        self.interest[self._positions[account]] += cents
+
+    @property
+    def total(self):
+        return Money(cents=sum(self.interest))
+
+    def by_account(self):
+        return collections.OrderedDict((a, Money(cents=c)) for a, c in zip(self.accounts, self.interest))
+
+    def by_debtor(self):
+        debtors = collections.OrderedDict()
+        for a, c in zip(self.accounts, self.interest):
+            debtors[a.debtor] = debtors.get(a.debtor, 0) + c
+        return collections.OrderedDict((debtor, Money(cents=c)) for debtor, c in debtors.items())
+
+
+def _remaining_accounts_balance(remaining_accounts_balance, payments):
+    return {a: b-payments[a] for a, b in remaining_accounts_balance.items() if payments[a] < b}
+
+
+def _apply_interest(remaining_accounts_balance, payments_per_year, interest_attribution):
+    if interest_attribution is None:
+        for account in remaining_accounts_balance.keys():
+            remaining_accounts_balance[account] *= (1+account.interest/payments_per_year)
+        return
+    for account, balance in remaining_accounts_balance.items():
+        charged = balance * (1+account.interest/payments_per_year)
+        remaining_accounts_balance[account] = charged
+        interest_attribution.charge(account, charged.cents - balance.cents)
+
+
+def _record_payments(monthly_payments, payment_date, account_payments, remaining_accounts_balance):
+    monthly_payments.append((payment_date, {a: (p, remaining_accounts_balance.get(a, Money(0))) for a, p in account_payments.items()}))
+
+
+def calculate_payoff(max_payment_determiner, payment_manager, bonus_payment_manager, accounts, starting_date=None, payments_per_year=12, monthly_payments=None,
+                     instrumentation=None, interest_attribution=None):
+    apply_interest = _apply_interest
+    calculate_remaining_accounts_balance = _remaining_accounts_balance
+    combine_payments = _combine_payments
+    record_payments = _record_payments
+    if instrumentation is not None:
+        apply_interest = instrumentation.timed('interest', apply_interest)
+        max_payment_determiner = instrumentation.timed('max_payment_determiner', max_payment_determiner)
+        payment_manager = instrumentation.timed('payment_manager', payment_manager, payment_manager.id)
+        bonus_payment_manager = instrumentation.timed('bonus_payment_manager', bonus_payment_manager, bonus_payment_manager.id)
+        calculate_remaining_accounts_balance = instrumentation.timed('remaining_balance', calculate_remaining_accounts_balance)
+        combine_payments = instrumentation.timed('combine_payments', combine_payments)
+        record_payments = instrumentation.timed('record_payments', record_payments)
     payment_date_incrementer = _build_date_incrementer(payments_per_year)
     # TODO should this default to start of the month?
     current_payment_date = starting_date or datetime.date.today()
     remaining_accounts_balance = {a: a.initial_balance for a in accounts}
-    monthly_payments = []
+    # anything with append() can receive the monthly payments, e.g. a writer streaming them to disk
+    monthly_payments = [] if monthly_payments is None else monthly_payments
+    months = 0
     total_paid = Money(0)
     while remaining_accounts_balance:
-        # apply interest
-        for account in remaining_accounts_balance.keys():
-            remaining_accounts_balance[account] *= (1+account.interest/payments_per_year)
+        apply_interest(remaining_accounts_balance, payments_per_year, interest_attribution)
         (max_payment, bonus) = max_payment_determiner(payments_per_year, current_payment_date)
         account_payments = payment_manager(max_payment, remaining_accounts_balance)
 
@@ -55,8 +200,9 @@ def calculate_payoff(max_payment_determiner, payment_manager, bonus_payment_mana
         if bonus:
             bonus_account_payments = bonus_payment_manager(bonus, remaining_accounts_balance, ignore_minimum_payments = True)
             remaining_accounts_balance = calculate_remaining_accounts_balance(remaining_accounts_balance, bonus_account_payments)
-            account_payments = _combine_payments(account_payments, bonus_account_payments)
+            account_payments = combine_payments(account_payments, bonus_account_payments)
         total_paid += sum(account_payments.values(), Money(0))
-        monthly_payments.append((current_payment_date, {a: (p, remaining_accounts_balance.get(a, Money(0))) for a, p in account_payments.items()}))
+        record_payments(monthly_payments, current_payment_date, account_payments, remaining_accounts_balance)
+        months += 1
         current_payment_date = payment_date_incrementer(current_payment_date)
-    return total_paid, len(monthly_payments), monthly_payments
+    return total_paid, months, monthly_payments
@@ -0,0 +1,116 @@
+import multiprocessing
+import time
+
+import numpy as np
+import matplotlib.dates as mdates
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+import utils
+
+
+def monthly_remaining_series(monthly_payments):
+    # remaining balance per account in dollars; an account's series stops once it is paid off
+    dates = np.array(mdates.date2num([d for d, _ in monthly_payments]))
+    columns = {}
+    lengths = {}
+    remaining = []
+    for period, (_, payments) in enumerate(monthly_payments):
+        for account, (_, account_remaining) in payments.items():
+            if account not in columns:
+                columns[account] = len(columns)
+                remaining.append(np.zeros(len(monthly_payments), dtype=np.int64))
+            remaining[columns[account]][period] = account_remaining.cents
+            lengths[account] = period + 1
+    return dates, {a: remaining[c][:lengths[a]] / 100.0 for a, c in columns.items()}
+
+
+def downsample_min_max(x, y, max_points):
+    # keeps the first, last, lowest and highest point of each bucket so peaks survive thinning
+    if len(y) <= max_points:
+        return x, y
+    buckets = np.array_split(np.arange(len(y)), max(max_points // 2 - 1, 1))
+    keep = [0, len(y) - 1]
+    for bucket in buckets:
+        keep.append(bucket[np.argmin(y[bucket])])
+        keep.append(bucket[np.argmax(y[bucket])])
+    keep = np.unique(keep)
+    return x[keep], y[keep]
+
+
+class MonthlyPaymentsFigure(object):
+    # a reusable figure that draws without pyplot, so rendering many charts skips its global state
+
+    def __init__(self, max_points=500, max_ticks=12):
+        self.max_points = max_points
+        self.figure = Figure()
+        self.canvas = FigureCanvasAgg(self.figure)
+        self.graph = self.figure.add_subplot(111)
+        # Shrink current axis by 20%
+        box = self.graph.get_position()
+        self.graph.set_position([box.x0, box.y0, box.width * 0.8, box.height])
+        self.locator = mdates.AutoDateLocator(maxticks=max_ticks)
+        self.formatter = mdates.DateFormatter("%Y-%m-%d")
+
+    def render(self, output_file, dates, series):
+        graph = self.graph
+        graph.cla()
+        for label in sorted(series.keys(), reverse=True):
+            y = series[label]
+            x, y = downsample_min_max(dates[:len(y)], y, self.max_points)
+            graph.plot(x, y, label=str(label))
+        graph.xaxis.set_major_locator(self.locator)
+        graph.xaxis.set_major_formatter(self.formatter)
+        for tick in graph.get_xticklabels():
+            tick.set_rotation(30)
+            tick.set_fontsize(6)
+
+        # Put a legend to the right of the current axis
+        graph.legend(loc='center left', bbox_to_anchor=(1, 0.5), prop={'size':6})
+
+        self.canvas.print_figure(output_file)
+
+
+def dump_monthly_payments_to_png(output_file, monthly_payments, figure=None):
+    figure = figure or MonthlyPaymentsFigure()
+    dates, series = monthly_remaining_series(monthly_payments)
+    figure.render(output_file, dates, series)
+
+
+def dump_many_monthly_payments_to_png(output_files_and_monthly_payments, figure=None):
+    figure = figure or MonthlyPaymentsFigure()
+    for output_file, monthly_payments in output_files_and_monthly_payments:
+        dump_monthly_payments_to_png(output_file, monthly_payments, figure)
+
+
+_worker_figure = None
+
+
+def _render_chunk(chunk):
+    # each worker process keeps one figure around for every chunk it renders
+    global _worker_figure
+    if _worker_figure is None:
+        _worker_figure = MonthlyPaymentsFigure()
+    timings = []
+    for output_file, dates, series in chunk:
+        start = time.time()
+        _worker_figure.render(output_file, dates, series)
+        timings.append((output_file, time.time() - start))
+    return timings
+
+
+def render_results_to_png(output_files_and_results, processes=None, chunk_size=4):
+    # series are labelled by str(account) so only arrays are sent to the workers
+    def charts():
+        for output_file, result in output_files_and_results:
+            dates, series = monthly_remaining_series(result.monthly_payments)
+            yield output_file, dates, {str(a): y for a, y in series.items()}
+    chunks = utils.chunked(charts(), chunk_size)
+    if processes == 1:
+        return [t for chunk in chunks for t in _render_chunk(chunk)]
+    pool = multiprocessing.Pool(processes)
+    try:
+        return [t for timings in pool.imap(_render_chunk, chunks) for t in timings]
+    finally:
+        pool.terminate()
+        pool.join()
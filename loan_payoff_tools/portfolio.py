@@ -0,0 +1,117 @@
+import collections
+import datetime
+import heapq
+import multiprocessing
+
+import money
+from account_table import AccountTable
+from payoff_calculator import calculate_payoff
+from payoff_calculator import InterestAttribution
+from payoff_calculator import DiscardPayments
+
+BorrowerSummary = collections.namedtuple('BorrowerSummary', ['debtee', 'max_payment_determiner', 'accounts', 'months', 'initial_debt', 'total_paid', 'interest_paid',
+                                                             'interest_by_debtor'])
+
+
+def group_accounts_by_debtee(accounts):
+    groups = collections.OrderedDict()
+    for account in accounts:
+        groups.setdefault(account.debtee, []).append(account)
+    return groups
+
+
+def group_indexes_by_debtee(table):
+    groups = collections.OrderedDict()
+    for i, debtee in enumerate(table.debtee):
+        groups.setdefault(debtee, []).append(i)
+    return groups
+
+
+def balance_shards(groups, shard_count):
+    # longest processing time first: hand the biggest remaining group to the lightest shard;
+    # groups are (debtee, accounts, ...) and their cost is estimated by their number of accounts
+    shard_count = max(1, min(shard_count, len(groups)))
+    shards = [[] for _ in range(shard_count)]
+    loads = [(0, i) for i in range(shard_count)]
+    for group in sorted(groups, key=lambda g: len(g[1]), reverse=True):
+        load, i = heapq.heappop(loads)
+        shards[i].append(group)
+        heapq.heappush(loads, (load + len(group[1]), i))
+    return [shard for shard in shards if shard]
+
+
+def _plan_borrower(debtee, accounts, max_payment_determiner, payment_manager, bonus_payment_manager, starting_date):
+    # only the totals are kept for a portfolio, so the monthly payments are thrown away as they are made
+    initial_debt = sum([a.initial_balance for a in accounts], money.ZERO)
+    interest_attribution = InterestAttribution(accounts)
+    total_paid, months, _ = calculate_payoff(max_payment_determiner, payment_manager, bonus_payment_manager, accounts, starting_date,
+                                             monthly_payments=DiscardPayments(), interest_attribution=interest_attribution)
+    return BorrowerSummary(debtee, max_payment_determiner.id, len(accounts), months, initial_debt, total_paid, total_paid - initial_debt,
+                           dict(interest_attribution.by_debtor()))
+
+
+# set in each worker of analyze_portfolio to the shared account table
+_worker_table = None
+
+
+def _attach_table(shared_table):
+    global _worker_table
+    _worker_table = shared_table
+
+
+def _plan_groups(groups, table, payment_manager, bonus_payment_manager, starting_date):
+    # groups carry positions into the table, and only the accounts of the borrower being planned are built
+    return [_plan_borrower(debtee, [table.account(i) for i in indexes], mpd, payment_manager, bonus_payment_manager, starting_date)
+            for debtee, indexes, mpd in groups]
+
+
+def _plan_shard(shard_and_managers):
+    shard, payment_manager, bonus_payment_manager, starting_date = shard_and_managers
+    return _plan_groups(shard, _worker_table, payment_manager, bonus_payment_manager, starting_date)
+
+
+def analyze_portfolio(accounts, max_payment_determiners, payment_manager, bonus_payment_manager, starting_date=None,
+                      processes=None, shards_per_process=4):
+    # every borrower is planned independently with their own determiner, looked up by debtee;
+    # accounts may be an AccountTable, e.g. from load_account_table, so the book is never held as Account objects
+    starting_date = starting_date or datetime.date.today()
+    table = accounts if isinstance(accounts, AccountTable) else AccountTable.from_accounts(accounts)
+    groups = []
+    for debtee, indexes in group_indexes_by_debtee(table).items():
+        if debtee not in max_payment_determiners:
+            raise ValueError("No max payment determiner for {}".format(debtee))
+        groups.append((debtee, indexes, max_payment_determiners[debtee]))
+
+    summaries = {}
+    if processes == 1:
+        for summary in _plan_groups(groups, table, payment_manager, bonus_payment_manager, starting_date):
+            summaries[summary.debtee] = summary
+    else:
+        processes = processes or multiprocessing.cpu_count()
+        # several shards per worker so a slow borrower doesn't leave the other workers idle at the end
+        shards = balance_shards(groups, processes * shards_per_process)
+        pool = multiprocessing.Pool(processes, _attach_table, (table.share(),))
+        try:
+            tasks = ((shard, payment_manager, bonus_payment_manager, starting_date) for shard in shards)
+            for shard_summaries in pool.imap_unordered(_plan_shard, tasks):
+                for summary in shard_summaries:
+                    summaries[summary.debtee] = summary
+        finally:
+            pool.terminate()
+            pool.join()
+    return collections.OrderedDict((debtee, summaries[debtee]) for debtee, _, _ in groups)
+
+
+def summarize_portfolio(summaries):
+    summaries = list(summaries)
+    interest_by_debtor = {}
+    for s in summaries:
+        for debtor, interest in s.interest_by_debtor.items():
+            interest_by_debtor[debtor] = interest_by_debtor.get(debtor, money.ZERO) + interest
+    return {'borrowers': len(summaries),
+            'accounts': sum(s.accounts for s in summaries),
+            'months': max([s.months for s in summaries] or [0]),
+            'initial_debt': sum([s.initial_debt for s in summaries], money.ZERO),
+            'total_paid': sum([s.total_paid for s in summaries], money.ZERO),
+            'interest_paid': sum([s.interest_paid for s in summaries], money.ZERO),
+            'interest_by_debtor': interest_by_debtor}
@@ -0,0 +1,287 @@
+import collections
+import contextlib
+import cProfile
+import datetime
+import gc
+import os
+import os.path
+import pstats
+import sys
+import threading
+
+import analysis
+from environment import PROFILE_ENVIRONMENT_VARIABLE, PROFILE_EVERY_ENVIRONMENT_VARIABLE
+from money import Money
+
+try:
+    import tracemalloc
+except ImportError:
+    # python 2 only has it through a patched interpreter
+    tracemalloc = None
+
+# source files of each subsystem, for attributing tracemalloc traces (or, without it, the Money each one builds)
+SUBSYSTEMS = {'money.py': 'money',
+              'payment_manager.py': 'payment_managers',
+              'payoff_calculator.py': 'calculator',
+              'analysis.py': 'analysis'}
+
+MemoryProfile = collections.namedtuple('MemoryProfile', ['scenario', 'money_created', 'peak_bytes', 'retained_bytes', 'subsystems'])
+
+
+def scenario_name(scenario):
+    return '{} {} {}'.format(scenario.max_payment_determiner.id, scenario.payment_manager.id, scenario.bonus_payment_manager.id)
+
+
+class MoneyCounter(object):
+
+    def __init__(self):
+        self.created = 0
+        # Money built on behalf of each subsystem, when counted by_subsystem
+        self.subsystems = collections.Counter()
+
+    def __repr__(self):
+        return "MoneyCounter({})".format(self.created)
+
+
+def _requesting_subsystem(frame):
+    # the subsystem of the first caller outside of money.py, so Money arithmetic counts against whoever did it
+    while frame is not None and _subsystem(frame.f_code.co_filename) == 'money':
+        frame = frame.f_back
+    return _subsystem(frame.f_code.co_filename) if frame is not None else 'other'
+
+
+@contextlib.contextmanager
+def count_money(by_subsystem=False):
+    # counts every Money built while active, including the ones built by Money arithmetic
+    counter = MoneyCounter()
+    original = Money.__dict__['__init__']
+
+    def counting_init(self, *args, **kwargs):
+        counter.created += 1
+        if by_subsystem:
+            counter.subsystems[_requesting_subsystem(sys._getframe(1))] += 1
+        original(self, *args, **kwargs)
+    Money.__init__ = counting_init
+    try:
+        yield counter
+    finally:
+        Money.__init__ = original
+
+
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def _current_rss():
+    # resident set size right now, or None where it can't be read (only /proc is supported);
+    # ru_maxrss is no use per scenario since it only rises past the biggest scenario so far
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (IOError, IndexError, ValueError):
+        return None
+
+
+class _RssSampler(object):
+    # samples the current RSS from a thread while a scenario runs, keeping the highest
+
+    def __init__(self, interval=0.001):
+        self.interval = interval
+        self.before = _current_rss()
+        self.highest = self.before
+        self._done = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        if self.before is not None:
+            self._thread = threading.Thread(target=self._sample)
+            self._thread.daemon = True
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._thread is not None:
+            self._done.set()
+            self._thread.join()
+            self._record()
+
+    def _record(self):
+        rss = _current_rss()
+        if rss is not None:
+            self.highest = max(self.highest, rss)
+
+    def _sample(self):
+        while not self._done.wait(self.interval):
+            self._record()
+
+    @property
+    def peak_bytes(self):
+        return self.highest - self.before if self.before is not None else None
+
+
+def _money_bytes():
+    money = Money(0)
+    return sys.getsizeof(money) + sys.getsizeof(vars(money))
+
+
+def _result_sizes(result):
+    # without tracemalloc, retained memory is measured by walking what the result holds onto;
+    # accounts and the scenario's components are shared with the caller so they aren't counted
+    sizes = collections.Counter()
+    seen = set()
+    stack = [result.initial_debt, result.total_paid, result.interest_paid, result.monthly_payments]
+    while stack:
+        value = stack.pop()
+        if id(value) in seen:
+            continue
+        seen.add(id(value))
+        if isinstance(value, Money):
+            sizes['money'] += sys.getsizeof(value) + sys.getsizeof(vars(value))
+        elif isinstance(value, dict):
+            sizes['analysis'] += sys.getsizeof(value)
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            sizes['analysis'] += sys.getsizeof(value)
+            stack.extend(value)
+        elif isinstance(value, datetime.date):
+            sizes['analysis'] += sys.getsizeof(value)
+    return sizes
+
+
+def _subsystem(file_name):
+    return SUBSYSTEMS.get(os.path.basename(file_name), 'other')
+
+
+def _profile_with_tracemalloc(scenario):
+    if hasattr(tracemalloc, 'reset_peak'):
+        tracemalloc.reset_peak()
+    before = tracemalloc.take_snapshot()
+    current_before = tracemalloc.get_traced_memory()[0]
+    with count_money() as counter:
+        result = analysis.analyze(*scenario)
+    current_after, peak = tracemalloc.get_traced_memory()
+    subsystems = collections.Counter()
+    for stat in tracemalloc.take_snapshot().compare_to(before, 'filename'):
+        subsystems[_subsystem(stat.traceback[0].filename)] += stat.size_diff
+    return result, MemoryProfile(scenario_name(scenario), counter.created, peak - current_before, current_after - current_before, dict(subsystems))
+
+
+def _profile_with_rss(scenario):
+    with _RssSampler() as sampler:
+        with count_money(by_subsystem=True) as counter:
+            result = analysis.analyze(*scenario)
+    sizes = _result_sizes(result)
+    money_bytes = _money_bytes()
+    subsystems = collections.Counter({name: created * money_bytes for name, created in counter.subsystems.items()})
+    # the monthly payments are built by calculate_payoff
+    subsystems['calculator'] += sizes['analysis']
+    return result, MemoryProfile(scenario_name(scenario), counter.created, sampler.peak_bytes, sum(sizes.values()), dict(subsystems))
+
+
+def profile_memory(scenarios):
+    # Runs each scenario inline and yields (result, MemoryProfile). With tracemalloc, peak and retained bytes
+    # come from traced allocations and subsystems from the source file that allocated them. Without it, peak is
+    # the rise in RSS sampled while the scenario runs (None where RSS can't be read), retained is the size of the
+    # result and subsystems are estimated from the Money each subsystem built plus the monthly payments' containers.
+    started = False
+    if tracemalloc is not None and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        started = True
+    try:
+        for scenario in scenarios:
+            gc.collect()
+            if tracemalloc is not None:
+                yield _profile_with_tracemalloc(scenario)
+            else:
+                yield _profile_with_rss(scenario)
+    finally:
+        if started:
+            tracemalloc.stop()
+
+
+def summarize_memory(profiles):
+    # max_peak_bytes is None when no profile could measure its peak
+    profiles = list(profiles)
+    count = len(profiles) or 1
+    peaks = [p.peak_bytes for p in profiles if p.peak_bytes is not None]
+    return {'scenarios': len(profiles),
+            'max_peak_bytes': max(peaks) if peaks else None,
+            'max_retained_bytes': max([p.retained_bytes for p in profiles] or [0]),
+            'mean_retained_bytes': sum(p.retained_bytes for p in profiles) / count,
+            'mean_money_created': sum(p.money_created for p in profiles) / count}
+
+
+class _RawStats(object):
+    # lets pstats load stats which were pickled back from a worker process
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+
+def profile_call(fn, *args, **kwargs):
+    # returns (fn's result, raw stats); the raw stats are a plain dict so they can be sent between processes
+    profiler = cProfile.Profile()
+    result = profiler.runcall(fn, *args, **kwargs)
+    profiler.create_stats()
+    return result, profiler.stats
+
+
+def merge_stats(raw_stats):
+    merged = None
+    for stats in raw_stats:
+        if merged is None:
+            merged = pstats.Stats(_RawStats(stats))
+        else:
+            merged.add(_RawStats(stats))
+    return merged.stats if merged is not None else None
+
+
+class ScenarioProfiler(object):
+    # Collects cProfile stats of every "every"th scenario run by analyze_all, analyze_all_for_accounts or
+    # grid_search (in whichever process runs them) and writes one combined report when the run ends.
+
+    def __init__(self, output_file=None, every=1):
+        self.output_file = output_file
+        self.every = every
+        self.scenarios = 0
+        self.stats = None
+
+    def __repr__(self):
+        return "ScenarioProfiler({}, {})".format(self.output_file, self.every)
+
+    @classmethod
+    def from_environment(cls, environ=None):
+        environ = os.environ if environ is None else environ
+        output_file = environ.get(PROFILE_ENVIRONMENT_VARIABLE)
+        if not output_file:
+            return None
+        return cls(output_file, int(environ.get(PROFILE_EVERY_ENVIRONMENT_VARIABLE) or 1))
+
+    def add(self, raw_stats, scenarios=1):
+        if self.stats is None:
+            self.stats = pstats.Stats(_RawStats(raw_stats))
+        else:
+            self.stats.add(_RawStats(raw_stats))
+        self.scenarios += scenarios
+
+    def profile(self, fn, *args, **kwargs):
+        result, raw_stats = profile_call(fn, *args, **kwargs)
+        self.add(raw_stats)
+        return result
+
+    def report(self, out, limit=40):
+        out.write("{} scenarios profiled\n".format(self.scenarios))
+        if self.stats is not None:
+            self.stats.stream = out
+            self.stats.sort_stats('cumulative').print_stats(limit)
+
+    def write_report(self):
+        if self.output_file is None or self.stats is None:
+            return
+        if self.output_file.endswith('.prof'):
+            self.stats.dump_stats(self.output_file)
+        else:
+            with open(self.output_file, 'w') as f:
+                self.report(f)
@@ -0,0 +1,132 @@
+import datetime
+import inspect
+import itertools
+import json
+import os.path
+
+import analysis
+import max_payment_determiner
+import payment_manager
+from utils import describe
+
+MAX_PAYMENT_DETERMINERS = {
+    'constant': max_payment_determiner.ConstantMaxPaymentDeterminer,
+    'minimum': max_payment_determiner.MinimumMaxPaymentDeterminer,
+    'annual_raise': max_payment_determiner.AnnualRaiseMaxPaymentDeterminer,
+    'minimum_annual_raise': max_payment_determiner.MinimumAnnualRaiseMaxPaymentDeterminer,
+    'annual_raise_and_bonus': max_payment_determiner.AnnualRaiseAndBonusMaxPaymentDeterminer,
+    'minimum_annual_raise_and_bonus': max_payment_determiner.MinimumAnnualRaiseAndBonusMaxPaymentDeterminer,
+}
+
+PAYMENT_MANAGERS = {
+    'most_interest_payment': payment_manager.PayMostInterestPaymentPaymentManager,
+    'least_interest_payment': payment_manager.PayLeastInterestPaymentPaymentManager,
+    'smallest_debt': payment_manager.SmallestDebtPaymentManager,
+    'biggest_debt': payment_manager.BiggestDebtPaymentManager,
+    'optimal': payment_manager.OptimalPaymentManager,
+    'weighted_split': payment_manager.WeightedSplitPaymentManager,
+    'even_split': payment_manager.EvenSplitPaymentManager,
+    'specified_split': payment_manager.SpecifiedSplitPaymentManager,
+    'minimum': payment_manager.MinimumPaymentManager,
+}
+
+
+def _to_date(value):
+    # YAML already turns YYYY-MM-DD into dates
+    if isinstance(value, datetime.date):
+        return value
+    return datetime.datetime.strptime(value, '%Y-%m-%d').date()
+
+
+def _build(registry, spec, **extra):
+    # a spec is either a type name or {"type": name, <constructor arguments>}; dates are given as YYYY-MM-DD
+    if not isinstance(spec, dict):
+        spec = {'type': spec}
+    parameters = dict(spec)
+    type_name = parameters.pop('type', None)
+    if type_name not in registry:
+        raise ValueError("Unsupported type: {} (expected one of {})".format(type_name, ', '.join(sorted(registry))))
+    cls = registry[type_name]
+    for name, value in parameters.items():
+        if name.endswith('_date'):
+            parameters[name] = _to_date(value)
+    arg_names = inspect.getargspec(cls.__init__).args if inspect.ismethod(cls.__init__) else []
+    for name, value in extra.items():
+        if name in arg_names:
+            parameters[name] = value
+    return cls(**parameters)
+
+
+def build_max_payment_determiner(spec, accounts):
+    return _build(MAX_PAYMENT_DETERMINERS, spec, accounts=accounts)
+
+
+def build_payment_manager(spec):
+    return _build(PAYMENT_MANAGERS, spec)
+
+
+def _expand_value(value):
+    # a list gives alternatives and {"start": x, "stop": y, "step": z} an inclusive range
+    if isinstance(value, list):
+        return value
+    if isinstance(value, dict) and sorted(value.keys()) == ['start', 'step', 'stop']:
+        start, stop, step = value['start'], value['stop'], value['step']
+        count = int(round((stop - start) / float(step)))
+        if all(isinstance(v, (int, long)) for v in (start, stop, step)):
+            return [start + i * step for i in range(count + 1)]
+        return [round(start + i * step, 10) for i in range(count + 1)]
+    return [value]
+
+
+def expand_component_spec(spec):
+    if isinstance(spec, list):
+        for alternative in spec:
+            for expanded in expand_component_spec(alternative):
+                yield expanded
+    elif isinstance(spec, dict):
+        names = sorted(spec.keys())
+        for values in itertools.product(*[_expand_value(spec[name]) for name in names]):
+            yield dict(zip(names, values))
+    else:
+        yield spec
+
+
+def expand_scenarios(spec, accounts):
+    starting_date = _to_date(spec['starting_date']) if 'starting_date' in spec else None
+    for scenario in spec['scenarios']:
+        for mpd_spec, pm_spec, bpm_spec in itertools.product(expand_component_spec(scenario['max_payment_determiner']),
+                                                             expand_component_spec(scenario['payment_manager']),
+                                                             expand_component_spec(scenario['bonus_payment_manager'])):
+            yield analysis.Scenario(build_max_payment_determiner(mpd_spec, accounts),
+                                    build_payment_manager(pm_spec),
+                                    build_payment_manager(bpm_spec),
+                                    accounts,
+                                    starting_date)
+
+
+def canonical_scenario_key(scenario):
+    mpd = scenario.max_payment_determiner
+    # without a bonus the bonus payment manager is never called, so it can't tell scenarios apart
+    bonus_payment_manager = describe(scenario.bonus_payment_manager) if mpd.has_bonus else None
+    return (describe(mpd), describe(scenario.payment_manager), bonus_payment_manager, scenario.starting_date)
+
+
+def dedupe_scenarios(scenarios):
+    seen = set()
+    for scenario in scenarios:
+        key = canonical_scenario_key(scenario)
+        if key not in seen:
+            seen.add(key)
+            yield scenario
+
+
+def build_scenarios(spec, accounts):
+    return dedupe_scenarios(expand_scenarios(spec, accounts))
+
+
+def load_spec(file_name):
+    with open(file_name, 'rb') as f:
+        if os.path.splitext(file_name)[1].lower() in ('.yaml', '.yml'):
+            import yaml
+            return yaml.safe_load(f)
+        return json.load(f)
@@ -0,0 +1,56 @@
+import collections
+import copy
+import datetime
+
+import analysis
+from money import Money
+
+DEFAULT_STEPS = {'interest': 0.001, 'minimum_payment': 10.0, 'salary': 1000.0, 'raise_percent': 0.005}
+
+# determiner parameters which can be perturbed and the attribute which holds them
+_DETERMINER_PARAMETERS = collections.OrderedDict([('salary', 'inital_salary'), ('raise_percent', 'annual_raise_percent')])
+
+OUTPUTS = ('months', 'interest_paid')
+
+SensitivityResults = collections.namedtuple('SensitivityResults', ['base', 'parameters', 'outputs', 'matrix'])
+
+
+def _perturb(component, attribute, step):
+    perturbed = copy.copy(component)
+    value = getattr(perturbed, attribute)
+    setattr(perturbed, attribute, value + (Money(step) if isinstance(value, Money) else step))
+    return perturbed
+
+
+def _build_scenarios(max_payment_determiner, payment_manager, bonus_payment_manager, accounts, starting_date, steps):
+    yield 'base', None, analysis.Scenario(max_payment_determiner, payment_manager, bonus_payment_manager, accounts, starting_date)
+    for i, account in enumerate(accounts):
+        for field in ('interest', 'minimum_payment'):
+            perturbed_accounts = list(accounts)
+            perturbed_accounts[i] = _perturb(account, field, steps[field])
+            yield ('{}.{}'.format(account, field), steps[field],
+                   analysis.Scenario(max_payment_determiner, payment_manager, bonus_payment_manager, perturbed_accounts, starting_date))
+    for parameter, attribute in _DETERMINER_PARAMETERS.items():
+        if hasattr(max_payment_determiner, attribute):
+            yield (parameter, steps[parameter],
+                   analysis.Scenario(_perturb(max_payment_determiner, attribute, steps[parameter]), payment_manager, bonus_payment_manager, accounts, starting_date))
+
+
+def _outputs(result):
+    return (result.months, float(result.interest_paid))
+
+
+def analyze_sensitivity(max_payment_determiner, payment_manager, bonus_payment_manager, accounts, starting_date=None,
+                        steps=None, processes=None, chunk_size=16):
+    steps = dict(DEFAULT_STEPS, **(steps or {}))
+    # every scenario must start on the same date or the differences are meaningless
+    starting_date = starting_date or datetime.date.today()
+    names, deltas, scenarios = zip(*_build_scenarios(max_payment_determiner, payment_manager, bonus_payment_manager,
+                                                     list(accounts), starting_date, steps))
+    results = [r for chunk in analysis.analyze_all(scenarios, processes, chunk_size, summary_only=True, ordered=True) for r in chunk]
+
+    base = results[0]
+    base_outputs = _outputs(base)
+    matrix = [[(perturbed - original) / delta for perturbed, original in zip(_outputs(result), base_outputs)]
+              for result, delta in zip(results[1:], deltas[1:])]
+    return SensitivityResults(base, list(names[1:]), OUTPUTS, matrix)
@@ -1,3 +1,4 @@
+import itertools
 import math
 
 
@@ -8,3 +9,27 @@ def round_up(value, decimal_places=0):
         return int(val)
     else:
         return val
+
+
+def chunked(iterable, chunk_size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def stable_repr(value):
+    if isinstance(value, dict):
+        return '{' + ', '.join('{}: {}'.format(stable_repr(k), stable_repr(v)) for k, v in sorted(value.items())) + '}'
+    if isinstance(value, (list, tuple)):
+        return '[' + ', '.join(stable_repr(v) for v in value) + ']'
+    return repr(value)
+
+
+def describe(component):
+    # the id alone is formatted with "%.0f", so it can't tell e.g. a 3.5% raise from a 4% raise;
+    # underscored attributes are bookkeeping (e.g. stats), not parameters
+    parameters = {k: v for k, v in vars(component).items() if not k.startswith('_')}
+    return '{}.{} {} {}'.format(type(component).__module__, type(component).__name__, component.id, stable_repr(parameters))
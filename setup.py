@@ -70,7 +70,7 @@ setup(
 
     keywords='loans payoff simulate debt college',
 
-    packages=find_packages(exclude=['examples', 'tests']),
+    packages=find_packages(exclude=['examples', 'tests', 'benchmarks']),
 
     include_package_data=True,
 
@@ -79,7 +79,15 @@ setup(
     tests_require=['pytest'],
     cmdclass={'test': PyTest},
 
+    entry_points={
+        'console_scripts': [
+            'loan-payoff-tools=loan_payoff_tools.cli:main',
+        ],
+    },
+
     extras_require = {
-        'png':  ["matplotlib"]
+        'png':  ["matplotlib"],
+        'npy':  ["numpy"],
+        'yaml': ["PyYAML"]
     }
 )
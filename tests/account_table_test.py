@@ -0,0 +1,95 @@
+'''
+loan_payoff_tools: Test module.
+
+Meant for use with py.test.
+Write each test as a function named test_<something>.
+Read more here: http://pytest.org/
+
+Copyright 2014, Phillip Green II
+Licensed under MIT
+'''
+
+import unittest
+from datetime import date
+
+from loan_payoff_tools.account_table import AccountTable
+from loan_payoff_tools.payment_manager import Account
+from loan_payoff_tools.money import Money
+
+
+class AccountTableTestCase(unittest.TestCase):
+
+    def test_append(self):
+        table = AccountTable()
+        table.append("Bank0", "00", "Joe", 100050, 0.03, 1000, date(2014, 5, 1))
+        table.append("Bank0", "01", "Joe", 750000, 0.05, 5000, date(2014, 5, 2))
+
+        self.assertEqual(len(table), 2)
+        self.assertEqual(list(table.initial_balance), [100050, 750000])
+        self.assertEqual(list(table.interest), [0.03, 0.05])
+        self.assertEqual(list(table.minimum_payment), [1000, 5000])
+        self.assertEqual(table.debtor_id, ["00", "01"])
+
+    def test_accounts(self):
+        table = AccountTable()
+        table.append("Bank0", "00", "Joe", 100050, 0.03, 1000, date(2014, 5, 1))
+
+        account = table.accounts()[0]
+        self.assertEqual((account.debtor, account.debtor_id, account.debtee), ("Bank0", "00", "Joe"))
+        self.assertEqual(account.initial_balance, Money(1000.50))
+        self.assertEqual(account.interest, 0.03)
+        self.assertEqual(account.minimum_payment, Money(10))
+        self.assertEqual(account.last_updated, date(2014, 5, 1))
+
+    def test_from_accounts(self):
+        accounts = [Account("Bank0", "00", "Joe", 1000.50, 0.03, 10.00, date(2014, 5, 1)),
+                    Account("Bank1", "00", "Sam", 9000, 0.06, 900.00, date(2014, 5, 1))]
+        table = AccountTable.from_accounts(accounts)
+
+        self.assertEqual(list(table.initial_balance), [100050, 900000])
+        self.assertEqual([str(a) for a in table.accounts()], ["Bank0:00", "Bank1:00"])
+
+
+    def test_share(self):
+        table = AccountTable()
+        table.append("Bank0", "00", "Joe", 100050, 0.03, 1000, date(2014, 5, 1))
+        table.append("Bank10", "", "Ann", 750000, 0.05, 5000, None)
+
+        shared = table.share()
+        copied = shared.to_table()
+
+        self.assertEqual(len(shared), 2)
+        self.assertEqual(shared.initial_balance[1], 750000)
+        for column in ('debtor', 'debtor_id', 'debtee', 'last_updated'):
+            self.assertEqual(getattr(copied, column), getattr(table, column))
+        for column in ('initial_balance', 'interest', 'minimum_payment'):
+            self.assertEqual(list(getattr(copied, column)), list(getattr(table, column)))
+
+    def test_share_non_ascii(self):
+        table = AccountTable()
+        table.append(u"Cr\xe9dit", "00", u"Jos\xe9", 100050, 0.03, 1000, None)
+        table.append("Bank0", u"01", "Ann", 750000, 0.05, 5000, None)
+
+        copied = table.share().to_table()
+
+        for column in ('debtor', 'debtor_id', 'debtee'):
+            self.assertEqual(getattr(copied, column), getattr(table, column))
+            self.assertEqual(map(type, getattr(copied, column)), map(type, getattr(table, column)))
+
+    def test_shared_account(self):
+        table = AccountTable()
+        table.append(u"Cr\xe9dit", "00", u"Jos\xe9", 100050, 0.03, 1000, date(2014, 5, 1))
+        table.append("Bank0", u"01", "Ann", 750000, 0.05, 5000, None)
+
+        shared = table.share()
+
+        for i in range(len(table)):
+            self.assertEqual(vars(shared.account(i)), vars(table.account(i)))
+            self.assertEqual(type(shared.account(i).debtor), type(table.debtor[i]))
+
+    def test_share_empty(self):
+        self.assertEqual(len(AccountTable().share().to_table()), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
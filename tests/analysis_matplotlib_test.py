@@ -23,6 +23,8 @@ from loan_payoff_tools.payment_manager import Account
 
 try:
     import matplotlib
+    import numpy
+    import loan_payoff_tools.plotting as plotting
     matplotlib_available = True
 except ImportError:
     matplotlib_available = False
@@ -58,5 +60,81 @@ class AnalysisMatplotlibTestCase(unittest.TestCase):
         analysis.dump_monthly_payments_to_png(output_file, monthly_payments)
         self.assertTrue(os.path.isfile(output_file))
 
+    def test_dump_many_monthly_payments_to_png(self):
+        mpd = max_payment_determiner.ConstantMaxPaymentDeterminer(800)
+        pm = payment_manager.EvenSplitPaymentManager()
+        results = [analysis.analyze(mpd, pm, pm, self.accounts, datetime.date(2014, 1, 1)),
+                   analysis.analyze(mpd, pm, pm, self.accounts[:3], datetime.date(2014, 1, 1))]
+
+        output_files = [os.path.join(self.temp_dir, 'test{}.png'.format(i)) for i in range(len(results))]
+        analysis.dump_many_monthly_payments_to_png(zip(output_files, [r.monthly_payments for r in results]),
+                                                   plotting.MonthlyPaymentsFigure(max_points=50))
+        for output_file in output_files:
+            self.assertTrue(os.path.isfile(output_file))
+
+    def test_render_results_to_png(self):
+        mpd = max_payment_determiner.ConstantMaxPaymentDeterminer(2000)
+        pms = [payment_manager.EvenSplitPaymentManager(), payment_manager.OptimalPaymentManager(), payment_manager.SmallestDebtPaymentManager()]
+        results = [analysis.analyze(mpd, pm, pm, self.accounts, datetime.date(2014, 1, 1)) for pm in pms]
+        output_files = [os.path.join(self.temp_dir, '{}.png'.format(r.payment_manager.id)) for r in results]
+
+        timings = analysis.render_results_to_png(zip(output_files, results), processes=2, chunk_size=2)
+
+        self.assertEqual([f for f, _ in timings], output_files)
+        for output_file, seconds in timings:
+            self.assertTrue(os.path.isfile(output_file))
+            self.assertGreater(seconds, 0)
+
+    def test_render_results_to_png_inline(self):
+        mpd = max_payment_determiner.ConstantMaxPaymentDeterminer(2000)
+        pm = payment_manager.EvenSplitPaymentManager()
+        result = analysis.analyze(mpd, pm, pm, self.accounts, datetime.date(2014, 1, 1))
+        output_file = os.path.join(self.temp_dir, 'inline.png')
+
+        timings = analysis.render_results_to_png([(output_file, result)], processes=1)
+
+        self.assertEqual([f for f, _ in timings], [output_file])
+        self.assertTrue(os.path.isfile(output_file))
+
+    def test_monthly_remaining_series(self):
+        account0 = Account("Bank1", "00", "Person2", 5000.00, 0.05, 50.00, datetime.date(2014, 10, 7))
+        account1 = Account("Bank1", "01", "Person2", 3000.00, 0.04, 40.00, datetime.date(2014, 10, 7))
+        monthly_payments = [
+            (datetime.date(2014, 10, 6), {account0: (Money(66.67), Money(4954.16)), account1: (Money(56.67), Money(2953.33))}),
+            (datetime.date(2014, 11, 6), {account0: (Money(66.67), Money(4908.13)), account1: (Money(2953.33), Money(0))}),
+            (datetime.date(2014, 12, 6), {account0: (Money(4908.13), Money(0))})
+            ]
+
+        dates, series = plotting.monthly_remaining_series(monthly_payments)
+
+        self.assertEqual(len(dates), 3)
+        self.assertEqual(list(series[account0]), [4954.16, 4908.13, 0.0])
+        self.assertEqual(list(series[account1]), [2953.33, 0.0])
+
+    def test_downsample_min_max(self):
+        x = numpy.arange(1000)
+        y = numpy.sin(x / 50.0)
+        y[123] = 5
+        y[777] = -5
+
+        sampled_x, sampled_y = plotting.downsample_min_max(x, y, 100)
+
+        self.assertLessEqual(len(sampled_x), 100)
+        self.assertEqual(sampled_x[0], 0)
+        self.assertEqual(sampled_x[-1], 999)
+        self.assertIn(123, sampled_x)
+        self.assertIn(777, sampled_x)
+        self.assertEqual(list(sampled_y), list(y[sampled_x]))
+        self.assertEqual(list(sampled_x), sorted(sampled_x))
+
+    def test_downsample_min_max_should_keep_short_series(self):
+        x = numpy.arange(10)
+        y = numpy.arange(10) * 2
+
+        sampled_x, sampled_y = plotting.downsample_min_max(x, y, 100)
+
+        self.assertEqual(list(sampled_x), list(x))
+        self.assertEqual(list(sampled_y), list(y))
+
 if __name__ == '__main__':
     unittest.main()
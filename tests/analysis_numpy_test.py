@@ -0,0 +1,115 @@
+'''
+loan_payoff_tools: Test module.
+
+Meant for use with py.test.
+Write each test as a function named test_<something>.
+Read more here: http://pytest.org/
+
+Copyright 2014, Phillip Green II
+Licensed under MIT
+'''
+
+import unittest
+import os.path
+import tempfile
+import shutil
+import datetime
+
+import loan_payoff_tools.analysis as analysis
+import loan_payoff_tools.max_payment_determiner as max_payment_determiner
+import loan_payoff_tools.payment_manager as payment_manager
+
+try:
+    import numpy
+    numpy_available = True
+except ImportError:
+    numpy_available = False
+    pass
+
+
+@unittest.skipUnless(numpy_available, "numpy not available")
+class AnalysisNumpyTestCase(unittest.TestCase):
+    def setUp(self):
+        self.accounts = analysis.load_accounts(os.path.join('tests', 'data', 'test-accounts.csv'))
+        self.temp_dir = tempfile.mkdtemp('analysis-test')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_dump_results_to_npy(self):
+        starting_date = datetime.date(2014, 10, 1)
+        mpd = max_payment_determiner.ConstantMaxPaymentDeterminer(2000, 50)
+        results = [analysis.analyze(mpd, payment_manager.BiggestDebtPaymentManager(), payment_manager.EvenSplitPaymentManager(), self.accounts, starting_date),
+                   analysis.analyze(mpd, payment_manager.OptimalPaymentManager(), payment_manager.OptimalPaymentManager(), self.accounts, starting_date)]
+
+        output_dir = os.path.join(self.temp_dir, 'results')
+        analysis.dump_results_to_npy(output_dir, results, self.accounts)
+        loaded = analysis.load_results_from_npy(output_dir)
+
+        self.assertIsInstance(loaded.paid, numpy.memmap)
+        self.assertEqual(loaded.paid.shape, (2, 75, 6))
+        self.assertEqual(loaded.remaining.shape, (2, 75, 6))
+        self.assertEqual(list(loaded.accounts['debtor']), [a.debtor for a in self.accounts])
+        self.assertEqual(list(loaded.accounts['initial_balance']), [a.initial_balance.cents for a in self.accounts])
+        self.assertEqual(loaded.accounts['last_updated'][0], numpy.datetime64('2014-09-07'))
+        self.assertEqual(list(loaded.scenarios['payment_manager']), ['biggest_debt', 'optimal'])
+        self.assertEqual(list(loaded.scenarios['months']), [75, 74])
+        self.assertEqual(list(loaded.scenarios['interest_paid']), [r.interest_paid.cents for r in results])
+
+        for s, result in enumerate(results):
+            self.assertEqual(loaded.paid[s].sum(), result.total_paid.cents)
+            self.assertEqual(loaded.dates[s, 0], numpy.datetime64('2014-10-01'))
+            last_date, last_payments = result.monthly_payments[-1]
+            self.assertEqual(loaded.dates[s, result.months - 1], numpy.datetime64(last_date))
+            for a, account in enumerate(self.accounts):
+                if account in last_payments:
+                    self.assertEqual(loaded.paid[s, result.months - 1, a], last_payments[account][0].cents)
+        self.assertTrue(numpy.isnat(loaded.dates[1, 74]))
+
+    def test_dump_results_to_npy_with_summary_only_results(self):
+        results = list(analysis.grid_search([max_payment_determiner.ConstantMaxPaymentDeterminer], [2000, 2500], [payment_manager.OptimalPaymentManager()],
+                                            [payment_manager.OptimalPaymentManager()], self.accounts, processes=1))[-1]
+
+        output_dir = os.path.join(self.temp_dir, 'results')
+        analysis.dump_results_to_npy(output_dir, results, self.accounts)
+        loaded = analysis.load_results_from_npy(output_dir)
+
+        self.assertEqual(loaded.paid.shape, (2, 0, 6))
+        self.assertEqual(list(loaded.scenarios['total_paid']), [r.total_paid.cents for r in results])
+
+    def test_dump_results_to_npy_should_round_trip_non_ascii_names(self):
+        starting_date = datetime.date(2014, 10, 1)
+        mpd = max_payment_determiner.ConstantMaxPaymentDeterminer(2000, 50)
+        # as unicode, or as the UTF-8 bytes a csv file gives
+        accounts = [payment_manager.Account(u"Cr\xe9dit", "00", u"Jos\xe9", 5000, 0.05, 50, starting_date),
+                    payment_manager.Account(u"Bank\u00f8".encode('utf-8'), "01", "Person2", 1000, 0.03, 50, starting_date)]
+        result = analysis.analyze(mpd, payment_manager.OptimalPaymentManager(), payment_manager.OptimalPaymentManager(), accounts, starting_date)
+
+        output_dir = os.path.join(self.temp_dir, 'results')
+        analysis.dump_results_to_npy(output_dir, [result], accounts)
+        loaded = analysis.load_results_from_npy(output_dir)
+
+        self.assertEqual(list(loaded.accounts['debtor']), [u"Cr\xe9dit", u"Bank\u00f8"])
+        self.assertEqual(list(loaded.accounts['debtee']), [u"Jos\xe9", u"Person2"])
+        self.assertEqual(loaded.paid.shape, (1, result.months, 2))
+
+    def test_dump_results_to_npy_should_match_accounts_by_key(self):
+        starting_date = datetime.date(2014, 10, 1)
+        mpd = max_payment_determiner.ConstantMaxPaymentDeterminer(2000, 50)
+        # the same debtor and debtor_id for different debtees, which str(account) can't tell apart
+        accounts = [payment_manager.Account("Bank0", "00", "Person1", 5000, 0.05, 50, starting_date),
+                    payment_manager.Account("Bank0", "00", "Person2", 1000, 0.03, 50, starting_date)]
+        result = analysis.analyze(mpd, payment_manager.OptimalPaymentManager(), payment_manager.OptimalPaymentManager(), accounts, starting_date)
+
+        output_dir = os.path.join(self.temp_dir, 'results')
+        analysis.dump_results_to_npy(output_dir, [result], accounts)
+        loaded = analysis.load_results_from_npy(output_dir)
+
+        first_date, first_payments = result.monthly_payments[0]
+        self.assertEqual(list(loaded.paid[0, 0]), [first_payments[a][0].cents for a in accounts])
+        with self.assertRaises(ValueError):
+            analysis.dump_results_to_npy(output_dir, [result], accounts + accounts[:1])
+
+
+if __name__ == '__main__':
+    unittest.main()
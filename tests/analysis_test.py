@@ -14,10 +14,15 @@ import os.path
 import tempfile
 import shutil
 import datetime
+import collections
+import operator
+import functools
+import StringIO
 
 import loan_payoff_tools.analysis as analysis
 import loan_payoff_tools.max_payment_determiner as max_payment_determiner
 import loan_payoff_tools.payment_manager as payment_manager
+import loan_payoff_tools.payoff_calculator as payoff_calculator
 from loan_payoff_tools.money import Money
 from loan_payoff_tools.payment_manager import Account
 
@@ -29,6 +34,63 @@ class AnalysisTestCase(unittest.TestCase):
     def tearDown(self):
         shutil.rmtree(self.temp_dir)
 
+    def test_load_accounts(self):
+        self.assertEqual(len(self.accounts), 6)
+        account = self.accounts[1]
+        self.assertEqual((account.debtor, account.debtor_id, account.debtee), ("Bank1", "00", "Person2"))
+        self.assertEqual(account.initial_balance, Money(5000))
+        self.assertEqual(account.interest, 0.05)
+        self.assertEqual(account.minimum_payment, Money(50))
+        self.assertEqual(account.last_updated, datetime.date(2014, 10, 7))
+
+    def test_iter_account_chunks(self):
+        chunks = list(analysis.iter_account_chunks(os.path.join('tests', 'data', 'test-accounts.csv'), chunk_size=4))
+        self.assertEqual(map(len, chunks), [4, 2])
+        self.assertEqual([str(a) for chunk in chunks for a in chunk], [str(a) for a in self.accounts])
+
+    def test_load_account_table(self):
+        table = analysis.load_account_table(os.path.join('tests', 'data', 'test-accounts.csv'), chunk_size=4)
+        self.assertEqual(len(table), 6)
+        self.assertEqual(list(table.initial_balance), [5000000, 500000, 300000, 700000, 5500000, 1300000])
+        self.assertEqual(list(table.minimum_payment), [25000, 5000, 4000, 10000, 22500, 18000])
+        self.assertEqual(list(table.interest), [0.0425, 0.05, 0.04, 0.03, 0.04, 0.07])
+        self.assertEqual(table.last_updated[0], datetime.date(2014, 9, 7))
+
+    def test_load_accounts_with_missing_column(self):
+        file_name = os.path.join(self.temp_dir, 'accounts.csv')
+        with open(file_name, 'wb') as f:
+            f.write('debtor,debtor_id,debtee,initial_balance,interest,last_updated\n')
+        self.assertRaises(ValueError, analysis.load_accounts, file_name)
+
+    def test_load_accounts_with_short_row(self):
+        file_name = os.path.join(self.temp_dir, 'accounts.csv')
+        with open(file_name, 'wb') as f:
+            f.write('debtor,debtor_id,debtee,initial_balance,interest,minimum_payment,last_updated\n')
+            f.write('Bank0,00,Person1,50000.00,0.0425,250.00,2014-9-7\n')
+            f.write('Bank0,01,Person1,50000.00,0.0425,250.00\n')
+        self.assertRaises(ValueError, analysis.load_accounts, file_name)
+
+    def test_load_accounts_should_skip_blank_lines(self):
+        file_name = os.path.join(self.temp_dir, 'accounts.csv')
+        with open(file_name, 'wb') as f:
+            f.write('debtor,debtor_id,debtee,initial_balance,interest,minimum_payment,last_updated\n')
+            f.write('Bank0,00,Person1,50000.00,0.0425,250.00,2014-9-7\n')
+            f.write('\n')
+            f.write('Bank0,01,Person1,40000.00,0.0425,250.00,2014-9-7\n')
+            f.write('Bank0,02,Person1,30000.00,0.0425\n')
+            f.write('\n')
+        with self.assertRaisesRegexp(ValueError, 'line 5 does'):
+            analysis.load_accounts(file_name)
+
+        with open(file_name, 'wb') as f:
+            f.write('debtor,debtor_id,debtee,initial_balance,interest,minimum_payment,last_updated\n')
+            f.write('Bank0,00,Person1,50000.00,0.0425,250.00,2014-9-7\n')
+            f.write('\n')
+            f.write('Bank0,01,Person1,40000.00,0.0425,250.00,2014-9-7\n')
+            f.write('\n')
+        self.assertEqual([str(a) for a in analysis.load_accounts(file_name)], ['Bank0:00', 'Bank0:01'])
+        self.assertEqual(len(analysis.load_account_table(file_name, chunk_size=2)), 2)
+
     def test_analyze(self):
         mpd = max_payment_determiner.ConstantMaxPaymentDeterminer(2000, 50)
         pm = payment_manager.BiggestDebtPaymentManager()
@@ -44,6 +106,182 @@ class AnalysisTestCase(unittest.TestCase):
         self.assertEqual(to_interest, Money(19349.04))
         self.assertIsNotNone(monthly_payments)
 
+    def test_analyze_optimal_should_pay_least_interest(self):
+        mpd = max_payment_determiner.ConstantMaxPaymentDeterminer(2000, 50)
+        heuristic_payment_managers = [payment_manager.PayMostInterestPaymentPaymentManager(),
+                                      payment_manager.PayLeastInterestPaymentPaymentManager(),
+                                      payment_manager.SmallestDebtPaymentManager(),
+                                      payment_manager.BiggestDebtPaymentManager(),
+                                      payment_manager.WeightedSplitPaymentManager(),
+                                      payment_manager.EvenSplitPaymentManager()]
+        opm = payment_manager.OptimalPaymentManager()
+
+        optimal = analysis.analyze(mpd, opm, opm, self.accounts)
+        self.assertEqual(optimal.interest_paid, Money(17481.43))
+        for pm in heuristic_payment_managers:
+            heuristic = analysis.analyze(mpd, pm, pm, self.accounts)
+            self.assertLessEqual(optimal.interest_paid, heuristic.interest_paid)
+            self.assertLessEqual(optimal.months, heuristic.months)
+
+    def test_pareto_frontier(self):
+        Result = collections.namedtuple('Result', ['name', 'months', 'interest_paid'])
+        a = Result('a', 10, Money(500))
+        b = Result('b', 12, Money(400))
+        c = Result('c', 12, Money(450))
+        d = Result('d', 9, Money(600))
+        e = Result('e', 10, Money(500))
+
+        self.assertEqual(analysis.pareto_frontier([a, b, c, d, e]), [d, a, e, b])
+
+    def test_search_pareto_frontier_should_match_exhaustive_search(self):
+        simulated_amounts = []
+
+        def max_payment_determiner_factory(amount):
+            simulated_amounts.append(amount)
+            return max_payment_determiner.ConstantMaxPaymentDeterminer(amount)
+        amounts = [Money(1000 + 100*i) for i in range(21)]
+        pms = [payment_manager.OptimalPaymentManager(), payment_manager.SmallestDebtPaymentManager(), payment_manager.EvenSplitPaymentManager()]
+        bpms = [payment_manager.EvenSplitPaymentManager(), payment_manager.EvenSplitPaymentManager()]
+        objectives = (lambda r: r.max_payment_determiner.max_payment, operator.attrgetter('interest_paid'))
+
+        frontier = analysis.search_pareto_frontier(max_payment_determiner_factory, amounts, pms, bpms, self.accounts, objectives)
+
+        self.assertLess(len(simulated_amounts), len(amounts) * len(pms))
+        exhaustive = [analysis.analyze(max_payment_determiner.ConstantMaxPaymentDeterminer(a), pm, bpms[0], self.accounts)
+                      for a in amounts for pm in pms]
+        expected_frontier = analysis.pareto_frontier(exhaustive, objectives)
+        self.assertEqual([(r.max_payment_determiner.id, r.payment_manager.id, r.months, r.interest_paid) for r in frontier],
+                         [(r.max_payment_determiner.id, r.payment_manager.id, r.months, r.interest_paid) for r in expected_frontier])
+
+    def test_search_pareto_frontier_should_trade_amount_off_by_default(self):
+        amounts = [Money(1000 + 250*i) for i in range(9)]
+        pms = [payment_manager.OptimalPaymentManager(), payment_manager.SmallestDebtPaymentManager()]
+        bpms = [payment_manager.EvenSplitPaymentManager()]
+
+        frontier = analysis.search_pareto_frontier(max_payment_determiner.ConstantMaxPaymentDeterminer, amounts, pms, bpms, self.accounts)
+
+        exhaustive = [analysis.analyze(max_payment_determiner.ConstantMaxPaymentDeterminer(a), pm, bpms[0], self.accounts)
+                      for a in amounts for pm in pms]
+        objectives = (lambda r: r.max_payment_determiner.max_payment,) + analysis.DEFAULT_OBJECTIVES
+        expected_frontier = analysis.pareto_frontier(exhaustive, objectives)
+        self.assertEqual([(r.max_payment_determiner.id, r.payment_manager.id) for r in frontier],
+                         [(r.max_payment_determiner.id, r.payment_manager.id) for r in expected_frontier])
+        self.assertEqual(len(set(r.max_payment_determiner.id for r in frontier)), len(amounts))
+
+    def test_analyze_all(self):
+        mpd = max_payment_determiner.ConstantMaxPaymentDeterminer(2000, 50)
+        scenarios = [analysis.Scenario(mpd, payment_manager.BiggestDebtPaymentManager(), payment_manager.EvenSplitPaymentManager(), self.accounts),
+                     analysis.Scenario(mpd, payment_manager.OptimalPaymentManager(), payment_manager.OptimalPaymentManager(), self.accounts)]
+
+        results = [r for chunk in analysis.analyze_all(scenarios, processes=1, chunk_size=1) for r in chunk]
+
+        self.assertEqual([(r.payment_manager.id, r.months, r.interest_paid) for r in results],
+                         [('biggest_debt', 75, Money(19349.04)), ('optimal', 74, Money(17481.43))])
+        self.assertIsNotNone(results[0].monthly_payments)
+
+    def test_analyze_all_for_accounts(self):
+        mpd = max_payment_determiner.ConstantMaxPaymentDeterminer(2000, 50)
+        starting_date = datetime.date(2014, 10, 1)
+        parameters = [(mpd, payment_manager.BiggestDebtPaymentManager(), payment_manager.EvenSplitPaymentManager(), starting_date),
+                      (mpd, payment_manager.OptimalPaymentManager(), payment_manager.OptimalPaymentManager(), starting_date)]
+
+        results = [r for chunk in analysis.analyze_all_for_accounts(self.accounts, parameters, processes=2, chunk_size=1, ordered=True) for r in chunk]
+
+        expected = analysis.analyze(mpd, payment_manager.OptimalPaymentManager(), payment_manager.OptimalPaymentManager(), self.accounts, starting_date)
+        self.assertEqual([(r.payment_manager.id, r.months, r.interest_paid) for r in results],
+                         [('biggest_debt', 75, Money(19349.04)), ('optimal', 74, Money(17481.43))])
+        # monthly payments come back keyed by the caller's accounts
+        self.assertEqual(results[1].monthly_payments, expected.monthly_payments)
+
+    def test_analyze_all_should_merge_worker_instrumentation(self):
+        mpd = max_payment_determiner.ConstantMaxPaymentDeterminer(2000, 50)
+        starting_date = datetime.date(2014, 10, 1)
+        parameters = [(mpd, payment_manager.BiggestDebtPaymentManager(), payment_manager.EvenSplitPaymentManager(), starting_date),
+                      (mpd, payment_manager.OptimalPaymentManager(), payment_manager.OptimalPaymentManager(), starting_date)]
+
+        for processes in (1, 2):
+            instrumentation = payoff_calculator.PayoffInstrumentation()
+            results = [r for chunk in analysis.analyze_all_for_accounts(self.accounts, parameters, processes=processes, chunk_size=1,
+                                                                        summary_only=True, instrumentation=instrumentation) for r in chunk]
+
+            calls = {name: totals['calls'] for name, totals in instrumentation.as_dict()['payment_managers'].items()}
+            self.assertEqual(calls, {'biggest_debt': 75, 'even_split': 75, 'optimal': 2 * 74})
+            self.assertEqual(instrumentation.as_dict()['phases']['interest']['calls'], sum(r.months for r in results))
+
+    def test_analyze_all_should_attribute_interest_of_summary_only_results(self):
+        mpd = max_payment_determiner.ConstantMaxPaymentDeterminer(2000, 50)
+        starting_date = datetime.date(2014, 10, 1)
+        pms = [payment_manager.BiggestDebtPaymentManager(), payment_manager.OptimalPaymentManager()]
+        scenarios = [analysis.Scenario(mpd, pm, payment_manager.EvenSplitPaymentManager(), self.accounts, starting_date) for pm in pms]
+        expected = [analysis.analyze(*s) for s in scenarios]
+
+        analyzed = [d for chunk in analysis.analyze_all(scenarios, processes=1, summary_only=True, attribute_interest=True) for d in chunk]
+        pooled_scenarios = [d for chunk in analysis.analyze_all(scenarios, processes=2, chunk_size=1, summary_only=True, ordered=True, attribute_interest=True)
+                            for d in chunk]
+        pooled = [d for chunk in analysis.analyze_all_for_accounts(self.accounts, [(s.max_payment_determiner, s.payment_manager, s.bonus_payment_manager, starting_date)
+                                                                                   for s in scenarios],
+                                                                   processes=2, chunk_size=1, summary_only=True, ordered=True, attribute_interest=True)
+                  for d in chunk]
+
+        for details in (analyzed, pooled_scenarios, pooled):
+            self.assertEqual([(d.result.payment_manager.id, d.result.months, d.result.interest_paid, d.result.monthly_payments) for d in details],
+                             [(r.payment_manager.id, r.months, r.interest_paid, None) for r in expected])
+            self.assertEqual([d.milestones for d in details], [None, None])
+            for d, result in zip(details, expected):
+                by_account = d.interest_attribution.by_account()
+                # keyed by the caller's accounts, even when attributed by a worker
+                self.assertEqual(by_account.keys(), self.accounts)
+                for account in self.accounts:
+                    paid = sum([payments[account][0] for _, payments in result.monthly_payments if account in payments], Money(0))
+                    self.assertEqual(by_account[account], paid - account.initial_balance)
+                self.assertEqual(sum(d.interest_attribution.by_debtor().values(), Money(0)), result.interest_paid)
+
+    def test_grid_search(self):
+        factories = [max_payment_determiner.ConstantMaxPaymentDeterminer,
+                     functools.partial(max_payment_determiner.ConstantMaxPaymentDeterminer, bonus=0)]
+        amounts = [Money(1500), Money(2000), Money(2500)]
+        pms = [payment_manager.OptimalPaymentManager(), payment_manager.EvenSplitPaymentManager()]
+        bpms = [payment_manager.EvenSplitPaymentManager(), payment_manager.EvenSplitPaymentManager()]
+
+        inline_results = list(analysis.grid_search(factories, amounts, pms, bpms, self.accounts, processes=1, chunk_size=4))[-1]
+        pooled_results = list(analysis.grid_search(factories, amounts, pms, bpms, self.accounts, processes=2, chunk_size=4))[-1]
+
+        expected = sorted([analysis.analyze(max_payment_determiner.ConstantMaxPaymentDeterminer(a), pm, bpms[0], self.accounts)
+                           for a in amounts for pm in pms], key=analysis.default_rank_key)
+        self.assertEqual([(r.max_payment_determiner.id, r.payment_manager.id, r.months, r.interest_paid) for r in sorted(inline_results, key=analysis.default_rank_key)],
+                         [(r.max_payment_determiner.id, r.payment_manager.id, r.months, r.interest_paid) for r in expected])
+        self.assertEqual(sorted((r.max_payment_determiner.id, r.payment_manager.id, r.interest_paid) for r in pooled_results),
+                         sorted((r.max_payment_determiner.id, r.payment_manager.id, r.interest_paid) for r in inline_results))
+        self.assertTrue(all(r.monthly_payments is None for r in pooled_results))
+        self.assertEqual(inline_results, sorted(inline_results, key=analysis.default_rank_key))
+
+    def test_grid_search_should_rank_across_chunks(self):
+        amounts = [Money(2500), Money(1500), Money(2000)]
+        pms = [payment_manager.EvenSplitPaymentManager(), payment_manager.OptimalPaymentManager()]
+        bpms = [payment_manager.EvenSplitPaymentManager()]
+
+        for processes in (1, 2):
+            rankings = list(analysis.grid_search([max_payment_determiner.ConstantMaxPaymentDeterminer], amounts, pms, bpms, self.accounts,
+                                                 processes=processes, chunk_size=1))
+            # a ranking comes back as each chunk completes
+            self.assertEqual([len(r) for r in rankings], [1, 2, 3, 4, 5, 6])
+            results = rankings[-1]
+            self.assertEqual([analysis.default_rank_key(r) for r in results], sorted(analysis.default_rank_key(r) for r in results))
+
+    def test_grid_search_should_keep_the_top_results(self):
+        amounts = [Money(2500), Money(1500), Money(2000)]
+        pms = [payment_manager.EvenSplitPaymentManager(), payment_manager.OptimalPaymentManager()]
+        bpms = [payment_manager.EvenSplitPaymentManager()]
+        everything = list(analysis.grid_search([max_payment_determiner.ConstantMaxPaymentDeterminer], amounts, pms, bpms, self.accounts,
+                                               processes=1, chunk_size=2))[-1]
+
+        rankings = list(analysis.grid_search([max_payment_determiner.ConstantMaxPaymentDeterminer], amounts, pms, bpms, self.accounts,
+                                             processes=1, chunk_size=2, top=2))
+
+        self.assertEqual([len(r) for r in rankings], [2, 2, 2])
+        self.assertEqual([(r.max_payment_determiner.id, r.payment_manager.id) for r in rankings[-1]],
+                         [(r.max_payment_determiner.id, r.payment_manager.id) for r in everything[:2]])
+
     def test_dump_monthly_payments_to_csv(self):
         account0 = Account("Bank1", "00", "Person2", 5000.00, 0.05, 50.00, datetime.date(2014, 10, 7))
         account1 = Account("Bank1", "01", "Person2", 3000.00, 0.04, 40.00, datetime.date(2014, 10, 7))
@@ -65,5 +303,34 @@ class AnalysisTestCase(unittest.TestCase):
         self.assertTrue(os.path.isfile(output_file))
         self.assertEqual(open(output_file).readlines(), open(os.path.join('tests', 'data', 'expected-test-results-dump.csv')).readlines())
 
+    def test_monthly_payments_csv_writer_should_stream_from_calculate_payoff(self):
+        mpd = max_payment_determiner.ConstantMaxPaymentDeterminer(2000, 50)
+        pm = payment_manager.EvenSplitPaymentManager()
+        starting_date = datetime.date(2014, 10, 1)
+        (_, months, monthly_payments) = payoff_calculator.calculate_payoff(mpd, pm, pm, self.accounts, starting_date)
+        expected_file = os.path.join(self.temp_dir, 'expected.csv')
+        analysis.dump_monthly_payments_to_csv(expected_file, monthly_payments)
+
+        output = StringIO.StringIO()
+        with analysis.MonthlyPaymentsCsvWriter(output, self.accounts, buffer_rows=7) as writer:
+            (_, streamed_months, _) = payoff_calculator.calculate_payoff(mpd, pm, pm, self.accounts, starting_date, monthly_payments=writer)
+
+        self.assertEqual(streamed_months, months)
+        self.assertEqual(output.getvalue(), open(expected_file, 'rb').read())
+
+    def test_monthly_payments_csv_writer_should_buffer_rows(self):
+        account0 = Account("Bank1", "00", "Person2", 5000.00, 0.05, 50.00, datetime.date(2014, 10, 7))
+        output = StringIO.StringIO()
+        writer = analysis.MonthlyPaymentsCsvWriter(output, [account0], buffer_rows=2)
+        header = output.getvalue()
+
+        writer.append((datetime.date(2014, 10, 6), {account0: (Money(66.67), Money(4954.16))}))
+        self.assertEqual(output.getvalue(), header)
+        writer.append((datetime.date(2014, 11, 6), {account0: (Money(66.67), Money(4908.13))}))
+        self.assertEqual(output.getvalue(), header +
+                         '2014-10-06,$66.67,$4954.16,$66.67,$4954.16\r\n' +
+                         '2014-11-06,$66.67,$4908.13,$66.67,$4908.13\r\n')
+
+
 if __name__ == '__main__':
     unittest.main()
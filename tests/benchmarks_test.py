@@ -0,0 +1,128 @@
+'''
+loan_payoff_tools: Test module.
+
+Meant for use with py.test.
+Write each test as a function named test_<something>.
+Read more here: http://pytest.org/
+
+Copyright 2014, Phillip Green II
+Licensed under MIT
+'''
+
+import unittest
+import os.path
+import tempfile
+import shutil
+import json
+import sys
+from StringIO import StringIO
+
+from benchmarks import compare
+from benchmarks import suite
+
+
+class SuiteTestCase(unittest.TestCase):
+
+    def test_run(self):
+        benchmarks = [suite.Benchmark('make_ranked_payments', 3, suite._make_ranked_payments),
+                      suite.Benchmark('calculate_payoff', 10, suite._calculate_payoff)]
+        results = suite.run(benchmarks, repeats=3, min_time=0.001)
+
+        self.assertEqual([(r['name'], r['parameter']) for r in results], [('make_ranked_payments', 3), ('calculate_payoff', 10)])
+        for result in results:
+            self.assertEqual(len(result['samples']), 3)
+            self.assertEqual(result['median'], sorted(result['samples'])[1])
+            self.assertGreater(result['number'], 0)
+
+    def test_payment_for_horizon(self):
+        # the horizon benchmarks share accounts, so their workload only differs by the months to pay them off
+        for years in suite.HORIZON_YEARS:
+            self.assertAlmostEqual(suite._calculate_payoff(years)()[1], 12 * years, delta=1)
+
+    def test_money_construct_should_use_varied_inputs(self):
+        amounts = suite._money_construct(100)()
+        self.assertEqual(len(amounts), 100)
+        self.assertGreater(len(set(a.cents for a in amounts)), 90)
+        self.assertEqual(suite._money_construct(100)(), amounts)
+
+    def test_scaling_curves(self):
+        results = [{'name': 'linear', 'parameter': n, 'median': 0.5 * n} for n in (3, 30, 300)]
+        results += [{'name': 'quadratic', 'parameter': n, 'median': 0.5 * n * n} for n in (3, 30, 300)]
+        results += [{'name': 'single', 'parameter': 3, 'median': 1.0}]
+        curves = suite.scaling_curves(results)
+
+        self.assertEqual(curves.keys(), ['linear', 'quadratic', 'single'])
+        self.assertEqual(curves['linear']['parameters'], [3, 30, 300])
+        self.assertAlmostEqual(curves['linear']['exponent'], 1.0)
+        self.assertAlmostEqual(curves['quadratic']['exponent'], 2.0)
+        self.assertIsNone(curves['single']['exponent'])
+
+    def test_select(self):
+        benchmarks = suite.default_benchmarks()
+        self.assertEqual(set(b.name for b in suite.select(benchmarks, ['money'])),
+                         {'money.construct', 'money.add', 'money.multiply', 'money.compare'})
+        self.assertEqual(suite.select(benchmarks, []), benchmarks)
+
+
+class CompareTestCase(unittest.TestCase):
+    def setUp(self):
+        self.baseline = {'results': [{'name': 'calculate_payoff', 'parameter': 10, 'median': 1.0, 'samples': [0.98, 1.0, 1.01, 1.02, 0.99]},
+                                     {'name': 'money.add', 'parameter': 3, 'median': 1.0, 'samples': [0.8, 1.0, 1.3, 0.9, 1.1]}]}
+
+    def _current(self, calculate_payoff_samples, money_add_samples):
+        return {'results': [{'name': 'calculate_payoff', 'parameter': 10, 'samples': calculate_payoff_samples},
+                            {'name': 'money.add', 'parameter': 3, 'samples': money_add_samples}]}
+
+    def test_compare_should_flag_only_significant_regressions(self):
+        comparisons = compare.compare(self.baseline, self._current([1.3, 1.31, 1.29, 1.3, 1.32], [1.0, 1.4, 0.9, 1.2, 0.8]), threshold=0.1)
+
+        self.assertEqual([c.key for c in comparisons], ['calculate_payoff[10]', 'money.add[3]'])
+        self.assertTrue(comparisons[0].regressed)
+        self.assertAlmostEqual(comparisons[0].ratio, 1.3)
+        self.assertGreater(comparisons[0].low, 1.1)
+        # slower on median but within the noise
+        self.assertFalse(comparisons[1].regressed)
+        self.assertLess(comparisons[1].low, 1.1)
+
+    def test_compare_should_use_configured_thresholds(self):
+        self.baseline['thresholds'] = {'calculate_payoff': 0.5}
+        comparisons = compare.compare(self.baseline, self._current([1.3, 1.31, 1.29, 1.3, 1.32], [1.0] * 5), threshold=0.1)
+        self.assertEqual([c.regressed for c in comparisons], [False, False])
+        self.assertEqual(comparisons[0].threshold, 0.5)
+
+    def test_compare_should_report_missing_benchmarks(self):
+        current = {'results': [{'name': 'money.add', 'parameter': 3, 'samples': [1.0] * 5}]}
+        comparisons = compare.compare(self.baseline, current)
+
+        self.assertEqual([(c.key, c.missing, c.regressed) for c in comparisons], [('calculate_payoff[10]', True, True), ('money.add[3]', False, False)])
+        self.assertIsNone(comparisons[0].current)
+
+    def test_main_should_fail_naming_regressions(self):
+        temp_dir = tempfile.mkdtemp('compare-test')
+        stdout = sys.stdout
+        try:
+            baseline_file = os.path.join(temp_dir, 'baseline.json')
+            current_file = os.path.join(temp_dir, 'current.json')
+            with open(baseline_file, 'wb') as f:
+                json.dump(self.baseline, f)
+            with open(current_file, 'wb') as f:
+                json.dump(self._current([1.3, 1.31, 1.29, 1.3, 1.32], [1.0] * 5), f)
+            sys.stdout = StringIO()
+            self.assertEqual(compare.main(['check', '-b', baseline_file, '-c', current_file]), 1)
+            self.assertIn('Regressed: calculate_payoff[10]\n', sys.stdout.getvalue())
+
+            with open(current_file, 'wb') as f:
+                json.dump(self._current([1.0] * 5, [1.0] * 5), f)
+            self.assertEqual(compare.main(['check', '-b', baseline_file, '-c', current_file]), 0)
+
+            with open(current_file, 'wb') as f:
+                json.dump({'results': [{'name': 'money.add', 'parameter': 3, 'samples': [1.0] * 5}]}, f)
+            self.assertEqual(compare.main(['check', '-b', baseline_file, '-c', current_file]), 1)
+            self.assertIn('Missing: calculate_payoff[10]\n', sys.stdout.getvalue())
+        finally:
+            sys.stdout = stdout
+            shutil.rmtree(temp_dir)
+
+
+if __name__ == '__main__':
+    unittest.main()
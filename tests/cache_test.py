@@ -0,0 +1,149 @@
+'''
+loan_payoff_tools: Test module.
+
+Meant for use with py.test.
+Write each test as a function named test_<something>.
+Read more here: http://pytest.org/
+
+Copyright 2014, Phillip Green II
+Licensed under MIT
+'''
+
+import unittest
+import os.path
+import tempfile
+import shutil
+from datetime import date
+
+import loan_payoff_tools.analysis as analysis
+from loan_payoff_tools.cache import ResultCache
+from loan_payoff_tools.cache import cache_key
+from loan_payoff_tools.payment_manager import Account
+from loan_payoff_tools.payment_manager import EvenSplitPaymentManager
+from loan_payoff_tools.payment_manager import SpecifiedSplitPaymentManager
+from loan_payoff_tools.max_payment_determiner import ConstantMaxPaymentDeterminer
+from loan_payoff_tools.max_payment_determiner import AnnualRaiseMaxPaymentDeterminer
+from loan_payoff_tools.money import Money
+from loan_payoff_tools.payoff_calculator import InterestAttribution
+
+
+class CacheKeyTestCase(unittest.TestCase):
+    def setUp(self):
+        self.accounts = [Account("Bank0", "00", "Joe", 1000, 0.03, 100.00, date(2014, 5, 1)),
+                         Account("Bank0", "01", "Joe", 7500, 0.05, 50.00, date(2014, 5, 1))]
+        self.mpd = ConstantMaxPaymentDeterminer(1000)
+        self.pm = EvenSplitPaymentManager()
+        self.starting_date = date(2014, 6, 1)
+
+    def test_cache_key_should_be_stable(self):
+        equivalent_accounts = [Account("Bank0", "00", "Joe", 1000, 0.03, 100.00, date(2014, 5, 1)),
+                               Account("Bank0", "01", "Joe", 7500, 0.05, 50.00, date(2014, 5, 1))]
+        self.assertEqual(cache_key(self.mpd, self.pm, self.pm, self.accounts, self.starting_date),
+                         cache_key(ConstantMaxPaymentDeterminer(1000), EvenSplitPaymentManager(), EvenSplitPaymentManager(), equivalent_accounts, self.starting_date))
+        self.assertEqual(cache_key(self.mpd, SpecifiedSplitPaymentManager({'a': 0.5, 'b': 0.5}), self.pm, self.accounts, self.starting_date),
+                         cache_key(self.mpd, SpecifiedSplitPaymentManager({'b': 0.5, 'a': 0.5}), self.pm, self.accounts, self.starting_date))
+
+    def test_cache_key_should_change_with_inputs(self):
+        key = cache_key(self.mpd, self.pm, self.pm, self.accounts, self.starting_date)
+        changed_accounts = [self.accounts[0], Account("Bank0", "01", "Joe", 7500, 0.051, 50.00, date(2014, 5, 1))]
+        self.assertNotEqual(key, cache_key(self.mpd, self.pm, self.pm, changed_accounts, self.starting_date))
+        self.assertNotEqual(key, cache_key(self.mpd, self.pm, self.pm, self.accounts, date(2014, 7, 1)))
+        self.assertNotEqual(key, cache_key(ConstantMaxPaymentDeterminer(1000, 1), self.pm, self.pm, self.accounts, self.starting_date))
+
+    def test_cache_key_should_not_rely_on_id_only(self):
+        mpd0 = AnnualRaiseMaxPaymentDeterminer(50000, 0.035, date(2014, 1, 1), 1000)
+        mpd1 = AnnualRaiseMaxPaymentDeterminer(50000, 0.04, date(2014, 1, 1), 1000)
+        self.assertEqual(mpd0.id, mpd1.id)
+        self.assertNotEqual(cache_key(mpd0, self.pm, self.pm, self.accounts, self.starting_date),
+                            cache_key(mpd1, self.pm, self.pm, self.accounts, self.starting_date))
+
+
+class ResultCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp('cache-test')
+        self.path = os.path.join(self.temp_dir, 'results.sqlite')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_get_and_put(self):
+        cache = ResultCache(self.path)
+        self.assertIsNone(cache.get('a'))
+        cache.put('a', (1, Money(2)))
+        self.assertEqual(cache.get('a'), (1, Money(2)))
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(cache.misses, 1)
+        self.assertEqual(cache.hit_rate, 0.5)
+        cache.close()
+
+        reopened = ResultCache(self.path)
+        self.assertEqual(reopened.get('a'), (1, Money(2)))
+        self.assertEqual(reopened.stats()['entries'], 1)
+        reopened.close()
+
+    def test_put_should_evict_least_recently_used_entries(self):
+        cache = ResultCache(self.path, max_entries=2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        cache.get('a')
+        cache.put('c', 3)
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('c'), 3)
+        cache.close()
+
+    def test_put_should_evict_to_max_bytes(self):
+        cache = ResultCache(self.path)
+        cache.put('a', 'x' * 100)
+        entry_size = cache.stats()['bytes']
+        cache.close()
+
+        cache = ResultCache(self.path, max_bytes=2 * entry_size)
+        cache.put('b', 'x' * 100)
+        cache.put('c', 'x' * 100)
+        self.assertEqual(cache.stats()['entries'], 2)
+        self.assertIsNone(cache.get('a'))
+        cache.close()
+
+
+class AnalyzeWithCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.accounts = analysis.load_accounts(os.path.join('tests', 'data', 'test-accounts.csv'))
+        self.temp_dir = tempfile.mkdtemp('cache-test')
+        self.cache = ResultCache(os.path.join(self.temp_dir, 'results.sqlite'))
+
+    def tearDown(self):
+        self.cache.close()
+        shutil.rmtree(self.temp_dir)
+
+    def test_analyze_should_reuse_cached_results(self):
+        mpd = ConstantMaxPaymentDeterminer(2000, 50)
+        pm = EvenSplitPaymentManager()
+        starting_date = date(2014, 10, 1)
+
+        uncached = analysis.analyze(mpd, pm, pm, self.accounts, starting_date)
+        first = analysis.analyze(mpd, pm, pm, self.accounts, starting_date, cache=self.cache)
+        second = analysis.analyze(mpd, pm, pm, self.accounts, starting_date, cache=self.cache)
+
+        self.assertEqual(self.cache.hits, 1)
+        self.assertEqual(self.cache.misses, 1)
+        self.assertEqual(first, uncached)
+        self.assertEqual(second, uncached)
+        self.assertIn(second.monthly_payments[-1][1].keys()[0], self.accounts)
+
+    def test_analyze_should_attribute_interest_of_cached_results(self):
+        mpd = ConstantMaxPaymentDeterminer(2000, 50)
+        pm = EvenSplitPaymentManager()
+        starting_date = date(2014, 10, 1)
+        attributions = [InterestAttribution(self.accounts), InterestAttribution(self.accounts)]
+
+        # the first is calculated and the second attributed from the cached payments
+        results = [analysis.analyze(mpd, pm, pm, self.accounts, starting_date, cache=self.cache, interest_attribution=a) for a in attributions]
+
+        self.assertEqual(self.cache.hits, 1)
+        self.assertEqual(attributions[0].total, results[0].interest_paid)
+        self.assertEqual(attributions[1].by_account(), attributions[0].by_account())
+
+
+if __name__ == '__main__':
+    unittest.main()
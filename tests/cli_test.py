@@ -0,0 +1,58 @@
+'''
+loan_payoff_tools: Test module.
+
+Meant for use with py.test.
+Write each test as a function named test_<something>.
+Read more here: http://pytest.org/
+
+Copyright 2014, Phillip Green II
+Licensed under MIT
+'''
+
+import unittest
+import os.path
+import tempfile
+import shutil
+import json
+import StringIO
+
+import loan_payoff_tools.cli as cli
+
+
+class CliTestCase(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp('cli-test')
+        self.accounts_file = os.path.join('tests', 'data', 'test-accounts.csv')
+        self.spec_file = os.path.join(self.temp_dir, 'spec.json')
+        with open(self.spec_file, 'wb') as f:
+            json.dump({'starting_date': '2014-10-01',
+                       'scenarios': [{'max_payment_determiner': {'type': 'constant', 'max_payment': 2000, 'bonus': 50},
+                                      'payment_manager': 'biggest_debt',
+                                      'bonus_payment_manager': 'even_split'},
+                                     {'max_payment_determiner': {'type': 'constant', 'max_payment': 2000, 'bonus': 50},
+                                      'payment_manager': 'optimal',
+                                      'bonus_payment_manager': 'optimal'}]}, f)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_run(self):
+        out = StringIO.StringIO()
+        cli.run(self.accounts_file, self.spec_file, out, workers=2)
+
+        lines = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(sorted(lines, key=lambda l: l['payment_manager']),
+                         [{'max_payment_determiner': 'constant_2000_50', 'payment_manager': 'biggest_debt', 'bonus_payment_manager': 'even_split',
+                           'months': 75, 'initial_debt': 133000.0, 'total_paid': 152349.04, 'interest_paid': 19349.04},
+                          {'max_payment_determiner': 'constant_2000_50', 'payment_manager': 'optimal', 'bonus_payment_manager': 'optimal',
+                           'months': 74, 'initial_debt': 133000.0, 'total_paid': 150481.43, 'interest_paid': 17481.43}])
+
+    def test_run_inline(self):
+        out = StringIO.StringIO()
+        cli.run(self.accounts_file, self.spec_file, out, workers=1)
+
+        self.assertEqual([json.loads(line)['payment_manager'] for line in out.getvalue().splitlines()], ['biggest_debt', 'optimal'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+'''
+loan_payoff_tools: Test module.
+
+Meant for use with py.test.
+Write each test as a function named test_<something>.
+Read more here: http://pytest.org/
+
+Copyright 2014, Phillip Green II
+Licensed under MIT
+'''
+
+import unittest
+import subprocess
+import sys
+import json
+
+# worker processes and short lived jobs import these, so they must stay cheap to import
+CORE_MODULES = ['loan_payoff_tools.analysis',
+                'loan_payoff_tools.account_table',
+                'loan_payoff_tools.cache',
+                'loan_payoff_tools.environment',
+                'loan_payoff_tools.max_payment_determiner',
+                'loan_payoff_tools.money',
+                'loan_payoff_tools.payment_manager',
+                'loan_payoff_tools.payoff_calculator',
+                'loan_payoff_tools.sensitivity',
+                'loan_payoff_tools.utils']
+
+HEAVY_MODULES = ['matplotlib', 'numpy']
+
+IMPORT_TIME_BUDGET = 0.5
+
+IMPORT_SCRIPT = '''
+import json
+import sys
+import time
+start = time.time()
+for module in {modules!r}:
+    __import__(module)
+print(json.dumps({{"seconds": time.time() - start, "modules": sorted(sys.modules.keys())}}))
+'''
+
+
+class ImportTestCase(unittest.TestCase):
+
+    def import_core_modules(self):
+        output = subprocess.check_output([sys.executable, '-c', IMPORT_SCRIPT.format(modules=CORE_MODULES)])
+        return json.loads(output)
+
+    def test_core_modules_should_not_import_heavy_dependencies(self):
+        imported = self.import_core_modules()['modules']
+        for module in HEAVY_MODULES:
+            self.assertNotIn(module, imported)
+
+    def test_core_modules_should_import_within_budget(self):
+        seconds = min(self.import_core_modules()['seconds'] for _ in range(3))
+        self.assertLess(seconds, IMPORT_TIME_BUDGET)
+
+
+if __name__ == '__main__':
+    unittest.main()
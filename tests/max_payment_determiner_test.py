@@ -28,6 +28,9 @@ class ConstantMaxPaymentDeterminerTestCase(unittest.TestCase):
     def test_id(self):
         self.assertEqual(self.payment_manager.id, 'constant_1000_0')
 
+    def test_has_bonus(self):
+        self.assertFalse(self.payment_manager.has_bonus)
+
     def test_determine_max_payment_for_should_return_constant_with_different_dates(self):
         payments_per_year = 12
         expected_max_payment = (Money(1000), Money(0))
@@ -50,6 +53,9 @@ class ConstantMaxPaymentDeterminerWithBonusTestCase(unittest.TestCase):
     def test_id(self):
         self.assertEqual(self.payment_manager.id, 'constant_1000_100')
 
+    def test_has_bonus(self):
+        self.assertTrue(self.payment_manager.has_bonus)
+
     def test_determine_max_payment_for_should_return_constant_with_different_dates(self):
         payments_per_year = 12
         expected_max_payment = (Money(1000), Money(100))
@@ -97,6 +103,9 @@ class AnnualRaiseMaxPaymentDeterminerTestCase(unittest.TestCase):
     def test_id(self):
         self.assertEqual(self.payment_manager.id, 'annual_raise_100000_5_1000')
 
+    def test_has_bonus(self):
+        self.assertFalse(self.payment_manager.has_bonus)
+
     def test_determine_max_payment_for_should_return_correct_values_when_different_dates(self):
         payments_per_year = 12
         self.assertEqual(self.payment_manager.determine_max_payment_for(payments_per_year, date(2014, 1, 1)), (Money(1000.00), Money(0)))
@@ -154,6 +163,10 @@ class AnnualRaiseAndBonusMaxPaymentDeterminerTestCaseTestCase(unittest.TestCase)
     def test_id(self):
         self.assertEqual(self.payment_manager.id, 'annual_raise_and_bonus_100000_5_10_1000')
 
+    def test_has_bonus(self):
+        self.assertTrue(self.payment_manager.has_bonus)
+        self.assertFalse(AnnualRaiseAndBonusMaxPaymentDeterminer(100000, 0.05, 0, date(2013, 5, 1), 1000).has_bonus)
+
     def test_determine_max_payment_for_should_return_correct_values_when_different_dates(self):
         payments_per_year = 12
         self.assertEqual(self.payment_manager.determine_max_payment_for(payments_per_year, date(2014, 1, 1)), (Money(1000.00), Money(0)))
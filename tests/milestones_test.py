@@ -0,0 +1,135 @@
+'''
+loan_payoff_tools: Test module.
+
+Meant for use with py.test.
+Write each test as a function named test_<something>.
+Read more here: http://pytest.org/
+
+Copyright 2014, Phillip Green II
+Licensed under MIT
+'''
+
+import unittest
+import os.path
+import shutil
+import tempfile
+import datetime
+import pickle
+
+import loan_payoff_tools.analysis as analysis
+import loan_payoff_tools.max_payment_determiner as max_payment_determiner
+import loan_payoff_tools.payment_manager as payment_manager
+from loan_payoff_tools.cache import ResultCache
+from loan_payoff_tools.milestones import MilestoneIndex
+from loan_payoff_tools.money import Money
+
+
+class MilestoneIndexTestCase(unittest.TestCase):
+    def setUp(self):
+        self.accounts = analysis.load_accounts(os.path.join('tests', 'data', 'test-accounts.csv'))
+        self.mpd = max_payment_determiner.ConstantMaxPaymentDeterminer(2000, 50)
+        self.pm = payment_manager.BiggestDebtPaymentManager()
+        self.bpm = payment_manager.EvenSplitPaymentManager()
+        self.starting_date = datetime.date(2014, 11, 1)
+        self.milestones = MilestoneIndex(self.accounts)
+        self.result = analysis.analyze(self.mpd, self.pm, self.bpm, self.accounts, self.starting_date, milestones=self.milestones)
+
+    def test_totals(self):
+        last = self.milestones.periods - 1
+        self.assertEqual(self.milestones.periods, self.result.months)
+        self.assertEqual(self.milestones.paid_through(last), self.result.total_paid)
+        self.assertEqual(self.milestones.interest_through(last), self.result.interest_paid)
+        self.assertEqual(self.milestones.remaining_after(last), Money(0))
+
+    def test_account_milestones(self):
+        for account in self.accounts:
+            paid_off = [p for p, (d, payments) in enumerate(self.result.monthly_payments) if account in payments and payments[account][1] == Money(0)]
+            above_minimum = [p for p, (d, payments) in enumerate(self.result.monthly_payments)
+                             if account in payments and payments[account][0] > account.minimum_payment]
+            self.assertEqual(self.milestones.payoff_period(account), paid_off[0])
+            self.assertEqual(self.milestones.payoff_date(account), self.result.monthly_payments[paid_off[0]][0])
+            self.assertEqual(self.milestones.above_minimum_period(account), above_minimum[0] if above_minimum else None)
+
+    def test_prefix_sums(self):
+        paid = Money(0)
+        for period, (d, payments) in enumerate(self.result.monthly_payments):
+            paid += sum([p for p, r in payments.values()], Money(0))
+            self.assertEqual(self.milestones.paid_through(period), paid)
+            self.assertEqual(self.milestones.remaining_after(period), sum([r for p, r in payments.values()], Money(0)))
+        self.assertEqual(self.milestones.period_of(self.starting_date), 0)
+        self.assertEqual(self.milestones.period_of(datetime.date(2014, 12, 15)), 1)
+        self.assertEqual(self.milestones.period_of(datetime.date(2014, 10, 1)), None)
+
+    def test_thresholds(self):
+        half = self.result.initial_debt / 2
+        expected = next(p for p in range(self.milestones.periods) if self.milestones.remaining_after(p) <= half)
+        self.assertEqual(self.milestones.first_period_remaining_at_most(half), expected)
+        self.assertEqual(self.milestones.first_period_remaining_at_most(Money(-1)), None)
+        expected = next(p for p in range(self.milestones.periods) if self.milestones.paid_through(p) >= half)
+        self.assertEqual(self.milestones.first_period_paid_at_least(half), expected)
+        self.assertEqual(self.milestones.first_period_paid_at_least(self.result.total_paid + Money(1)), None)
+
+    def test_index_milestones(self):
+        self.assertEqual(analysis.index_milestones([self.result], self.accounts), [self.milestones])
+
+    def test_index_milestones_should_reject_summary_only_results(self):
+        with self.assertRaises(ValueError):
+            analysis.index_milestones([self.result, self.result._replace(monthly_payments=None)], self.accounts)
+
+    def test_analyze_summary_only(self):
+        milestones = MilestoneIndex(self.accounts)
+        result = analysis.analyze(self.mpd, self.pm, self.bpm, self.accounts, self.starting_date, milestones=milestones, summary_only=True)
+        self.assertEqual(result, self.result._replace(monthly_payments=None))
+        self.assertEqual(milestones, self.milestones)
+
+    def test_analyze_all_should_index_summary_only_results(self):
+        scenarios = [analysis.Scenario(self.mpd, self.pm, self.bpm, self.accounts, self.starting_date)]
+        analyzed = [d for chunk in analysis.analyze_all(scenarios, processes=1, summary_only=True, index_milestones=True) for d in chunk]
+        self.assertEqual(analyzed, [analysis.ResultDetails(self.result._replace(monthly_payments=None), self.milestones, None)])
+
+        for processes in (1, 2):
+            parameters = [(self.mpd, self.pm, self.bpm, self.starting_date)] * 3
+            analyzed = [d for chunk in analysis.analyze_all_for_accounts(self.accounts, parameters, processes=processes, chunk_size=2, summary_only=True,
+                                                                         index_milestones=True) for d in chunk]
+            self.assertEqual([d.result.monthly_payments for d in analyzed], [None] * 3)
+            self.assertEqual([d.milestones for d in analyzed], [self.milestones] * 3)
+            # keyed by the caller's accounts, even when built by a worker
+            self.assertEqual([d.milestones.payoff_period(a) for a in self.accounts for d in analyzed[:1]],
+                             [self.milestones.payoff_period(a) for a in self.accounts])
+
+    def test_analyze_all_should_key_pooled_milestones_by_the_callers_accounts(self):
+        scenarios = [analysis.Scenario(self.mpd, self.pm, self.bpm, self.accounts, self.starting_date)] * 3
+        for summary_only in (True, False):
+            analyzed = [d for chunk in analysis.analyze_all(scenarios, processes=2, chunk_size=2, summary_only=summary_only, index_milestones=True)
+                        for d in chunk]
+            self.assertEqual([d.milestones for d in analyzed], [self.milestones] * 3)
+            for d in analyzed:
+                self.assertEqual([d.milestones.payoff_period(a) for a in self.accounts], [self.milestones.payoff_period(a) for a in self.accounts])
+
+        results = [r for chunk in analysis.analyze_all(scenarios, processes=2, chunk_size=2) for r in chunk]
+        self.assertEqual([r.monthly_payments for r in results], [self.result.monthly_payments] * 3)
+        self.assertEqual(analysis.index_milestones(results, self.accounts), [self.milestones] * 3)
+
+    def test_pickle_should_only_keep_the_arrays(self):
+        copy = pickle.loads(pickle.dumps(self.milestones, pickle.HIGHEST_PROTOCOL))
+        self.assertIsNone(copy.accounts)
+        self.assertEqual(copy, self.milestones)
+        copy.rebind(self.accounts)
+        self.assertEqual([copy.payoff_date(a) for a in self.accounts], [self.milestones.payoff_date(a) for a in self.accounts])
+        self.assertNotIn('accounts', self.milestones.__getstate__())
+
+    def test_analyze_with_cache(self):
+        temp_dir = tempfile.mkdtemp('milestones-test')
+        try:
+            cache = ResultCache(os.path.join(temp_dir, 'cache.sqlite'))
+            analysis.analyze(self.mpd, self.pm, self.bpm, self.accounts, self.starting_date, cache=cache)
+            milestones = MilestoneIndex(self.accounts)
+            analysis.analyze(self.mpd, self.pm, self.bpm, self.accounts, self.starting_date, cache=cache, milestones=milestones)
+            cache.close()
+        finally:
+            shutil.rmtree(temp_dir)
+        self.assertEqual(milestones, self.milestones)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -10,6 +10,8 @@ Licensed under MIT
 '''
 import unittest
 from loan_payoff_tools.money import Money
+from loan_payoff_tools.money import parse_cents
+from loan_payoff_tools.money import format_cents
 import decimal
 
 
@@ -35,6 +37,38 @@ class MoneyTestCase(unittest.TestCase):
         self.assertEqual(Money(float(100.00))._cents, 10000)
         self.assertEqual(Money(float(32.34))._cents, 3234)
 
+    def test_cents(self):
+        self.assertEqual(Money(12.34).cents, 1234)
+        self.assertEqual(Money(-12.34).cents, -1234)
+
+    def test_parse_cents(self):
+        self.assertEqual(parse_cents("100.00"), 10000)
+        self.assertEqual(parse_cents("100"), 10000)
+        self.assertEqual(parse_cents("100.5"), 10050)
+        self.assertEqual(parse_cents(".07"), 7)
+        self.assertEqual(parse_cents(" $1,234.56 "), 123456)
+        self.assertEqual(parse_cents("-$12.34"), -1234)
+        self.assertEqual(parse_cents("0.125"), 13)
+        self.assertEqual(parse_cents("0.124"), 12)
+        self.assertEqual(parse_cents("-0.125"), -13)
+        self.assertEqual(parse_cents("$-5.00"), -500)
+
+    def test_parse_cents_with_invalid(self):
+        self.assertRaises(ValueError, parse_cents, "")
+        self.assertRaises(ValueError, parse_cents, ".")
+        self.assertRaises(ValueError, parse_cents, "1.2.3")
+        self.assertRaises(ValueError, parse_cents, "abc")
+        self.assertRaises(ValueError, parse_cents, "--1")
+        self.assertRaises(ValueError, parse_cents, "-$-1")
+
+    def test_format_cents(self):
+        for cents in [0, 1, 5, 99, 100, 12345, 123456789, -1, -5, -150, -123456789]:
+            self.assertEqual(format_cents(cents), str(Money(cents=cents)))
+
+    def test_parse_cents_should_round_trip_format_cents(self):
+        for cents in [0, 1, 99, 12345, -1, -5, -99, -500, -123456789]:
+            self.assertEqual(parse_cents(format_cents(cents)), cents)
+
     def test_str(self):
         self.assertEqual(str(Money(int(100))), "$100.00")
 
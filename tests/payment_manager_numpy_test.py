@@ -0,0 +1,149 @@
+'''
+loan_payoff_tools: Test module.
+
+Meant for use with py.test.
+Write each test as a function named test_<something>.
+Read more here: http://pytest.org/
+
+Copyright 2014, Phillip Green II
+Licensed under MIT
+'''
+
+import unittest
+import random
+
+import loan_payoff_tools.payment_manager as payment_manager
+from loan_payoff_tools.payment_manager import Account
+from loan_payoff_tools.money import Money
+
+try:
+    import numpy
+    numpy_available = True
+except ImportError:
+    numpy_available = False
+    pass
+
+
+def _make_payments(manager, max_payment, accounts, ignore_minimum_payments=False):
+    payments = manager(max_payment, {a: a.initial_balance for a in accounts}, ignore_minimum_payments)
+    return [payments.get(a, Money(0)).cents for a in accounts]
+
+
+def _make_payment_array(manager, max_payment, accounts, ignore_minimum_payments=False, keys=True):
+    return list(manager.make_payment_array(max_payment.cents,
+                                           [a.initial_balance.cents for a in accounts],
+                                           [a.minimum_payment.cents for a in accounts],
+                                           [a.interest for a in accounts],
+                                           [(a.debtor, a.debtor_id, a.debtee) for a in accounts] if keys else None,
+                                           ignore_minimum_payments))
+
+
+@unittest.skipUnless(numpy_available, "numpy not available")
+class PaymentArrayTestCase(unittest.TestCase):
+    def setUp(self):
+        self.account0 = Account("Bank0", "00", "Joe", 1000, 0.03, 100.00, None)
+        self.account1 = Account("Bank0", "01", "Joe", 7500, 0.05, 50.00, None)
+        self.account2 = Account("Bank1", "00", "Sam", 9000, 0.06, 900.00, None)
+        self.accounts = [self.account0, self.account1, self.account2]
+
+    def test_ranked_payment_array(self):
+        self.assertEqual(_make_payment_array(payment_manager.OptimalPaymentManager(), Money(2000), self.accounts), [10000, 5000, 185000])
+        self.assertEqual(_make_payment_array(payment_manager.SmallestDebtPaymentManager(), Money(2000), self.accounts), [100000, 10000, 90000])
+        self.assertEqual(_make_payment_array(payment_manager.OptimalPaymentManager(), Money(2000), self.accounts, True), [0, 0, 200000])
+
+    def test_ranked_payment_array_should_take_overdrawn_minimums_from_first_account(self):
+        for manager in (payment_manager.OptimalPaymentManager(), payment_manager.BiggestDebtPaymentManager()):
+            self.assertEqual(_make_payment_array(manager, Money(900), self.accounts), _make_payments(manager, Money(900), self.accounts))
+
+    def test_ranked_payment_array_should_break_ties_by_key_or_position(self):
+        account0 = Account("Bank1", "00", "Joe", 1000, 0.03, 0, None)
+        account1 = Account("Bank0", "00", "Joe", 1000, 0.03, 0, None)
+        manager = payment_manager.SmallestDebtPaymentManager()
+        self.assertEqual(_make_payment_array(manager, Money(500), [account0, account1]), [0, 50000])
+        self.assertEqual(_make_payment_array(manager, Money(500), [account0, account1], keys=False), [50000, 0])
+
+    def test_split_payment_array(self):
+        self.assertEqual(_make_payment_array(payment_manager.EvenSplitPaymentManager(), Money(2000), self.accounts), [41667, 36667, 121667])
+        self.assertEqual(_make_payment_array(payment_manager.WeightedSplitPaymentManager(), Money(1000), self.accounts, True),
+                         _make_payments(payment_manager.WeightedSplitPaymentManager(), Money(1000), self.accounts, True))
+
+    def test_split_payment_array_should_record_stats(self):
+        stats = payment_manager.SplitPaymentStats()
+        _make_payment_array(payment_manager.EvenSplitPaymentManager(stats), Money(2000), self.accounts)
+        payment_manager.EvenSplitPaymentManager(stats)(Money(2000), {a: a.initial_balance for a in self.accounts})
+        self.assertEqual(stats.recent[0], stats.recent[1])
+
+    def test_split_payment_matrix_should_total_shares_independent_of_order(self):
+        # like make_split_payments, the 0.3 share of a cent rounds up whichever order the shares are in
+        def split(np, unpaid_balances, uncomplete):
+            return np.broadcast_to(np.asarray(order, dtype=float), unpaid_balances.shape)
+        for order in ([0.1, 0.2, 0.3], [0.3, 0.2, 0.1]):
+            matrix = payment_manager.make_split_payment_matrix(split, [1, 1], [[500000] * 3] * 2, [0, 0, 0], True)
+            self.assertEqual(matrix.tolist(), [[int(share == 0.3) for share in order]] * 2)
+
+    def test_specified_split_payment_array_should_need_keys(self):
+        manager = payment_manager.SpecifiedSplitPaymentManager({"Bank0": 0.60, "Bank1": 0.40})
+        self.assertEqual(_make_payment_array(manager, Money(2000), self.accounts), _make_payments(manager, Money(2000), self.accounts))
+        with self.assertRaises(ValueError):
+            _make_payment_array(manager, Money(2000), self.accounts, keys=False)
+
+    def test_payment_array_should_adapt_dict_api(self):
+        self.assertEqual(_make_payment_array(payment_manager.MinimumPaymentManager(), Money(2000), self.accounts), [10000, 5000, 90000])
+        self.assertEqual(list(payment_manager.MinimumPaymentManager().make_payment_array(0, [], [], [])), [])
+
+    def test_payment_array_should_match_dict_api(self):
+        rng = random.Random(0)
+        managers = [payment_manager.PayMostInterestPaymentPaymentManager(), payment_manager.PayLeastInterestPaymentPaymentManager(),
+                    payment_manager.SmallestDebtPaymentManager(), payment_manager.BiggestDebtPaymentManager(), payment_manager.OptimalPaymentManager(),
+                    payment_manager.WeightedSplitPaymentManager(), payment_manager.EvenSplitPaymentManager(),
+                    payment_manager.SpecifiedSplitPaymentManager({"Bank0": 0.5, "Bank1": 0.3, "Bank2": 0.2})]
+        for _ in range(100):
+            accounts = [Account("Bank{}".format(rng.randint(0, 2)), "{:02d}".format(i), "Joe", Money(cents=rng.randint(100, 900000)),
+                                rng.choice([0.0, 0.03, 0.05, 0.068]), Money(cents=rng.randint(0, 20000)), None)
+                        for i in range(rng.randint(1, 12))]
+            max_payment = Money(cents=rng.randint(0, 300000))
+            ignore_minimum_payments = rng.random() < 0.3
+            for manager in managers:
+                expected = _make_payments(manager, max_payment, accounts, ignore_minimum_payments)
+                actual = _make_payment_array(manager, max_payment, accounts, ignore_minimum_payments)
+                self.assertEqual(actual, expected, manager)
+
+    def test_payment_matrix_should_match_payment_arrays(self):
+        rng = random.Random(1)
+        managers = [payment_manager.PayMostInterestPaymentPaymentManager(), payment_manager.PayLeastInterestPaymentPaymentManager(),
+                    payment_manager.SmallestDebtPaymentManager(), payment_manager.BiggestDebtPaymentManager(), payment_manager.OptimalPaymentManager(),
+                    payment_manager.WeightedSplitPaymentManager(), payment_manager.EvenSplitPaymentManager(),
+                    payment_manager.SpecifiedSplitPaymentManager({"Bank0": 0.5, "Bank1": 0.3, "Bank2": 0.2}), payment_manager.MinimumPaymentManager()]
+        for _ in range(30):
+            size = rng.randint(1, 10)
+            keys = [("Bank{}".format(rng.randint(0, 2)), "{:02d}".format(i), "Joe") for i in range(size)]
+            minimum_payments = [rng.randint(0, 20000) for _ in range(size)]
+            rates = [rng.choice([0.0, 0.03, 0.05]) for _ in range(size)]
+            # half the rows are scaled copies of the first, so they rank the same way
+            first = [rng.randint(100, 900000) for _ in range(size)]
+            balances = [[b * (row + 1) for b in first] if row % 2 else [rng.randint(0, 900000) for _ in range(size)] for row in range(8)]
+            max_payments = [rng.randint(0, 300000) for _ in balances]
+            ignore_minimum_payments = rng.random() < 0.3
+            for manager in managers:
+                matrix = manager.make_payment_matrix(max_payments, balances, minimum_payments, rates, keys, ignore_minimum_payments)
+                for max_payment, row, payments in zip(max_payments, balances, matrix):
+                    expected = manager.make_payment_array(max_payment, row, minimum_payments, rates, keys, ignore_minimum_payments)
+                    self.assertEqual(list(payments), list(expected), manager)
+
+    def test_payment_matrix_should_rank_rows_independently(self):
+        manager = payment_manager.SmallestDebtPaymentManager()
+        matrix = manager.make_payment_matrix([50000, 50000, 150000], [[100000, 200000], [200000, 100000], [100000, 200000]], [0, 0], [0.05, 0.05])
+        self.assertEqual(matrix.tolist(), [[50000, 0], [0, 50000], [100000, 50000]])
+
+    def test_split_payment_matrix_should_record_stats_per_row(self):
+        stats = payment_manager.SplitPaymentStats()
+        balances = [a.initial_balance.cents for a in self.accounts]
+        minimum_payments = [a.minimum_payment.cents for a in self.accounts]
+        payment_manager.EvenSplitPaymentManager(stats).make_payment_matrix([200000, 100000], [balances, balances], minimum_payments, [0, 0, 0])
+        self.assertEqual(stats.calls, 2)
+        _make_payment_array(payment_manager.EvenSplitPaymentManager(stats), Money(1000), self.accounts)
+        self.assertEqual(stats.recent[1], stats.recent[2])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -18,11 +18,16 @@ from loan_payoff_tools.payment_manager import PayMostInterestPaymentPaymentManag
 from loan_payoff_tools.payment_manager import PayLeastInterestPaymentPaymentManager
 from loan_payoff_tools.payment_manager import SmallestDebtPaymentManager
 from loan_payoff_tools.payment_manager import BiggestDebtPaymentManager
+from loan_payoff_tools.payment_manager import OptimalPaymentManager
 from loan_payoff_tools.payment_manager import WeightedSplitPaymentManager
 from loan_payoff_tools.payment_manager import EvenSplitPaymentManager
 from loan_payoff_tools.payment_manager import SpecifiedSplitPaymentManager
+from loan_payoff_tools.payment_manager import SplitPaymentStats
+from loan_payoff_tools.payment_manager import make_split_payments
 from loan_payoff_tools.max_payment_determiner import ConstantMaxPaymentDeterminer
 from loan_payoff_tools.money import Money
+from loan_payoff_tools.payoff_calculator import calculate_payoff
+from loan_payoff_tools.utils import describe
 import loan_payoff_tools.money as money
 
 
@@ -721,6 +726,116 @@ class TestBiggestDebtPaymentManager(PaymentManagerMakePaymentsTestCase):
         self.assertTotalBalanceNotExceeded(payments, accounts_to_balances)
 
 
+def _splits(chunks, size):
+    if size == 1:
+        yield (chunks,)
+        return
+    for n in range(chunks + 1):
+        for rest in _splits(chunks - n, size - 1):
+            yield (n,) + rest
+
+
+def _least_total_paid_by_brute_force(accounts, max_payment, step):
+    # tries every split of max_payment into steps between the accounts, every month, charging interest like
+    # calculate_payoff; a step beyond an account's balance is lost, so no split can do better than an exact one
+    least = {}
+
+    def least_from(balances):
+        if balances not in least:
+            charged = [b * (1 + a.interest / 12) for a, b in zip(accounts, balances)]
+            total = sum(charged, Money(0))
+            if total <= max_payment:
+                least[balances] = total
+            else:
+                totals = []
+                for split in _splits(max_payment.cents / step.cents, len(accounts)):
+                    if any(n and not b for n, b in zip(split, charged)):
+                        continue
+                    paid = [min(step * n, b) for n, b in zip(split, charged)]
+                    totals.append(sum(paid, Money(0)) + least_from(tuple(b - p for b, p in zip(charged, paid))))
+                least[balances] = min(totals)
+        return least[balances]
+    return least_from(tuple(a.initial_balance for a in accounts))
+
+
+class TestOptimalPaymentManager(PaymentManagerMakePaymentsTestCase):
+
+    def setUp(self):
+        self.max_total_payment = Money(1000)
+        self.payment_manager = OptimalPaymentManager()
+
+    def test_id(self):
+        self.assertEqual(self.payment_manager.id, 'optimal')
+
+    def test_make_payments_should_order_by_highest_rate(self):
+        account0 = Account("Bank0", "00", "Joe", 5000, 0.03, 50.00, date(2014, 5, 1))
+        account1 = Account("Bank0", "01", "Joe", 5000, 0.06, 50.00, date(2014, 5, 1))
+        account2 = Account("Bank1", "00", "Joe", 5000, 0.04, 50.00, date(2014, 5, 1))
+        accounts_to_balances = {account0: Money(9000.00), account1: Money(1000.00), account2: Money(4000.00)}
+
+        expected_payments = {account0: Money(50.00), account1: Money(900.00), account2: Money(50.00)}
+
+        payments = self.payment_manager(self.max_total_payment, accounts_to_balances, False)
+
+        self.assertEqual(payments, expected_payments)
+        self.assertMaxTotalPaymentNotExceeded(payments)
+        self.assertTotalBalanceNotExceeded(payments, accounts_to_balances)
+        self.assertMinimumPayments(payments, accounts_to_balances)
+
+    def test_make_payments_with_ignored_minimums_should_order_by_highest_rate(self):
+        account0 = Account("Bank0", "00", "Joe", 5000, 0.03, 50.00, date(2014, 5, 1))
+        account1 = Account("Bank0", "01", "Joe", 5000, 0.06, 50.00, date(2014, 5, 1))
+        account2 = Account("Bank1", "00", "Joe", 5000, 0.04, 50.00, date(2014, 5, 1))
+        accounts_to_balances = {account0: Money(9000.00), account1: Money(1000.00), account2: Money(4000.00)}
+
+        expected_payments = {account0: Money(0.00), account1: Money(1000.00), account2: Money(0.00)}
+
+        payments = self.payment_manager(self.max_total_payment, accounts_to_balances, True)
+
+        self.assertEqual(payments, expected_payments)
+        self.assertMaxTotalPaymentNotExceeded(payments)
+        self.assertTotalBalanceNotExceeded(payments, accounts_to_balances)
+
+    def test_make_payments_should_order_by_smallest_balance_when_identical_rates(self):
+        account0 = Account("Bank0", "00", "Joe", 5000, 0.03, 50.00, date(2014, 5, 1))
+        account1 = Account("Bank0", "01", "Joe", 5000, 0.03, 50.00, date(2014, 5, 1))
+        account2 = Account("Bank1", "00", "Joe", 5000, 0.03, 50.00, date(2014, 5, 1))
+        accounts_to_balances = {account0: Money(4500.00), account1: Money(4200.00), account2: Money(4500.00)}
+
+        expected_payments = {account0: Money(50.00), account1: Money(900.00), account2: Money(50.00)}
+
+        payments = self.payment_manager(self.max_total_payment, accounts_to_balances, False)
+
+        self.assertEqual(payments, expected_payments)
+        self.assertMaxTotalPaymentNotExceeded(payments)
+        self.assertTotalBalanceNotExceeded(payments, accounts_to_balances)
+        self.assertMinimumPayments(payments, accounts_to_balances)
+
+    def test_make_payments_should_split_excess_if_account_becomes_paid_off_in_order(self):
+        account0 = Account("Bank0", "00", "Joe", 5000, 0.03, 50.00, date(2014, 5, 1))
+        account1 = Account("Bank0", "01", "Joe", 5000, 0.06, 50.00, date(2014, 5, 1))
+        account2 = Account("Bank1", "00", "Joe", 5000, 0.04, 50.00, date(2014, 5, 1))
+        accounts_to_balances = {account0: Money(9000.00), account1: Money(300.00), account2: Money(4000.00)}
+
+        expected_payments = {account0: Money(50.00), account1: Money(300.00), account2: Money(650.00)}
+
+        payments = self.payment_manager(self.max_total_payment, accounts_to_balances, False)
+
+        self.assertEqual(payments, expected_payments)
+        self.assertMaxTotalPaymentNotExceeded(payments)
+        self.assertTotalBalanceNotExceeded(payments, accounts_to_balances)
+        self.assertMinimumPayments(payments, accounts_to_balances)
+
+    def test_should_pay_no_more_than_brute_force(self):
+        account0 = Account("Bank0", "00", "Joe", 60, 0.24, 0, date(2014, 5, 1))
+        account1 = Account("Bank0", "01", "Joe", 100, 0.12, 0, date(2014, 5, 1))
+        account2 = Account("Bank1", "00", "Joe", 140, 0.36, 0, date(2014, 5, 1))
+        for accounts, max_payment, step in (([account0, account1], 40, 10), ([account1, account2], 60, 15), ([account0, account1, account2], 60, 30)):
+            total_paid, _, _ = calculate_payoff(ConstantMaxPaymentDeterminer(max_payment), self.payment_manager, MinimumPaymentManager(),
+                                                accounts, date(2014, 6, 1))
+            self.assertLessEqual(total_paid, _least_total_paid_by_brute_force(accounts, Money(max_payment), Money(step)))
+
+
 class TestWeightedSplitPaymentManager(PaymentManagerMakePaymentsTestCase):
 
     def setUp(self):
@@ -1294,5 +1409,65 @@ class TestSpecifiedSplitPaymentManager(PaymentManagerMakePaymentsTestCase):
         self.assertTotalBalanceNotExceeded(payments, accounts_to_balances)
 
 
+class TestMakeSplitPayments(unittest.TestCase):
+
+    def test_make_split_payments_should_total_shares_independent_of_order(self):
+        # 0.1 + 0.2 + 0.3 is 0.6000000000000001 added in that order but 0.6 added in reverse, which decides whether
+        # the 0.3 share of a cent rounds up; the shares are totalled exactly, so it always does
+        shares = {"Bank0": 0.1, "Bank1": 0.2, "Bank2": 0.3}
+        for _ in range(20):
+            accounts = [Account(debtor, "00", "Joe", 5000, 0.03, 0, date(2014, 5, 1)) for debtor in sorted(shares)]
+            payments = make_split_payments(lambda a_to_b: {a: shares[a.debtor] for a in a_to_b}, Money(cents=1),
+                                           {a: a.initial_balance for a in accounts}, True)
+            self.assertEqual([payments[a] for a in accounts], [Money(0), Money(0), Money(0.01)])
+
+
+class TestSplitPaymentStats(unittest.TestCase):
+
+    def setUp(self):
+        self.account0 = Account("Bank0", "00", "Joe", 5000, 0.03, 50.00, date(2014, 5, 1))
+        self.account1 = Account("Bank0", "01", "Joe", 5000, 0.03, 50.00, date(2014, 5, 1))
+        self.account2 = Account("Bank1", "00", "Joe", 5000, 0.03, 50.00, date(2014, 5, 1))
+
+    def test_make_split_payments_should_record_convergence(self):
+        stats = SplitPaymentStats()
+        payment_manager = EvenSplitPaymentManager(stats)
+
+        payment_manager(Money(1000), {self.account0: Money(4500.00), self.account1: Money(4500.00), self.account2: Money(4500.00)})
+        payment_manager(Money(1000), {self.account0: Money(100.00), self.account1: Money(200.00), self.account2: Money(4500.00)})
+
+        self.assertEqual([(c.accounts, c.passes, c.unallocated, c.capped) for c in stats.recent],
+                         [(3, 2, Money(0.01), [0, 0]), (3, 2, Money(0), [2, 0])])
+        self.assertEqual(stats.summary(), {'calls': 2, 'passes': 4, 'max_passes': 2, 'mean_passes': 2.0, 'capped': 2, 'unallocated': Money(0.01)})
+        stats.reset()
+        self.assertEqual(stats.summary()['calls'], 0)
+        self.assertEqual(len(stats.recent), 0)
+
+    def test_split_payment_stats_should_only_keep_recent_calls(self):
+        stats = SplitPaymentStats(keep=2)
+        for passes in range(1, 6):
+            stats.record(3, passes, Money(0.01), [0] * passes)
+
+        self.assertEqual([c.passes for c in stats.recent], [4, 5])
+        self.assertEqual(stats.summary(), {'calls': 5, 'passes': 15, 'max_passes': 5, 'mean_passes': 3.0, 'capped': 0, 'unallocated': Money(0.05)})
+
+    def test_make_split_payments_should_record_when_nothing_to_split(self):
+        stats = SplitPaymentStats()
+        make_split_payments(lambda a_to_b: {a: 1.0 for a in a_to_b}, Money(60), {self.account0: Money(40.00), self.account1: Money(45.00)}, False, stats)
+        self.assertEqual(stats.recent[0].passes, 0)
+        self.assertEqual(stats.recent[0].unallocated, Money(0))
+        self.assertEqual(stats.max_passes, 0)
+
+    def test_split_payment_managers_should_keep_ids_and_descriptions(self):
+        stats = SplitPaymentStats()
+        for without_stats, with_stats in [(EvenSplitPaymentManager(), EvenSplitPaymentManager(stats)),
+                                          (WeightedSplitPaymentManager(), WeightedSplitPaymentManager(stats)),
+                                          (SpecifiedSplitPaymentManager({"Bank0": 0.60, "Bank1": 0.40}), SpecifiedSplitPaymentManager({"Bank0": 0.60, "Bank1": 0.40}, stats))]:
+            self.assertEqual(with_stats.id, without_stats.id)
+            self.assertEqual(describe(with_stats), describe(without_stats))
+            self.assertIs(with_stats.stats, stats)
+            self.assertIsNone(without_stats.stats)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -10,6 +10,7 @@ Licensed under MIT
 '''
 
 import unittest
+import pickle
 from datetime import date
 
 from loan_payoff_tools.payment_manager import Account
@@ -176,5 +177,83 @@ class PayoffCalculatorTestCase(unittest.TestCase):
         self.assertEqual(total_payoffs, expected_total_payments)
 
 
+    def test_calculate_payoff_with_instrumentation(self):
+        max_payment_determiner = ConstantMaxPaymentDeterminer(50, 50)
+        account0 = Account("Bank0", "00", "Joe", 1000, 0.05, 50.00, date(2014, 5, 1))
+        account1 = Account("Bank0", "01", "Joe", 200, 0.03, 25.00, date(2014, 5, 1))
+        starting_date = date(2014, 6, 30)
+        instrumentation = payoff_calculator.PayoffInstrumentation()
+
+        expected = payoff_calculator.calculate_payoff(max_payment_determiner, EvenSplitPaymentManager(), MinimumPaymentManager(), (account0, account1), starting_date)
+        actual = payoff_calculator.calculate_payoff(max_payment_determiner, EvenSplitPaymentManager(), MinimumPaymentManager(), (account0, account1), starting_date,
+                                                    instrumentation=instrumentation)
+
+        self.assertEqual(actual, expected)
+        months = actual[1]
+        data = instrumentation.as_dict()
+        self.assertEqual({name: totals['calls'] for name, totals in data['phases'].items()},
+                         {'interest': months, 'max_payment_determiner': months, 'payment_manager': months, 'bonus_payment_manager': months,
+                          'remaining_balance': 2 * months, 'combine_payments': months, 'record_payments': months})
+        self.assertEqual({name: totals['calls'] for name, totals in data['payment_managers'].items()}, {'even_split': months, 'minimum': months})
+        self.assertTrue(all(totals['seconds'] >= 0 for totals in data['phases'].values()))
+
+        metrics = []
+        instrumentation.export(lambda name, seconds, calls: metrics.append((name, calls)))
+        self.assertIn(('phase.interest', months), metrics)
+        self.assertIn(('payment_manager.minimum', months), metrics)
+        self.assertEqual(len(metrics), 9)
+
+    def test_instrumentation_should_accumulate_over_calculations(self):
+        account0 = Account("Bank0", "00", "Joe", 1000, 0, 50.00, date(2014, 5, 1))
+        instrumentation = payoff_calculator.PayoffInstrumentation()
+        for _ in range(2):
+            payoff_calculator.calculate_payoff(ConstantMaxPaymentDeterminer(100), EvenSplitPaymentManager(), EvenSplitPaymentManager(), [account0], date(2014, 6, 1),
+                                               instrumentation=instrumentation)
+
+        phases = instrumentation.as_dict()['phases']
+        self.assertEqual(phases['payment_manager']['calls'], 20)
+        # there is never a bonus to pay
+        self.assertNotIn('bonus_payment_manager', phases)
+
+    def test_instrumentation_should_pickle_and_merge(self):
+        account0 = Account("Bank0", "00", "Joe", 1000, 0, 50.00, date(2014, 5, 1))
+        instrumentation = payoff_calculator.PayoffInstrumentation()
+        payoff_calculator.calculate_payoff(ConstantMaxPaymentDeterminer(100), EvenSplitPaymentManager(), EvenSplitPaymentManager(), [account0], date(2014, 6, 1),
+                                           instrumentation=instrumentation)
+
+        copy = pickle.loads(pickle.dumps(instrumentation, pickle.HIGHEST_PROTOCOL))
+        self.assertEqual(copy, instrumentation)
+        merged = payoff_calculator.PayoffInstrumentation().merge(instrumentation).merge(copy)
+        self.assertEqual(merged.as_dict()['phases']['payment_manager']['calls'], 20)
+        self.assertEqual(merged.as_dict()['payment_managers']['even_split']['calls'], 20)
+
+    def test_calculate_payoff_with_interest_attribution(self):
+        max_payment_determiner = ConstantMaxPaymentDeterminer(50, 50)
+        account0 = Account("Bank0", "00", "Joe", 1000, 0.05, 50.00, date(2014, 5, 1))
+        account1 = Account("Bank1", "00", "Joe", 200, 0.03, 25.00, date(2014, 5, 1))
+        account2 = Account("Bank0", "01", "Joe", 300, 0.04, 25.00, date(2014, 5, 1))
+        accounts = [account0, account1, account2]
+        starting_date = date(2014, 6, 30)
+        interest_attribution = payoff_calculator.InterestAttribution(accounts)
+
+        expected = payoff_calculator.calculate_payoff(max_payment_determiner, EvenSplitPaymentManager(), MinimumPaymentManager(), accounts, starting_date)
+        actual = payoff_calculator.calculate_payoff(max_payment_determiner, EvenSplitPaymentManager(), MinimumPaymentManager(), accounts, starting_date,
+                                                    interest_attribution=interest_attribution)
+
+        self.assertEqual(actual, expected)
+        total_paid, _, monthly_payments = actual
+        self.assertEqual(interest_attribution.total, total_paid - Money(1500))
+        by_account = interest_attribution.by_account()
+        self.assertEqual(by_account.keys(), accounts)
+        for account in accounts:
+            paid = sum([payments[account][0] for d, payments in monthly_payments if account in payments], Money(0))
+            self.assertEqual(by_account[account], paid - account.initial_balance)
+        self.assertEqual(interest_attribution.by_debtor(), {"Bank0": by_account[account0] + by_account[account2], "Bank1": by_account[account1]})
+
+        copy = pickle.loads(pickle.dumps(interest_attribution, pickle.HIGHEST_PROTOCOL))
+        self.assertIsNone(copy.accounts)
+        self.assertEqual(copy.rebind(accounts).by_account(), by_account)
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,111 @@
+'''
+loan_payoff_tools: Test module.
+
+Meant for use with py.test.
+Write each test as a function named test_<something>.
+Read more here: http://pytest.org/
+
+Copyright 2014, Phillip Green II
+Licensed under MIT
+'''
+
+import unittest
+from datetime import date
+
+import loan_payoff_tools.analysis as analysis
+import loan_payoff_tools.portfolio as portfolio
+from loan_payoff_tools.account_table import AccountTable
+from loan_payoff_tools.payment_manager import Account
+from loan_payoff_tools.payment_manager import EvenSplitPaymentManager
+from loan_payoff_tools.payment_manager import OptimalPaymentManager
+from loan_payoff_tools.max_payment_determiner import ConstantMaxPaymentDeterminer
+from loan_payoff_tools.money import Money
+
+
+class PortfolioTestCase(unittest.TestCase):
+    def setUp(self):
+        self.accounts = [Account("Bank0", "00", "Joe", 5000, 0.03, 100.00, date(2014, 5, 1)),
+                         Account("Bank1", "00", "Ann", 2000, 0.06, 50.00, date(2014, 5, 1)),
+                         Account("Bank0", "01", "Joe", 7500, 0.05, 50.00, date(2014, 5, 1)),
+                         Account("Bank2", "00", "Sam", 900, 0.02, 25.00, date(2014, 5, 1))]
+        self.max_payment_determiners = {'Joe': ConstantMaxPaymentDeterminer(500, 100),
+                                        'Ann': ConstantMaxPaymentDeterminer(200),
+                                        'Sam': ConstantMaxPaymentDeterminer(100)}
+        self.starting_date = date(2014, 6, 1)
+
+    def test_group_accounts_by_debtee(self):
+        groups = portfolio.group_accounts_by_debtee(self.accounts)
+        self.assertEqual(groups.keys(), ['Joe', 'Ann', 'Sam'])
+        self.assertEqual(groups['Joe'], [self.accounts[0], self.accounts[2]])
+
+    def test_balance_shards(self):
+        groups = [('a', [1] * 5), ('b', [1] * 4), ('c', [1] * 3), ('d', [1] * 3), ('e', [1] * 2), ('f', [1])]
+        shards = portfolio.balance_shards(groups, 3)
+        self.assertEqual(sorted(sum(len(g[1]) for g in shard) for shard in shards), [6, 6, 6])
+        self.assertEqual(sorted(g[0] for shard in shards for g in shard), ['a', 'b', 'c', 'd', 'e', 'f'])
+        self.assertEqual(len(portfolio.balance_shards(groups[:2], 8)), 2)
+
+    def test_analyze_portfolio_should_match_individual_analyses(self):
+        summaries = portfolio.analyze_portfolio(self.accounts, self.max_payment_determiners, EvenSplitPaymentManager(), OptimalPaymentManager(),
+                                                self.starting_date, processes=1)
+        self.assertEqual(summaries.keys(), ['Joe', 'Ann', 'Sam'])
+        for debtee, accounts in portfolio.group_accounts_by_debtee(self.accounts).items():
+            expected = analysis.analyze(self.max_payment_determiners[debtee], EvenSplitPaymentManager(), OptimalPaymentManager(), accounts, self.starting_date)
+            summary = summaries[debtee]
+            self.assertEqual(summary.max_payment_determiner, expected.max_payment_determiner.id)
+            self.assertEqual(summary.accounts, len(accounts))
+            self.assertEqual((summary.months, summary.initial_debt, summary.total_paid, summary.interest_paid),
+                             (expected.months, expected.initial_debt, expected.total_paid, expected.interest_paid))
+
+    def test_analyze_portfolio_with_processes(self):
+        serial = portfolio.analyze_portfolio(self.accounts, self.max_payment_determiners, EvenSplitPaymentManager(), OptimalPaymentManager(),
+                                             self.starting_date, processes=1)
+        parallel = portfolio.analyze_portfolio(self.accounts, self.max_payment_determiners, EvenSplitPaymentManager(), OptimalPaymentManager(),
+                                               self.starting_date, processes=2, shards_per_process=1)
+        self.assertEqual(parallel, serial)
+
+    def test_analyze_portfolio_with_account_table(self):
+        serial = portfolio.analyze_portfolio(self.accounts, self.max_payment_determiners, EvenSplitPaymentManager(), OptimalPaymentManager(),
+                                             self.starting_date, processes=1)
+        table = AccountTable.from_accounts(self.accounts)
+        self.assertEqual(portfolio.group_indexes_by_debtee(table), {'Joe': [0, 2], 'Ann': [1], 'Sam': [3]})
+        self.assertEqual(portfolio.analyze_portfolio(table, self.max_payment_determiners, EvenSplitPaymentManager(), OptimalPaymentManager(),
+                                                     self.starting_date, processes=2), serial)
+
+    def test_plan_groups_should_only_build_the_accounts_of_its_groups(self):
+        built = []
+
+        class CountingTable(AccountTable):
+            def account(self, index):
+                built.append(index)
+                return super(CountingTable, self).account(index)
+        table = CountingTable.from_accounts(self.accounts)
+
+        summaries = portfolio._plan_groups([('Ann', [1], self.max_payment_determiners['Ann'])], table, EvenSplitPaymentManager(), OptimalPaymentManager(),
+                                           self.starting_date)
+
+        self.assertEqual(built, [1])
+        self.assertEqual(summaries, [portfolio.analyze_portfolio(self.accounts, self.max_payment_determiners, EvenSplitPaymentManager(), OptimalPaymentManager(),
+                                                                 self.starting_date, processes=1)['Ann']])
+
+    def test_analyze_portfolio_should_require_determiner_for_every_debtee(self):
+        del self.max_payment_determiners['Sam']
+        with self.assertRaises(ValueError):
+            portfolio.analyze_portfolio(self.accounts, self.max_payment_determiners, EvenSplitPaymentManager(), OptimalPaymentManager(), processes=1)
+
+    def test_summarize_portfolio(self):
+        summaries = portfolio.analyze_portfolio(self.accounts, self.max_payment_determiners, EvenSplitPaymentManager(), OptimalPaymentManager(),
+                                                self.starting_date, processes=1)
+        totals = portfolio.summarize_portfolio(summaries.values())
+        self.assertEqual(totals['borrowers'], 3)
+        self.assertEqual(totals['accounts'], 4)
+        self.assertEqual(totals['initial_debt'], Money(15400))
+        self.assertEqual(totals['months'], max(s.months for s in summaries.values()))
+        self.assertEqual(totals['interest_paid'], sum([s.interest_paid for s in summaries.values()], Money(0)))
+        self.assertEqual(sum(totals['interest_by_debtor'].values(), Money(0)), totals['interest_paid'])
+        for summary in summaries.values():
+            self.assertEqual(sum(summary.interest_by_debtor.values(), Money(0)), summary.interest_paid)
+
+
+if __name__ == '__main__':
+    unittest.main()
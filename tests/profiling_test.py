@@ -0,0 +1,148 @@
+'''
+loan_payoff_tools: Test module.
+
+Meant for use with py.test.
+Write each test as a function named test_<something>.
+Read more here: http://pytest.org/
+
+Copyright 2014, Phillip Green II
+Licensed under MIT
+'''
+
+import unittest
+import os
+import os.path
+import tempfile
+import shutil
+import pstats
+from datetime import date
+from StringIO import StringIO
+
+import loan_payoff_tools.analysis as analysis
+import loan_payoff_tools.profiling as profiling
+from loan_payoff_tools.payment_manager import Account
+from loan_payoff_tools.payment_manager import EvenSplitPaymentManager
+from loan_payoff_tools.payment_manager import OptimalPaymentManager
+from loan_payoff_tools.max_payment_determiner import ConstantMaxPaymentDeterminer
+from loan_payoff_tools.money import Money
+
+
+class MemoryProfilingTestCase(unittest.TestCase):
+    def setUp(self):
+        self.accounts = [Account("Bank0", "00", "Joe", 5000, 0.03, 100.00, date(2014, 5, 1)),
+                         Account("Bank0", "01", "Joe", 7500, 0.05, 50.00, date(2014, 5, 1))]
+        self.scenarios = [analysis.Scenario(ConstantMaxPaymentDeterminer(500), EvenSplitPaymentManager(), OptimalPaymentManager(), self.accounts, date(2014, 6, 1)),
+                          analysis.Scenario(ConstantMaxPaymentDeterminer(250), EvenSplitPaymentManager(), OptimalPaymentManager(), self.accounts, date(2014, 6, 1))]
+
+    def test_count_money(self):
+        with profiling.count_money() as counter:
+            Money(1) + Money(2)
+        Money(3)
+        self.assertEqual(counter.created, 3)
+        self.assertEqual(Money(1.5).cents, 150)
+
+    def test_profile_memory(self):
+        profiled = list(profiling.profile_memory(self.scenarios))
+
+        self.assertEqual([r for r, _ in profiled], [analysis.analyze(*s) for s in self.scenarios])
+        profiles = [p for _, p in profiled]
+        self.assertEqual([p.scenario for p in profiles], ['constant_500_0 even_split optimal', 'constant_250_0 even_split optimal'])
+        # a longer payoff builds more money and keeps more monthly payments
+        self.assertGreater(profiles[0].money_created, 0)
+        self.assertGreater(profiles[1].money_created, profiles[0].money_created)
+        self.assertGreater(profiles[1].retained_bytes, profiles[0].retained_bytes)
+        self.assertGreater(sum(profiles[0].subsystems.values()), 0)
+
+    def _profile_without_tracemalloc(self, current_rss):
+        original = profiling.tracemalloc, profiling._current_rss
+        profiling.tracemalloc, profiling._current_rss = None, current_rss
+        try:
+            return [p for _, p in profiling.profile_memory(self.scenarios)]
+        finally:
+            profiling.tracemalloc, profiling._current_rss = original
+
+    def test_profile_memory_without_tracemalloc(self):
+        samples = iter(xrange(0, 1 << 40, 4096))
+        profiles = self._profile_without_tracemalloc(lambda: next(samples))
+
+        # sampled per scenario, so a later scenario still gets its own peak
+        self.assertTrue(all(p.peak_bytes >= 4096 for p in profiles))
+        for p in profiles:
+            self.assertGreater(p.subsystems['payment_managers'], 0)
+            self.assertGreater(p.subsystems['calculator'], 0)
+        self.assertGreater(profiles[1].subsystems['payment_managers'], profiles[0].subsystems['payment_managers'])
+
+    def test_profile_memory_without_rss(self):
+        profiles = self._profile_without_tracemalloc(lambda: None)
+
+        self.assertEqual([p.peak_bytes for p in profiles], [None, None])
+        self.assertIsNone(profiling.summarize_memory(profiles)['max_peak_bytes'])
+
+    def test_summarize_memory(self):
+        profiles = [profiling.MemoryProfile('a', 10, 100, 40, {}), profiling.MemoryProfile('b', 30, 50, 60, {})]
+        self.assertEqual(profiling.summarize_memory(profiles),
+                         {'scenarios': 2, 'max_peak_bytes': 100, 'max_retained_bytes': 60, 'mean_retained_bytes': 50, 'mean_money_created': 20})
+        self.assertEqual(profiling.summarize_memory(profiles + [profiling.MemoryProfile('c', 0, None, 0, {})])['max_peak_bytes'], 100)
+        self.assertEqual(profiling.summarize_memory([])['scenarios'], 0)
+
+
+class ScenarioProfilerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.accounts = [Account("Bank0", "00", "Joe", 5000, 0.03, 100.00, date(2014, 5, 1)),
+                         Account("Bank0", "01", "Joe", 7500, 0.05, 50.00, date(2014, 5, 1))]
+        self.scenarios = [analysis.Scenario(ConstantMaxPaymentDeterminer(amount), EvenSplitPaymentManager(), OptimalPaymentManager(), self.accounts, date(2014, 6, 1))
+                          for amount in (250, 300, 350, 400, 450)]
+        self.temp_dir = tempfile.mkdtemp('profiling-test')
+
+    def tearDown(self):
+        os.environ.pop(profiling.PROFILE_ENVIRONMENT_VARIABLE, None)
+        os.environ.pop(profiling.PROFILE_EVERY_ENVIRONMENT_VARIABLE, None)
+        shutil.rmtree(self.temp_dir)
+
+    def test_from_environment(self):
+        self.assertIsNone(profiling.ScenarioProfiler.from_environment({}))
+        profiler = profiling.ScenarioProfiler.from_environment({profiling.PROFILE_ENVIRONMENT_VARIABLE: 'report.txt',
+                                                                profiling.PROFILE_EVERY_ENVIRONMENT_VARIABLE: '3'})
+        self.assertEqual((profiler.output_file, profiler.every), ('report.txt', 3))
+
+    def test_analyze_all_should_profile_sampled_scenarios(self):
+        expected = [analysis.analyze(*s) for s in self.scenarios]
+        for processes in (1, 2):
+            profiler = profiling.ScenarioProfiler(every=2)
+            results = [r for chunk in analysis.analyze_all(self.scenarios, processes, chunk_size=2, summary_only=True, ordered=True, profiler=profiler) for r in chunk]
+
+            self.assertEqual([(r.months, r.interest_paid) for r in results], [(r.months, r.interest_paid) for r in expected])
+            # scenarios 0, 2 and 4
+            self.assertEqual(profiler.scenarios, 3)
+            calls = [nc for (file_name, _, name), (_, nc, _, _, _) in profiler.stats.stats.items() if name == 'calculate_payoff']
+            self.assertEqual(calls, [3])
+
+            out = StringIO()
+            profiler.report(out)
+            self.assertIn('3 scenarios profiled', out.getvalue())
+            self.assertIn('cumulative', out.getvalue())
+
+    def test_grid_search_should_profile_from_environment(self):
+        output_file = os.path.join(self.temp_dir, 'grid.prof')
+        os.environ[profiling.PROFILE_ENVIRONMENT_VARIABLE] = output_file
+        list(analysis.grid_search([ConstantMaxPaymentDeterminer], [250, 300, 350], [EvenSplitPaymentManager()], [OptimalPaymentManager()],
+                                  self.accounts, date(2014, 6, 1), processes=2, chunk_size=1))
+
+        stats = pstats.Stats(output_file)
+        self.assertEqual([nc for (_, _, name), (_, nc, _, _, _) in stats.stats.items() if name == 'calculate_payoff'], [3])
+
+    def test_analyze_all_should_write_text_report(self):
+        output_file = os.path.join(self.temp_dir, 'report.txt')
+        list(analysis.analyze_all(self.scenarios[:2], processes=1, profiler=profiling.ScenarioProfiler(output_file)))
+        with open(output_file) as f:
+            self.assertIn('2 scenarios profiled', f.read())
+
+    def test_profile(self):
+        profiler = profiling.ScenarioProfiler()
+        result = profiler.profile(analysis.analyze, *self.scenarios[0])
+        self.assertEqual(result, analysis.analyze(*self.scenarios[0]))
+        self.assertEqual(profiler.scenarios, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,149 @@
+'''
+loan_payoff_tools: Test module.
+
+Meant for use with py.test.
+Write each test as a function named test_<something>.
+Read more here: http://pytest.org/
+
+Copyright 2014, Phillip Green II
+Licensed under MIT
+'''
+
+import unittest
+import os.path
+import tempfile
+import shutil
+import json
+from datetime import date
+
+import loan_payoff_tools.scenarios as scenarios
+from loan_payoff_tools.payment_manager import Account
+from loan_payoff_tools.payment_manager import EvenSplitPaymentManager
+from loan_payoff_tools.payment_manager import SpecifiedSplitPaymentManager
+from loan_payoff_tools.max_payment_determiner import ConstantMaxPaymentDeterminer
+from loan_payoff_tools.max_payment_determiner import MinimumAnnualRaiseAndBonusMaxPaymentDeterminer
+from loan_payoff_tools.money import Money
+
+try:
+    import yaml
+    yaml_available = True
+except ImportError:
+    yaml_available = False
+    pass
+
+
+class ScenariosTestCase(unittest.TestCase):
+    def setUp(self):
+        self.accounts = [Account("Bank0", "00", "Joe", 1000, 0.03, 100.00, date(2014, 5, 1)),
+                         Account("Bank1", "00", "Joe", 7500, 0.05, 50.00, date(2014, 5, 1))]
+
+    def test_build_max_payment_determiner(self):
+        mpd = scenarios.build_max_payment_determiner({'type': 'constant', 'max_payment': 2000, 'bonus': 50}, self.accounts)
+        self.assertIsInstance(mpd, ConstantMaxPaymentDeterminer)
+        self.assertEqual(mpd.id, 'constant_2000_50')
+
+    def test_build_max_payment_determiner_with_accounts_and_dates(self):
+        spec = {'type': 'minimum_annual_raise_and_bonus', 'inital_salary': 50000, 'annual_raise_percent': 0.03,
+                'annual_bonus_percent': 0.1, 'last_raise_date': '2014-04-01'}
+        mpd = scenarios.build_max_payment_determiner(spec, self.accounts)
+        self.assertIsInstance(mpd, MinimumAnnualRaiseAndBonusMaxPaymentDeterminer)
+        self.assertEqual(mpd.last_raise_date, date(2014, 4, 1))
+        self.assertEqual(mpd.initial_max_payment, Money(150))
+
+    def test_build_payment_manager(self):
+        self.assertIsInstance(scenarios.build_payment_manager('even_split'), EvenSplitPaymentManager)
+        pm = scenarios.build_payment_manager({'type': 'specified_split', 'split': {'Bank0': 0.75, 'Bank1': 0.25}})
+        self.assertIsInstance(pm, SpecifiedSplitPaymentManager)
+        self.assertEqual(pm.id, 'specified_split_7500_2500')
+
+    def test_build_with_unknown_type(self):
+        self.assertRaises(ValueError, scenarios.build_payment_manager, 'pay_nothing')
+        self.assertRaises(ValueError, scenarios.build_max_payment_determiner, {'max_payment': 100}, self.accounts)
+
+    def test_build_scenarios(self):
+        spec = {'starting_date': '2014-10-01',
+                'scenarios': [{'max_payment_determiner': {'type': 'constant', 'max_payment': 2000},
+                               'payment_manager': 'optimal',
+                               'bonus_payment_manager': 'even_split'}]}
+        built = list(scenarios.build_scenarios(spec, self.accounts))
+        self.assertEqual(len(built), 1)
+        self.assertEqual((built[0].max_payment_determiner.id, built[0].payment_manager.id, built[0].bonus_payment_manager.id),
+                         ('constant_2000_0', 'optimal', 'even_split'))
+        self.assertIs(built[0].accounts, self.accounts)
+        self.assertEqual(built[0].starting_date, date(2014, 10, 1))
+
+    def test_expand_component_spec(self):
+        self.assertEqual(list(scenarios.expand_component_spec('optimal')), ['optimal'])
+        self.assertEqual(list(scenarios.expand_component_spec(['optimal', 'even_split'])), ['optimal', 'even_split'])
+        self.assertEqual(list(scenarios.expand_component_spec({'type': 'constant', 'max_payment': {'start': 1000, 'stop': 1200, 'step': 100}, 'bonus': [0, 50]})),
+                         [{'type': 'constant', 'max_payment': 1000, 'bonus': 0},
+                          {'type': 'constant', 'max_payment': 1100, 'bonus': 0},
+                          {'type': 'constant', 'max_payment': 1200, 'bonus': 0},
+                          {'type': 'constant', 'max_payment': 1000, 'bonus': 50},
+                          {'type': 'constant', 'max_payment': 1100, 'bonus': 50},
+                          {'type': 'constant', 'max_payment': 1200, 'bonus': 50}])
+        self.assertEqual(list(scenarios.expand_component_spec({'type': 'annual_raise', 'annual_raise_percent': {'start': 0.01, 'stop': 0.03, 'step': 0.01}}))[2],
+                         {'type': 'annual_raise', 'annual_raise_percent': 0.03})
+        self.assertEqual(list(scenarios.expand_component_spec({'type': 'specified_split', 'split': {'Bank0': 0.75, 'Bank1': 0.25}})),
+                         [{'type': 'specified_split', 'split': {'Bank0': 0.75, 'Bank1': 0.25}}])
+
+    def test_build_scenarios_should_expand_ranges(self):
+        spec = {'scenarios': [{'max_payment_determiner': {'type': 'constant', 'max_payment': {'start': 1000, 'stop': 2000, 'step': 500}, 'bonus': 50},
+                               'payment_manager': ['optimal', 'even_split'],
+                               'bonus_payment_manager': ['optimal', 'even_split']}]}
+        built = list(scenarios.build_scenarios(spec, self.accounts))
+        self.assertEqual(len(built), 12)
+
+    def test_build_scenarios_should_dedupe_equivalent_scenarios(self):
+        spec = {'scenarios': [{'max_payment_determiner': [{'type': 'constant', 'max_payment': 1000},
+                                                          {'type': 'constant', 'max_payment': 1000.0, 'bonus': 0},
+                                                          {'type': 'constant', 'max_payment': 1000, 'bonus': 50}],
+                               'payment_manager': 'optimal',
+                               'bonus_payment_manager': ['optimal', 'even_split']},
+                              {'max_payment_determiner': {'type': 'constant', 'max_payment': 1000, 'bonus': 50},
+                               'payment_manager': 'optimal',
+                               'bonus_payment_manager': 'even_split'}]}
+        built = list(scenarios.build_scenarios(spec, self.accounts))
+        self.assertEqual([(s.max_payment_determiner.id, s.bonus_payment_manager.id) for s in built],
+                         [('constant_1000_0', 'optimal'), ('constant_1000_50', 'optimal'), ('constant_1000_50', 'even_split')])
+
+    def test_build_scenarios_should_not_dedupe_scenarios_with_same_id(self):
+        spec = {'scenarios': [{'max_payment_determiner': {'type': 'annual_raise', 'inital_salary': 50000, 'annual_raise_percent': [0.035, 0.04],
+                                                          'last_raise_date': '2014-04-01', 'initial_max_payment': 1000},
+                               'payment_manager': 'optimal',
+                               'bonus_payment_manager': 'optimal'}]}
+        built = list(scenarios.build_scenarios(spec, self.accounts))
+        self.assertEqual(len(built), 2)
+        self.assertEqual(built[0].max_payment_determiner.id, built[1].max_payment_determiner.id)
+
+    def test_load_spec(self):
+        temp_dir = tempfile.mkdtemp('scenarios-test')
+        try:
+            spec = {'starting_date': '2014-10-01', 'scenarios': []}
+            file_name = os.path.join(temp_dir, 'spec.json')
+            with open(file_name, 'wb') as f:
+                json.dump(spec, f)
+            self.assertEqual(scenarios.load_spec(file_name), spec)
+        finally:
+            shutil.rmtree(temp_dir)
+
+    @unittest.skipUnless(yaml_available, "yaml not available")
+    def test_load_spec_with_yaml(self):
+        temp_dir = tempfile.mkdtemp('scenarios-test')
+        try:
+            file_name = os.path.join(temp_dir, 'spec.yaml')
+            with open(file_name, 'wb') as f:
+                f.write("starting_date: 2014-10-01\n"
+                        "scenarios:\n"
+                        "  - max_payment_determiner: {type: constant, max_payment: {start: 1000, stop: 1100, step: 100}}\n"
+                        "    payment_manager: optimal\n"
+                        "    bonus_payment_manager: [optimal, even_split]\n")
+            built = list(scenarios.build_scenarios(scenarios.load_spec(file_name), self.accounts))
+            self.assertEqual([s.max_payment_determiner.id for s in built], ['constant_1000_0', 'constant_1100_0'])
+            self.assertEqual(built[0].starting_date, date(2014, 10, 1))
+        finally:
+            shutil.rmtree(temp_dir)
+
+
+if __name__ == '__main__':
+    unittest.main()
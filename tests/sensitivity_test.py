@@ -0,0 +1,68 @@
+'''
+loan_payoff_tools: Test module.
+
+Meant for use with py.test.
+Write each test as a function named test_<something>.
+Read more here: http://pytest.org/
+
+Copyright 2014, Phillip Green II
+Licensed under MIT
+'''
+
+import unittest
+from datetime import date
+
+import loan_payoff_tools.analysis as analysis
+import loan_payoff_tools.sensitivity as sensitivity
+from loan_payoff_tools.payment_manager import Account
+from loan_payoff_tools.payment_manager import EvenSplitPaymentManager
+from loan_payoff_tools.payment_manager import OptimalPaymentManager
+from loan_payoff_tools.max_payment_determiner import ConstantMaxPaymentDeterminer
+from loan_payoff_tools.max_payment_determiner import AnnualRaiseMaxPaymentDeterminer
+
+
+class SensitivityTestCase(unittest.TestCase):
+    def setUp(self):
+        self.accounts = [Account("Bank0", "00", "Joe", 5000, 0.03, 100.00, date(2014, 5, 1)),
+                         Account("Bank0", "01", "Joe", 7500, 0.05, 50.00, date(2014, 5, 1))]
+        self.starting_date = date(2014, 6, 1)
+
+    def test_analyze_sensitivity_parameters(self):
+        mpd = AnnualRaiseMaxPaymentDeterminer(50000, 0.03, date(2014, 1, 1), 500)
+        results = sensitivity.analyze_sensitivity(mpd, EvenSplitPaymentManager(), OptimalPaymentManager(), self.accounts, self.starting_date, processes=1)
+
+        self.assertEqual(results.parameters, ['Bank0:00.interest', 'Bank0:00.minimum_payment',
+                                              'Bank0:01.interest', 'Bank0:01.minimum_payment',
+                                              'salary', 'raise_percent'])
+        self.assertEqual(results.outputs, ('months', 'interest_paid'))
+        self.assertEqual(len(results.matrix), len(results.parameters))
+        self.assertEqual(results.base.months, analysis.analyze(mpd, EvenSplitPaymentManager(), OptimalPaymentManager(), self.accounts, self.starting_date).months)
+
+    def test_analyze_sensitivity_should_skip_missing_determiner_parameters(self):
+        mpd = ConstantMaxPaymentDeterminer(500)
+        results = sensitivity.analyze_sensitivity(mpd, EvenSplitPaymentManager(), OptimalPaymentManager(), self.accounts, self.starting_date, processes=1)
+
+        self.assertNotIn('salary', results.parameters)
+        self.assertNotIn('raise_percent', results.parameters)
+
+    def test_analyze_sensitivity_should_match_individual_analyses(self):
+        mpd = AnnualRaiseMaxPaymentDeterminer(50000, 0.03, date(2014, 1, 1), 500)
+        pm = EvenSplitPaymentManager()
+        results = sensitivity.analyze_sensitivity(mpd, pm, pm, self.accounts, self.starting_date, steps={'interest': 0.01}, processes=2, chunk_size=2)
+
+        base = analysis.analyze(mpd, pm, pm, self.accounts, self.starting_date)
+        bumped_accounts = [self.accounts[0], Account("Bank0", "01", "Joe", 7500, 0.06, 50.00, date(2014, 5, 1))]
+        bumped = analysis.analyze(mpd, pm, pm, bumped_accounts, self.starting_date)
+        row = results.matrix[results.parameters.index('Bank0:01.interest')]
+        self.assertAlmostEqual(row[0], (bumped.months - base.months) / 0.01)
+        self.assertAlmostEqual(row[1], (float(bumped.interest_paid) - float(base.interest_paid)) / 0.01)
+        self.assertGreater(row[1], 0)
+
+        bumped_mpd = AnnualRaiseMaxPaymentDeterminer(51000, 0.03, date(2014, 1, 1), 500)
+        bumped = analysis.analyze(bumped_mpd, pm, pm, self.accounts, self.starting_date)
+        row = results.matrix[results.parameters.index('salary')]
+        self.assertAlmostEqual(row[1], (float(bumped.interest_paid) - float(base.interest_paid)) / 1000.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -38,5 +38,10 @@ class UtilsTestCase(unittest.TestCase):
         self.assertEqual(utils.round_up(212, -2), 300)
         self.assertEqual(utils.round_up(3490, -2), 3500)
 
+    def test_chunked(self):
+        self.assertEqual(list(utils.chunked(range(7), 3)), [[0, 1, 2], [3, 4, 5], [6]])
+        self.assertEqual(list(utils.chunked(iter(range(6)), 3)), [[0, 1, 2], [3, 4, 5]])
+        self.assertEqual(list(utils.chunked([], 3)), [])
+
 if __name__ == '__main__':
     unittest.main()